@@ -1,28 +1,46 @@
 # adapters/binance_oracle.py
 import asyncio, json, threading, time, ssl
-from typing import List, Tuple, Optional
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple, Optional
 import aiohttp
 
 from models.depth import DepthSnapshot
 
+REST_DEPTH_URL = "https://api.binance.com/api/v3/depth?symbol={symbol}&limit=1000"
+WS_DEPTH_URL = "wss://stream.binance.com:9443/ws/{stream}"
+
+
 class BinanceOracle:
     """
     Binance depth 오라클 유지 (심볼 예: 'SOLUSDT').
     - start(): 백그라운드에서 REST 스냅샷 + WS 업데이트
     - get_depth(levels): 최신 스냅샷을 DepthSnapshot으로 반환
+    - 전체 호가는 dict + 정렬된 가격 키(bisect)로 유지하고, 업데이트가 상위 levels 를 건드렸을
+      때만 상위 levels 스냅샷을 다시 만들어 둔다 → 업데이트 비용이 호가 깊이에 비례하지 않고,
+      읽는 쪽은 참조만 가져간다 (락 없이 수 µs)
+    - rest_url / ws_url 로 로컬 스탠드인(tests/depth_stream_smoke.py)에 붙일 수 있다
     """
-    def __init__(self, symbol: str = "SOLUSDT", levels: int = 10):
+    def __init__(self, symbol: str = "SOLUSDT", levels: int = 10,
+                 rest_url: str = REST_DEPTH_URL, ws_url: str = WS_DEPTH_URL):
         self.symbol = symbol.upper()
         self.levels = int(levels)
-        self._bids: List[Tuple[float, float]] = []
-        self._asks: List[Tuple[float, float]] = []
+        self.rest_url = rest_url
+        self.ws_url = ws_url
+
+        self._bid_book: Dict[float, float] = {}
+        self._ask_book: Dict[float, float] = {}
+        self._bid_keys: List[float] = []   # 오름차순 (최우선 매수 = 끝)
+        self._ask_keys: List[float] = []   # 오름차순 (최우선 매도 = 처음)
         self._last_u: int = 0
+        self._snapshot: Optional[DepthSnapshot] = None
+        self.updated_at: float = 0.0   # 마지막 반영 시각 (time.time)
+        self.updates: int = 0
 
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._thread: Optional[threading.Thread] = None
         self._stop_evt = threading.Event()
 
-        self._lock = threading.Lock()  # 스냅샷 보호
+        self._lock = threading.Lock()  # 북 갱신 보호 (읽기는 _snapshot 참조만)
 
     # ---------- public ----------
     def start(self):
@@ -32,24 +50,34 @@ class BinanceOracle:
         self._thread = threading.Thread(target=self._run_loop, name="BinanceOracleLoop", daemon=True)
         self._thread.start()
 
-    def stop(self, timeout: float = 3.0):
+    def stop(self, timeout: Optional[float] = 3.0):
+        """
+        루프에 멈춤 신호. timeout=None 이면 기다리지 않고 바로 돌아온다
+        (UI 스레드에서 호출할 때 — 데몬 스레드가 다음 메시지/재접속 시점에 알아서 끝난다)
+        """
         self._stop_evt.set()
         if self._loop and self._loop.is_running():
             asyncio.run_coroutine_threadsafe(self._shutdown_async(), self._loop)
-        if self._thread:
+        if self._thread and timeout is not None:
             self._thread.join(timeout=timeout)
 
     def get_binance_depth(self, levels: Optional[int] = None) -> Optional[DepthSnapshot]:
         """
         최신 호가를 DepthSnapshot으로 반환. (없으면 None)
         """
-        lv = levels or self.levels
-        with self._lock:
-            if not self._bids and not self._asks:
-                return None
-            bids = [(p, int(s), 1) for (p, s) in self._bids[:lv]]
-            asks = [(p, int(s), 1) for (p, s) in self._asks[:lv]]
-        return DepthSnapshot(bids=bids, asks=asks, mid=DepthSnapshot.calc_mid(bids, asks))
+        snap = self._snapshot
+        if snap is None:
+            return None
+        if levels is None or levels >= self.levels:
+            return snap
+        bids, asks = snap.bids[:levels], snap.asks[:levels]
+        return DepthSnapshot(bids=bids, asks=asks, mid=snap.mid, symbol=self.symbol)
+
+    def wait_ready(self, timeout: float = 5.0) -> bool:
+        t0 = time.monotonic()
+        while self._snapshot is None and time.monotonic() - t0 < timeout:
+            time.sleep(0.01)
+        return self._snapshot is not None
 
     # ---------- internal ----------
     def _run_loop(self):
@@ -66,22 +94,22 @@ class BinanceOracle:
         await asyncio.sleep(0.05)
 
     async def _main(self):
-        ssl_ctx = ssl.create_default_context()
+        ws_url = self.ws_url.format(stream=f"{self.symbol.lower()}@depth@100ms", symbol=self.symbol)
+        ssl_ctx = ssl.create_default_context() if ws_url.startswith("wss") else None
         async with aiohttp.ClientSession() as session:
-            # 1) REST 스냅샷
-            await self._rest_snapshot(session)
-            # 2) WS 구독
-            stream = f"{self.symbol.lower()}@depth@100ms"
-            ws_url = f"wss://stream.binance.com:9443/ws/{stream}"
             while not self._stop_evt.is_set():
                 try:
                     async with session.ws_connect(ws_url, ssl=ssl_ctx, heartbeat=20) as ws:
+                        # 1) 구독 후 REST 스냅샷 (그 사이 들어온 업데이트는 lastUpdateId 로 걸러짐)
+                        await self._rest_snapshot(session)
+                        # 2) WS 업데이트
                         async for msg in ws:
                             if self._stop_evt.is_set():
                                 break
                             if msg.type == aiohttp.WSMsgType.TEXT:
-                                j = json.loads(msg.data)
-                                self._apply_update(j)
+                                if not self._apply_update(json.loads(msg.data)):
+                                    # 시퀀스 갭 → 스냅샷부터 다시
+                                    await self._rest_snapshot(session)
                             elif msg.type == aiohttp.WSMsgType.ERROR:
                                 break
                 except Exception:
@@ -89,37 +117,77 @@ class BinanceOracle:
                     await asyncio.sleep(1.0)
 
     async def _rest_snapshot(self, session: aiohttp.ClientSession):
-        url = f"https://api.binance.com/api/v3/depth?symbol={self.symbol}&limit=1000"
-        async with session.get(url, timeout=10) as r:
+        url = self.rest_url.format(symbol=self.symbol)
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as r:
             j = await r.json()
-        bids = [(float(p), float(s)) for p, s in j["bids"]]
-        asks = [(float(p), float(s)) for p, s in j["asks"]]
         with self._lock:
-            self._bids = sorted(bids, key=lambda x: x[0], reverse=True)[:self.levels]
-            self._asks = sorted(asks, key=lambda x: x[0])[:self.levels]
+            self._bid_book = {float(p): float(s) for p, s in j["bids"]}
+            self._ask_book = {float(p): float(s) for p, s in j["asks"]}
+            self._bid_keys = sorted(self._bid_book)
+            self._ask_keys = sorted(self._ask_book)
             self._last_u = int(j["lastUpdateId"])
+            self._publish()
 
-    def _apply_update(self, data: dict):
-        # data: contains U, u, b(업데이트 bids), a(업데이트 asks)
+    def _apply_update(self, data: dict) -> bool:
+        """
+        data: contains U, u, b(업데이트 bids), a(업데이트 asks)
+        반환: False 면 업데이트 누락(갭) → 스냅샷 재요청 필요
+        """
         if "U" not in data or "u" not in data:
-            return
+            return True
         U, u = int(data["U"]), int(data["u"])
         with self._lock:
-            # 기본 필터: 예전 업데이트는 무시
+            # 예전 업데이트는 무시
             if u <= self._last_u:
-                return
+                return True
+            if U > self._last_u + 1:
+                return False
             self._last_u = u
 
-            def apply(side_list, updates, reverse):
-                d = {p: s for p, s in side_list}  # price->size
-                for p, s in updates:
-                    p = float(p); s = float(s)
-                    if s == 0:
-                        d.pop(p, None)
-                    else:
-                        d[p] = s
-                new_list = sorted(d.items(), key=lambda x: x[0], reverse=reverse)[:self.levels]
-                return new_list
-
-            self._bids = apply(self._bids, data.get("b", []), True)
-            self._asks = apply(self._asks, data.get("a", []), False)
+            touched = self._apply_side(self._bid_book, self._bid_keys, data.get("b", []), True)
+            touched |= self._apply_side(self._ask_book, self._ask_keys, data.get("a", []), False)
+            if touched:
+                self._publish()
+            else:
+                # 상위 levels 밖만 바뀜 → 스냅샷은 그대로
+                self.updated_at = time.time()
+                self.updates += 1
+        return True
+
+    def _apply_side(self, book: Dict[float, float], keys: List[float], updates, is_bid: bool) -> bool:
+        """한쪽 diff 반영. 반환: 상위 levels 안쪽 가격이 바뀌었는지"""
+        if not updates:
+            return False
+        # 반영 전 N 번째 가격 — 이보다 안쪽(같거나 좋은) 가격이 바뀌어야 상위 N 이 달라진다
+        n = self.levels
+        if len(keys) < n:
+            edge = float("-inf") if is_bid else float("inf")
+        else:
+            edge = keys[-n] if is_bid else keys[n - 1]
+
+        touched = False
+        for p, s in updates:
+            p = float(p); s = float(s)
+            if s == 0:
+                if book.pop(p, None) is None:
+                    continue
+                del keys[bisect_left(keys, p)]
+            else:
+                if p not in book:
+                    insort(keys, p)
+                book[p] = s
+            if (p >= edge) if is_bid else (p <= edge):
+                touched = True
+        return touched
+
+    def _publish(self):
+        """상위 levels 만 뽑아 새 스냅샷 객체로 교체 (읽는 쪽은 항상 완성된 객체를 본다)"""
+        n = self.levels
+        top_bids = self._bid_keys[max(len(self._bid_keys) - n, 0):][::-1]
+        top_asks = self._ask_keys[:n]
+        bids = [(p, self._bid_book[p], i) for i, p in enumerate(top_bids)]
+        asks = [(p, self._ask_book[p], i) for i, p in enumerate(top_asks)]
+        self._snapshot = DepthSnapshot(bids=bids, asks=asks, mid=DepthSnapshot.calc_mid(bids, asks),
+                                       symbol=self.symbol)
+        self.updated_at = time.time()
+        self.updates += 1
@@ -0,0 +1,2 @@
+# bench/ — MatchingEngine / OrderSimulator 처리량·지연 벤치마크
+#   python -m bench.run_matching --db memory --out bench_result.json
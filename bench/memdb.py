@@ -0,0 +1,107 @@
+# bench/memdb.py
+import re
+
+
+class _CountingCursor:
+    """실제 cursor 를 감싸서 execute 횟수만 센다"""
+
+    def __init__(self, cur, owner):
+        self._cur = cur
+        self._owner = owner
+
+    def execute(self, sql, params=None):
+        self._owner.statements += 1
+        return self._cur.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cur.close()
+        return False
+
+
+class CountingConnection:
+    """psycopg2 커넥션 래퍼 — 라운드트립(문장 수) 집계용"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.statements = 0
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._conn.cursor(*args, **kwargs), self)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class _MemoryCursor:
+    """
+    MatchingEngine 이 쓰는 문장만 흉내내는 cursor.
+    - SELECT (부트스트랩/신규 주문 조회) → 빈 결과 (벤치는 submit_order 경로로 주문을 넣는다)
+    - UPDATE ... RETURNING id (취소) → 넘겨받은 id 그대로
+    - execute_values 로 보낸 UPDATE ... RETURNING (체결 잔량) → VALUES 첫 컬럼 id 그대로 (전부 살아있다고 본다)
+    - 나머지 INSERT/UPDATE → 실행했다고 치고 무시
+    """
+
+    _RETURNING_ID = re.compile(r"RETURNING\s+(?:\w+\.)?id", re.IGNORECASE)
+
+    def __init__(self, conn):
+        self.connection = conn
+        self._rows = []
+        self._values_ids = []
+
+    def execute(self, sql, params=None):
+        self.connection.statements += 1
+        text = sql.decode() if isinstance(sql, bytes) else sql
+        if self._RETURNING_ID.search(text) and params:
+            self._rows = [(i,) for i in params[0]]
+        elif self._RETURNING_ID.search(text) and self._values_ids:
+            self._rows = [(i,) for i in self._values_ids]
+        else:
+            self._rows = []
+        self._values_ids = []
+
+    def mogrify(self, template, args):
+        # execute_values 용: 실제 이스케이프는 필요 없고 길이만 비슷하면 된다
+        if isinstance(template, bytes):
+            template = template.decode()
+        self._values_ids.append(args[0])
+        return (template % tuple(repr(a) for a in args)).encode()
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class MemoryConnection:
+    """Postgres 없이 돌리는 in-memory stand-in (문장 수는 똑같이 센다)"""
+
+    encoding = "UTF8"
+
+    def __init__(self):
+        self.statements = 0
+
+    def cursor(self, *args, **kwargs):
+        return _MemoryCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
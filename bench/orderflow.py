@@ -0,0 +1,104 @@
+# bench/orderflow.py
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence
+
+
+@dataclass
+class FlowEvent:
+    """벤치마크 입력 이벤트 한 건"""
+    kind: str                        # order / cancel
+    symbol: str
+    row: Optional[dict] = None       # kind == order 일 때 orders 행 모양 dict
+    order_ids: List[int] = field(default_factory=list)  # kind == cancel
+
+
+class OrderFlow:
+    """
+    합성 주문 흐름 생성기. 같은 seed 면 항상 같은 이벤트열 → 커밋 간 비교 가능.
+    가격은 mid 주변 tick 단위, 수량은 정수 lot.
+    """
+
+    def __init__(self, seed: int = 42, mid: float = 100.0, tick: float = 0.01, start_id: int = 1):
+        self.rng = random.Random(seed)
+        self.mid = mid
+        self.tick = tick
+        self._next_id = start_id
+        self._resting: List[int] = []
+        self._symbol_of: Dict[int, str] = {}   # order id → 심볼 (취소 이벤트용)
+        self._created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def _order(self, symbol: str, side: str, price: float, qty: int) -> FlowEvent:
+        oid = self._next_id
+        self._next_id += 1
+        self._resting.append(oid)
+        self._symbol_of[oid] = symbol
+        row = {
+            "id": oid,
+            "account_id": self.rng.randint(1, 50),
+            "side": side,
+            "price": round(price, 8),
+            "remaining_qty": qty,
+            "created_at": self._created,
+        }
+        return FlowEvent("order", symbol, row=row)
+
+    # ---------- 시나리오 ----------
+    def random_limits(self, n: int, symbol: str, depth_ticks: int = 50) -> Iterator[FlowEvent]:
+        """mid ± depth_ticks 안에서 무작위 지정가 (일부는 교차해서 체결)"""
+        for _ in range(n):
+            side = self.rng.choice(("BUY", "SELL"))
+            off = self.rng.randint(-depth_ticks // 5, depth_ticks)
+            price = self.mid - off * self.tick if side == "BUY" else self.mid + off * self.tick
+            yield self._order(symbol, side, price, self.rng.randint(1, 10))
+
+    def aggressive_sweeps(self, n: int, symbol: str, depth_ticks: int = 50, sweep_every: int = 20) -> Iterator[FlowEvent]:
+        """호가를 쌓다가 sweep_every 건마다 여러 레벨을 한 번에 쓸어가는 큰 주문"""
+        for i in range(n):
+            if i % sweep_every == sweep_every - 1:
+                side = self.rng.choice(("BUY", "SELL"))
+                price = self.mid + depth_ticks * self.tick if side == "BUY" else self.mid - depth_ticks * self.tick
+                yield self._order(symbol, side, price, self.rng.randint(50, 200))
+            else:
+                side = self.rng.choice(("BUY", "SELL"))
+                off = self.rng.randint(1, depth_ticks)
+                price = self.mid - off * self.tick if side == "BUY" else self.mid + off * self.tick
+                yield self._order(symbol, side, price, self.rng.randint(1, 10))
+
+    def cancel_storm(self, n: int, symbol: str, batch: int = 100) -> Iterator[FlowEvent]:
+        """n 건 적재 후 batch 단위 일괄 취소"""
+        yield from self.random_limits(n, symbol)
+        ids = list(self._resting)
+        self.rng.shuffle(ids)
+        for i in range(0, len(ids), batch):
+            yield FlowEvent("cancel", symbol, order_ids=ids[i:i + batch])
+        self._resting.clear()
+
+    def multi_symbol_mix(self, n: int, symbols: Sequence[str]) -> Iterator[FlowEvent]:
+        """여러 심볼 지정가/취소가 섞인 흐름"""
+        for _ in range(n):
+            symbol = self.rng.choice(symbols)
+            if self._resting and self.rng.random() < 0.1:
+                oid = self._resting.pop(self.rng.randrange(len(self._resting)))
+                # 취소는 그 주문이 들어간 심볼로 (무작위 심볼이면 엔진이 엉뚱한 책에서 찾는다)
+                yield FlowEvent("cancel", self._symbol_of[oid], order_ids=[oid])
+            else:
+                yield from self.random_limits(1, symbol)
+
+
+SCENARIOS = ("random_limits", "aggressive_sweeps", "cancel_storm", "multi_symbol_mix")
+MIX_SYMBOLS = ("BENCHBTC", "BENCHETH", "BENCHSOL", "BENCHBNB", "BENCHXRP")
+
+
+def build_flow(scenario: str, n: int, seed: int = 42) -> List[FlowEvent]:
+    flow = OrderFlow(seed=seed)
+    if scenario == "random_limits":
+        return list(flow.random_limits(n, "BENCHSOL"))
+    if scenario == "aggressive_sweeps":
+        return list(flow.aggressive_sweeps(n, "BENCHSOL"))
+    if scenario == "cancel_storm":
+        return list(flow.cancel_storm(n, "BENCHSOL"))
+    if scenario == "multi_symbol_mix":
+        return list(flow.multi_symbol_mix(n, MIX_SYMBOLS))
+    raise ValueError(f"Unknown scenario: {scenario}")
@@ -0,0 +1,250 @@
+# bench/run_matching.py
+"""
+MatchingEngine / OrderSimulator 벤치마크.
+
+    python -m bench.run_matching                       # in-memory stand-in
+    python -m bench.run_matching --db postgres         # docker compose 로컬 Postgres
+    python -m bench.run_matching --out bench_result.json
+
+결과는 sort_keys JSON 이라 커밋 간 diff 로 비교할 수 있다.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+from bench.memdb import CountingConnection, MemoryConnection
+from bench.orderflow import MIX_SYMBOLS, SCENARIOS, build_flow
+from models.depth import DepthBook, DepthSnapshot
+from services.matching_engine import MatchingEngine
+from services.order_simulator import OrderSimulator
+
+
+def percentiles(samples_ns: List[int]) -> Dict[str, float]:
+    """p50/p99/p99.9 (마이크로초)"""
+    if not samples_ns:
+        return {"p50_us": 0.0, "p99_us": 0.0, "p999_us": 0.0, "max_us": 0.0}
+    s = sorted(samples_ns)
+    n = len(s)
+
+    def pick(q):
+        return round(s[min(n - 1, int(q * n))] / 1000.0, 3)
+
+    return {"p50_us": pick(0.50), "p99_us": pick(0.99), "p999_us": pick(0.999), "max_us": round(s[-1] / 1000.0, 3)}
+
+
+# ---------------------------------------------
+# DB 준비
+# ---------------------------------------------
+def _open_db(kind: str):
+    if kind == "memory":
+        return MemoryConnection(), None
+
+    import psycopg2
+    from infra.db import PG_DSN
+
+    engine_conn = CountingConnection(psycopg2.connect(PG_DSN))
+    loader = psycopg2.connect(PG_DSN)
+    return engine_conn, loader
+
+
+def _insert_order(loader, symbol: str, row: dict):
+    """postgres 모드: 엔진이 UPDATE 할 실제 행을 미리 넣어둔다 (측정 제외)"""
+    with loader.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO orders (id, account_id, symbol, side, price, qty, remaining_qty, status, created_at)
+            VALUES (%s, NULL, %s, %s, %s, %s, %s, 'WORKING', %s);
+            """,
+            (row["id"], symbol, row["side"], row["price"], row["remaining_qty"], row["remaining_qty"], row["created_at"]),
+        )
+    loader.commit()
+
+
+def _cleanup(loader):
+    with loader.cursor() as cur:
+        cur.execute("DELETE FROM trades WHERE symbol LIKE 'BENCH%%';")
+        cur.execute("DELETE FROM orders WHERE symbol LIKE 'BENCH%%';")
+    loader.commit()
+
+
+# ---------------------------------------------
+# MatchingEngine
+# ---------------------------------------------
+def bench_engine(scenario: str, n: int, seed: int, db: str, id_base: int) -> dict:
+    events = build_flow(scenario, n, seed)
+    conn, loader = _open_db(db)
+    engine = MatchingEngine(SimpleNamespace(conn=conn))
+
+    # 부트스트랩은 측정에서 제외
+    for symbol in MIX_SYMBOLS:
+        engine.match_symbol(symbol)
+    if loader is not None:
+        _cleanup(loader)
+    conn.statements = 0
+
+    latencies: List[int] = []
+    fills = 0
+    orders = 0
+    cancels = 0
+
+    t_start = time.perf_counter()
+    for ev in events:
+        if ev.kind == "order":
+            ev.row["id"] += id_base
+            if loader is not None:
+                _insert_order(loader, ev.symbol, ev.row)
+            t0 = time.perf_counter_ns()
+            trades = engine.submit_order(ev.symbol, ev.row)
+            latencies.append(time.perf_counter_ns() - t0)
+            fills += len(trades)
+            orders += 1
+        else:
+            ids = [i + id_base for i in ev.order_ids]
+            t0 = time.perf_counter_ns()
+            engine.cancel_orders(ids)
+            latencies.append(time.perf_counter_ns() - t0)
+            cancels += len(ids)
+    elapsed = time.perf_counter() - t_start
+
+    if loader is not None:
+        _cleanup(loader)
+        loader.close()
+        conn.close()
+
+    return {
+        "events": len(events),
+        "orders": orders,
+        "cancels": cancels,
+        "fills": fills,
+        "orders_per_sec": round(len(events) / elapsed, 1) if elapsed else 0.0,
+        "latency": percentiles(latencies),
+        "db_statements": conn.statements,
+        "db_statements_per_fill": round(conn.statements / fills, 3) if fills else None,
+    }
+
+
+# ---------------------------------------------
+# OrderSimulator
+# ---------------------------------------------
+def _deep_depth(levels: int) -> DepthSnapshot:
+    bids = [(100.0 - i * 0.01, 10, i) for i in range(levels)]
+    asks = [(100.01 + i * 0.01, 10, i) for i in range(levels)]
+    return DepthSnapshot(bids, asks, DepthSnapshot.calc_mid(bids, asks), "BENCHSOL")
+
+
+def bench_simulator(n: int, levels: int) -> dict:
+    sim = OrderSimulator()
+    depth = _deep_depth(levels)
+    out = {}
+
+    columnar = DepthBook.from_snapshot(depth)
+    # 지정가는 최우선 3 레벨까지 닿고 그 안에서 전량 체결 (미체결이 쌓이지 않게)
+    buy_limit = lambda qty, book: sim.buy_limit_now_or_queue(100.03, qty, book)
+    sell_limit = lambda qty, book: sim.sell_limit_now_or_queue(99.98, qty, book)
+    cases = (
+        ("market_small", 5, depth, sim.buy_market, sim.sell_market),
+        ("market_sweep", levels * 5, depth, sim.buy_market, sim.sell_market),
+        ("market_sweep_columnar", levels * 5, columnar, sim.buy_market, sim.sell_market),
+        ("limit_cross", 25, depth, buy_limit, sell_limit),
+        ("limit_cross_columnar", 25, columnar, buy_limit, sell_limit),
+    )
+    for name, qty, book, buy, sell in cases:
+        latencies = []
+        t_start = time.perf_counter()
+        for i in range(n):
+            fn = buy if i % 2 == 0 else sell
+            t0 = time.perf_counter_ns()
+            fn(qty, book)
+            latencies.append(time.perf_counter_ns() - t0)
+        elapsed = time.perf_counter() - t_start
+        out[name] = {
+            "orders": n,
+            "depth_levels": levels,
+            "orders_per_sec": round(n / elapsed, 1) if elapsed else 0.0,
+            "latency": percentiles(latencies),
+        }
+
+    # 미체결 N 건을 깔아두고 depth 틱마다 일부만 교차시키는 경우
+    touch = DepthSnapshot([(100.5, 1, 0)] + depth.bids, depth.asks, depth.mid, "BENCHSOL")
+    for name, ticks in (
+        ("working_ticks", (depth, touch)),
+        ("working_ticks_columnar", (columnar, DepthBook.from_snapshot(touch))),
+    ):
+        sim = OrderSimulator()
+        for i in range(n):
+            sim.sell_limit_now_or_queue(100.5 + (i % 100) * 0.01, 1, depth)
+            sim.buy_limit_now_or_queue(99.5 - (i % 100) * 0.01, 1, depth)
+        latencies = []
+        fills = 0
+        t_start = time.perf_counter()
+        for i in range(n):
+            t0 = time.perf_counter_ns()
+            f, _ = sim.match_working_on_depth(ticks[i % 2 == 0])
+            latencies.append(time.perf_counter_ns() - t0)
+            fills += len(f)
+        elapsed = time.perf_counter() - t_start
+        out[name] = {
+            "ticks": n,
+            "working_orders": n * 2,
+            "fills": fills,
+            "ticks_per_sec": round(n / elapsed, 1) if elapsed else 0.0,
+            "latency": percentiles(latencies),
+        }
+    return out
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="MatchingEngine / OrderSimulator benchmark")
+    ap.add_argument("--db", choices=("memory", "postgres"), default="memory")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--orders", type=int, default=20000)
+    ap.add_argument("--sim-orders", type=int, default=2000)
+    ap.add_argument("--sim-levels", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", default=None, help="JSON 저장 경로 (기본: stdout)")
+    args = ap.parse_args(argv)
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "db": args.db,
+            "orders": args.orders,
+            "seed": args.seed,
+        },
+        "engine": {},
+        "simulator": {},
+    }
+
+    # 엔진의 체결 로그(print)는 측정을 왜곡하므로 버린다
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        id_base = int(time.time()) * 1_000_000 if args.db == "postgres" else 0
+        for i, scenario in enumerate(s for s in args.scenarios.split(",") if s):
+            result["engine"][scenario] = bench_engine(
+                scenario, args.orders, args.seed, args.db, id_base + i * (args.orders * 2)
+            )
+        result["simulator"] = bench_simulator(args.sim_orders, args.sim_levels)
+
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
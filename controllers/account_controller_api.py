@@ -1,5 +1,5 @@
 # controllers/account_controller_api.py
-import requests
+from infra.http import HttpTransport, shared_transport
 
 
 class AccountControllerAPI:
@@ -7,8 +7,9 @@ class AccountControllerAPI:
     PyQt → FastAPI 계좌 관련 API 호출 컨트롤러
     """
 
-    def __init__(self, base_url="http://127.0.0.1:9000"):
+    def __init__(self, base_url="http://127.0.0.1:9000", http: HttpTransport = None):
         self.base_url = base_url.rstrip("/")
+        self.http = http or shared_transport()  # 공용 keep-alive 세션
         self.access_token = None  # AuthControllerAPI 에서 주입해야 함
 
     # ---------------------------------------------------
@@ -25,7 +26,7 @@ class AccountControllerAPI:
     def get_primary_account_id(self, user_id: int):
         try:
             url = f"{self.base_url}/account/primary"
-            res = requests.get(url, headers=self._headers(), timeout=3)
+            res = self.http.get(url, headers=self._headers(), timeout=3)
 
             if res.status_code == 401:
                 print("[AccountAPI] get_primary_account_id: Unauthorized (token missing or expired)")
@@ -49,7 +50,7 @@ class AccountControllerAPI:
             url = f"{self.base_url}/account/summary"
             params = {"account_id": account_id}
 
-            res = requests.get(url, params=params, headers=self._headers(), timeout=3)
+            res = self.http.get(url, params=params, headers=self._headers(), timeout=3)
             if res.status_code != 200:
                 print("[AccountAPI] get_account_summary error:", res.text)
                 return {"balance": 0, "positions": []}
@@ -65,7 +66,7 @@ class AccountControllerAPI:
     def get_accounts_by_user(self, user_id: int):
         try:
             url = f"{self.base_url}/account/list"
-            res = requests.get(url, headers=self._headers(), timeout=3)
+            res = self.http.get(url, headers=self._headers(), timeout=3)
             if res.status_code != 200:
                 print("[AccountAPI] get_accounts_by_user error:", res.text)
                 return []
@@ -85,7 +86,7 @@ class AccountControllerAPI:
                 "account_no": account_no,
             }
 
-            res = requests.post(url, json=body, headers=self._headers(), timeout=5)
+            res = self.http.post(url, json=body, headers=self._headers(), timeout=5)
             if res.status_code != 200:
                 print("[AccountAPI] open_account error:", res.text)
                 return None
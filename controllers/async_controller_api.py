@@ -0,0 +1,166 @@
+# controllers/async_controller_api.py
+"""
+controllers/*_api.py 의 asyncio 판 (httpx.AsyncClient 풀 공유).
+반환값/실패 시 기본값은 동기 클라이언트와 같다.
+
+    async with AsyncHttpTransport() as http:
+        snap = await refresh_all(http, user_id, account_id, "SOLUSDT")
+
+서로 독립인 잔고/미체결/체결/로컬 호가 조회를 asyncio.gather 로 동시에 보내므로
+한 번의 갱신 지연이 호출 합이 아니라 가장 느린 호출 하나로 줄어든다.
+"""
+import asyncio
+
+from infra.http import AsyncHttpTransport
+
+DEFAULT_BASE = "http://127.0.0.1:9000"
+
+
+class AsyncAccountControllerAPI:
+    def __init__(self, http: AsyncHttpTransport, base_url=DEFAULT_BASE):
+        self.http = http
+        self.base_url = base_url.rstrip("/")
+
+    async def get_primary_account_id(self, user_id: int):
+        try:
+            res = await self.http.get(f"{self.base_url}/account/primary", timeout=3)
+            if res.status_code == 401:
+                print("[AsyncAccountAPI] get_primary_account_id: Unauthorized (token missing or expired)")
+                return None
+            if res.status_code != 200:
+                print("[AsyncAccountAPI] get_primary_account_id error:", res.text)
+                return None
+            return res.json().get("account_id")
+        except Exception as e:
+            print("[AsyncAccountAPI] get_primary_account_id exception:", e)
+            return None
+
+    async def get_account_summary(self, account_id: int):
+        try:
+            res = await self.http.get(f"{self.base_url}/account/summary",
+                                      params={"account_id": account_id}, timeout=3)
+            if res.status_code != 200:
+                print("[AsyncAccountAPI] get_account_summary error:", res.text)
+                return {"balance": 0, "positions": []}
+            return res.json()
+        except Exception as e:
+            print("[AsyncAccountAPI] get_summary exception:", e)
+            return {"balance": 0, "positions": []}
+
+    async def get_accounts_by_user(self, user_id: int):
+        try:
+            res = await self.http.get(f"{self.base_url}/account/list", timeout=3)
+            if res.status_code != 200:
+                print("[AsyncAccountAPI] get_accounts_by_user error:", res.text)
+                return []
+            return res.json()
+        except Exception as e:
+            print("[AsyncAccountAPI] get_accounts exception:", e)
+            return []
+
+
+class AsyncOrdersControllerAPI:
+    def __init__(self, http: AsyncHttpTransport, api_url=DEFAULT_BASE):
+        self.http = http
+        self.api_url = api_url.rstrip("/")
+
+    async def _post(self, path: str, payload: dict, name: str):
+        try:
+            res = await self.http.post(f"{self.api_url}{path}", json=payload)
+            res.raise_for_status()
+            return res.json()
+        except Exception as e:
+            print(f"[AsyncOrdersAPI] {name} error:", e)
+            return None
+
+    async def place_limit(self, user_id, account_id, symbol, side, price, qty):
+        return await self._post("/orders/limit", {
+            "user_id": user_id,
+            "account_id": account_id,
+            "symbol": symbol,
+            "side": side,
+            "price": price,
+            "qty": qty,
+        }, "place_limit")
+
+    async def place_market(self, user_id, account_id, symbol, side, qty):
+        return await self._post("/orders/market", {
+            "user_id": user_id,
+            "account_id": account_id,
+            "symbol": symbol,
+            "side": side,
+            "qty": qty,
+        }, "place_market")
+
+    async def cancel_orders(self, order_ids):
+        return await self._post("/orders/cancel", {"order_ids": order_ids}, "cancel_orders")
+
+    async def get_user_working_orders(self, user_id, limit=100):
+        try:
+            res = await self.http.get(f"{self.api_url}/orders/working",
+                                      params={"user_id": user_id, "limit": limit})
+            res.raise_for_status()
+            return res.json()
+        except Exception as e:
+            print("[AsyncOrdersAPI] get_user_working_orders error:", e)
+            return []
+
+
+class AsyncTradeControllerAPI:
+    def __init__(self, http: AsyncHttpTransport, engine_url=DEFAULT_BASE):
+        self.http = http
+        self.engine_url = engine_url.rstrip("/")
+
+    async def get_trades(self, limit=100):
+        try:
+            r = await self.http.get(f"{self.engine_url}/trades/my", params={"limit": limit})
+        except Exception as e:
+            print("[AsyncTradeAPI] get_trades exception:", e)
+            return []
+        if r.status_code != 200:
+            print("[AsyncTradeAPI] get_trades error:", r.text)
+            return []
+        return r.json()
+
+
+class AsyncOrderBookAPIClient:
+    def __init__(self, http: AsyncHttpTransport, api_url=DEFAULT_BASE):
+        self.http = http
+        self.api_url = api_url.rstrip("/")
+
+    async def _get(self, path: str, symbol: str, default: dict, timeout):
+        try:
+            r = await self.http.get(f"{self.api_url}{path}", params={"symbol": symbol}, timeout=timeout)
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            print(f"[AsyncOrderBookAPI] {path} error:", e)
+            return default
+
+    async def get_local_depth(self, symbol):
+        return await self._get("/orderbook/local", symbol, {"bids": [], "asks": []}, 2)
+
+    async def get_binance_depth(self, symbol):
+        return await self._get("/orderbook/binance", symbol, {"bids": [], "asks": [], "mid": 0}, 2)
+
+    async def get_depth(self, symbol):
+        return await self._get("/orderbook/merged", symbol, {"bids": [], "asks": [], "mid": 0}, 3)
+
+
+async def refresh_all(http: AsyncHttpTransport, user_id, account_id, symbol, base_url=DEFAULT_BASE) -> dict:
+    """
+    타이머 한 번에 필요한 조회를 동시에 보낸다.
+    반환: {"summary", "working_orders", "trades", "local_depth"}
+    """
+    account = AsyncAccountControllerAPI(http, base_url)
+    orders = AsyncOrdersControllerAPI(http, base_url)
+    trades = AsyncTradeControllerAPI(http, base_url)
+    book = AsyncOrderBookAPIClient(http, base_url)
+
+    summary, working, fills, depth = await asyncio.gather(
+        account.get_account_summary(account_id),
+        orders.get_user_working_orders(user_id),
+        trades.get_trades(),
+        book.get_local_depth(symbol),
+    )
+    return {"summary": summary, "working_orders": working, "trades": fills, "local_depth": depth}
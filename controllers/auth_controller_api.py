@@ -2,15 +2,16 @@
 import hashlib
 
 from typing import Optional, Dict, Any
-import requests
+from infra.http import HttpTransport, shared_transport
 # from services.db_service import DBService
 
 
 class AuthControllerAPI:
     """로그인 / 로그아웃 / 현재 사용자 상태 관리"""
 
-    def __init__(self, api_url = "http://127.0.0.1:9000/"):
+    def __init__(self, api_url = "http://127.0.0.1:9000/", http: HttpTransport = None):
         self.api_url = api_url
+        self.http = http or shared_transport()  # 공용 keep-alive 세션
         self.access_token: str | None = None
         # self.user_id: int | None = None
         self.current_user: Optional[Dict[str, Any]] = None
@@ -30,7 +31,7 @@ class AuthControllerAPI:
         }
 
         try:
-            res = requests.post(url, data=payload, headers=headers)
+            res = self.http.post(url, data=payload, headers=headers)
         except Exception as e:
             print("[Auth] 서버 접속 오류:", e)
             return False
@@ -46,6 +47,8 @@ class AuthControllerAPI:
             return False
 
         self.access_token = token
+        self.http.add_auth_prefix(self.api_url)
+        self.http.token = token  # 이후 이 API 서버로 가는 요청에만 Authorization 자동 첨부
 
         # ----------- /me 호출해서 user_id 확인 -----------
         me = self._fetch_me()
@@ -65,7 +68,7 @@ class AuthControllerAPI:
             return None
 
         try:
-            res = requests.get(
+            res = self.http.get(
                 f"{self.api_url}/me",
                 headers={"Authorization": f"Bearer {self.access_token}"}
             )
@@ -88,7 +91,7 @@ class AuthControllerAPI:
         headers = kwargs.pop("headers", {})
         headers["Authorization"] = f"Bearer {self.access_token}"
 
-        return requests.request(
+        return self.http.request(
             method=method,
             url=f"{self.api_url}{path}",
             headers=headers,
@@ -99,6 +102,8 @@ class AuthControllerAPI:
         """로그아웃"""
         user = self.current_user.get("email")
         self.current_user = None
+        self.access_token = None
+        self.http.token = None
         print(f"[Auth] 로그아웃: {user}")
         return user
 
@@ -1,9 +1,10 @@
-import requests
+from infra.http import HttpTransport, shared_transport
 
 
 class OrdersControllerAPI:
-    def __init__(self, api_url="http://127.0.0.1:9000"):
+    def __init__(self, api_url="http://127.0.0.1:9000", http: HttpTransport = None):
         self.api_url = api_url.rstrip("/")
+        self.http = http or shared_transport()  # 공용 keep-alive 세션
         self.access_token = None  # ★ 로그인 후 MainWindow에서 설정됨
 
     # ------------------------------------------------------
@@ -30,7 +31,7 @@ class OrdersControllerAPI:
         }
 
         try:
-            res = requests.post(url, json=payload, headers=self._headers())
+            res = self.http.post(url, json=payload, headers=self._headers())
             res.raise_for_status()
             return res.json()
         except Exception as e:
@@ -52,7 +53,7 @@ class OrdersControllerAPI:
         }
 
         try:
-            res = requests.post(url, json=payload, headers=self._headers())
+            res = self.http.post(url, json=payload, headers=self._headers())
             res.raise_for_status()
             return res.json()
         except Exception as e:
@@ -67,7 +68,7 @@ class OrdersControllerAPI:
         payload = {"order_ids": order_ids}
 
         try:
-            res = requests.post(url, json=payload, headers=self._headers())
+            res = self.http.post(url, json=payload, headers=self._headers())
             res.raise_for_status()
             return res.json()
         except Exception as e:
@@ -81,7 +82,7 @@ class OrdersControllerAPI:
         url = f"{self.api_url}/orders/working?user_id={user_id}&limit={limit}"
 
         try:
-            res = requests.get(url, headers=self._headers())  # ★ 인증 추가
+            res = self.http.get(url, headers=self._headers())  # ★ 인증 추가
             res.raise_for_status()
             return res.json()
         except Exception as e:
@@ -93,7 +94,7 @@ class OrdersControllerAPI:
         params = {"symbol": symbol}
 
         try:
-            r = requests.get(url, params=params, timeout=3)
+            r = self.http.get(url, params=params, timeout=3)
             if r.status_code == 200:
                 return r.json()
 
@@ -109,7 +110,7 @@ class OrdersControllerAPI:
         params = {"symbol": symbol}
 
         try:
-            r = requests.get(url, params=params, timeout=1)
+            r = self.http.get(url, params=params, timeout=1)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -119,7 +120,7 @@ class OrdersControllerAPI:
     def get_local_orderbook(self, symbol):
         url = f"{self.api_url}/orderbook/local"
         try:
-            r = requests.get(url, params={"symbol": symbol}, headers=self._headers(), timeout=3)
+            r = self.http.get(url, params={"symbol": symbol}, headers=self._headers(), timeout=3)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -1,13 +1,14 @@
-import requests
+from infra.http import HttpTransport, shared_transport
 
 class OrderBookAPI:
-    def __init__(self, base="http://127.0.0.1:9000"):
+    def __init__(self, base="http://127.0.0.1:9000", http: HttpTransport = None):
         self.base = base.rstrip("/")
+        self.http = http or shared_transport()  # 공용 keep-alive 세션
 
     def get_depth(self, symbol):
         url = f"{self.base}/orderbook/merged"
         try:
-            r = requests.get(url, params={"symbol": symbol})
+            r = self.http.get(url, params={"symbol": symbol})
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -1,10 +1,11 @@
 # controllers/orderbook_api_client.py
-import requests
+from infra.http import HttpTransport, shared_transport
 
 
 class OrderBookAPIClient:
-    def __init__(self, api_url="http://127.0.0.1:9000"):
+    def __init__(self, api_url="http://127.0.0.1:9000", http: HttpTransport = None):
         self.api_url = api_url.rstrip("/")
+        self.http = http or shared_transport()  # 공용 keep-alive 세션
 
     # ------------------------------------------------------
     # 1) Local DB 기반 (order table)
@@ -12,7 +13,7 @@ class OrderBookAPIClient:
     def get_local_depth(self, symbol):
         url = f"{self.api_url}/orderbook/local"
         try:
-            r = requests.get(url, params={"symbol": symbol}, timeout=2)
+            r = self.http.get(url, params={"symbol": symbol}, timeout=2)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -25,7 +26,7 @@ class OrderBookAPIClient:
     def get_binance_depth(self, symbol):
         url = f"{self.api_url}/orderbook/binance"
         try:
-            r = requests.get(url, params={"symbol": symbol}, timeout=2)
+            r = self.http.get(url, params={"symbol": symbol}, timeout=2)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -42,7 +43,7 @@ class OrderBookAPIClient:
         """
         url = f"{self.api_url}/orderbook/merged"
         try:
-            r = requests.get(url, params={"symbol": symbol}, timeout=3)
+            r = self.http.get(url, params={"symbol": symbol}, timeout=3)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -1,4 +1,6 @@
 # controllers/orderbook_controller.py
+from models.instrument import get_instrument
+from services.risk_engine import RiskDecision, RiskEngine
 
 class OrderBookController:
     """
@@ -8,7 +10,8 @@ class OrderBookController:
     """
 
     def __init__(self, md_service, orderbook_widget, trades_widget,
-                 balance_table, api_order, api_account, api_trade, orderbook_api, api_auth):
+                 balance_table, api_order, api_account, api_trade, orderbook_api, api_auth,
+                 risk_engine: RiskEngine = None):
 
         self.md = md_service                      # 단순 symbol 관리용
         self.ob_table = orderbook_widget
@@ -19,6 +22,8 @@ class OrderBookController:
         self.api_trade = api_trade
         self.api_orderbook = orderbook_api
         self.api_auth = api_auth
+        self.risk = risk_engine or RiskEngine()
+        self.last_reject = None
         self.cached_symbol = None
 
     # ============================================================
@@ -44,37 +49,67 @@ class OrderBookController:
     # 주문 실행
     # ============================================================
     def buy_market(self, qty):
-        user_id, account_id = self._get_user_and_account()
-        result = self.api_order.place_market(
-            user_id, account_id, self.md.current_symbol(), "BUY", qty
-        )
-        self.refresh_after_order(account_id)
-        return result
+        return self._place("BUY", qty)
 
     def sell_market(self, qty):
-        user_id, account_id = self._get_user_and_account()
-        result = self.api_order.place_market(
-            user_id, account_id, self.md.current_symbol(), "SELL", qty
-        )
-        self.refresh_after_order(account_id)
-        return result
+        return self._place("SELL", qty)
 
     def buy_limit(self, price, qty):
-        user_id, account_id = self._get_user_and_account()
-        result = self.api_order.place_limit(
-            user_id, account_id, self.md.current_symbol(), "BUY", price, qty
-        )
-        self.refresh_after_order(account_id)
-        return result
+        return self._place("BUY", qty, price)
 
     def sell_limit(self, price, qty):
+        return self._place("SELL", qty, price)
+
+    def _place(self, side, qty, price=None):
+        """
+        사전 리스크 검사 → /orders/* → 리스크 엔진에 예약/체결 반영.
+        거부되면 API 를 부르지 않고 {"status": "REJECTED", "reason": ...} 반환.
+        """
         user_id, account_id = self._get_user_and_account()
-        result = self.api_order.place_limit(
-            user_id, account_id, self.md.current_symbol(), "SELL", price, qty
-        )
+        symbol = self.md.current_symbol()
+        if account_id not in self.risk.accounts:
+            # 첫 주문 전에 현금/포지션/미체결을 서버 값으로 맞춘다 (안 하면 현금 0 으로 전부 거부)
+            self.sync_risk(user_id, account_id)
+
+        # 틱/로트 단위가 아닌 주문은 엔진에서 반올림/잔량 먼지가 생기므로 접수 전에 거부
+        spec = get_instrument(symbol)
+        if not spec.on_lot(qty):
+            decision = RiskDecision(False, f"qty {qty} is not a multiple of lot {spec.lot_size}")
+        elif price is not None and not spec.on_tick(price):
+            decision = RiskDecision(False, f"price {price} is not a multiple of tick {spec.tick_size}")
+        else:
+            decision = self.risk.check(account_id, symbol, side, qty, price)
+        if not decision:
+            self.last_reject = decision.reason
+            print(f"[Risk] {side} {symbol} qty={qty} rejected: {decision.reason}")
+            return {"status": "REJECTED", "reason": decision.reason}
+
+        if price is None:
+            result = self.api_order.place_market(user_id, account_id, symbol, side, qty)
+            if result:
+                # 체결가는 다음 잔고 동기화에서 서버 값으로 맞춰진다
+                self.risk.on_fill(account_id, symbol, side, qty, self.risk.marks[symbol])
+        else:
+            result = self.api_order.place_limit(user_id, account_id, symbol, side, price, qty)
+            if result:
+                order_id = result.get("order_id", result.get("id")) if isinstance(result, dict) else None
+                if order_id is not None:
+                    self.risk.on_order(account_id, order_id, symbol, side, qty, price)
+                else:
+                    # 응답에 주문번호가 없으면 서버 미체결 목록으로 예약을 다시 맞춘다
+                    self.risk.sync_orders(account_id, self.api_order.get_user_working_orders(user_id))
+
         self.refresh_after_order(account_id)
         return result
 
+    def cancel_orders(self, order_ids):
+        """/orders/cancel → 성공하면 해당 주문의 리스크 예약 해제"""
+        result = self.api_order.cancel_orders(order_ids)
+        if result is not None:
+            for oid in order_ids:
+                self.risk.on_order_done(oid)
+        return result
+
     # ============================================================
     # 주문 후 UI 갱신
     # ============================================================
@@ -89,8 +124,24 @@ class OrderBookController:
     def refresh_balance_table(self):
         user_id, account_id = self._get_user_and_account()
         summary = self.api_account.get_account_summary(account_id)
+        working = self.api_order.get_user_working_orders(user_id)
+        self.apply_summary(account_id, summary, working)
+
+    def apply_summary(self, account_id, summary, working=None):
+        """
+        이미 받아 온 요약(/ui/snapshot 등)으로 리스크 상태 + 잔고 테이블 갱신.
+        working(/orders/working) 을 같이 주면 미체결 예약도 서버 기준으로 맞춘다.
+        """
+        self.risk.sync_account(account_id, summary)
+        if working is not None:
+            self.risk.sync_orders(account_id, working)
         self.balance_table.render_from_summary(summary, self.md)
 
+    def sync_risk(self, user_id, account_id):
+        """화면 갱신 없이 리스크 상태만 서버 값으로 동기화"""
+        self.risk.sync_account(account_id, self.api_account.get_account_summary(account_id))
+        self.risk.sync_orders(account_id, self.api_order.get_user_working_orders(user_id))
+
     # ============================================================
     # 체결창 테이블
     # ============================================================
@@ -102,7 +153,8 @@ class OrderBookController:
     # ============================================================
     # ★ 오더북 갱신 (핵심)
     # ============================================================
-    def refresh_orderbook(self):
+    def refresh_orderbook(self, local=None):
+        """local: 이미 받아 온 로컬 호가(/ui/snapshot 의 depth). 없으면 API 로 조회"""
         symbol = self.md.current_symbol().upper()
 
         # 1) Binance 실시간 호가
@@ -110,9 +162,12 @@ class OrderBookController:
         if not snap:
             self.ob_table.render_from_api({"bids": [], "asks": []})
             return
+        if snap.mid:
+            self.risk.update_price(symbol, snap.mid)
 
         # 2) Local order DB qty/cnt
-        local = self.api_orderbook.get_local_depth(symbol)
+        if local is None:
+            local = self.api_orderbook.get_local_depth(symbol)
 
         # 딕셔너리로 변환 (빠른 lookup)
         local_bids = {float(x["price"]): x for x in local["bids"]}
@@ -1,5 +1,5 @@
 # controllers/orderbook_controller_api.py
-import requests
+from infra.http import HttpTransport, shared_transport
 
 
 class OrderBookControllerAPI:
@@ -7,15 +7,16 @@ class OrderBookControllerAPI:
     FastAPI /orderbook 엔드포인트에서 오더북 데이터를 가져오는 API 클라이언트
     """
 
-    def __init__(self, api_url="http://127.0.0.1:9000"):
+    def __init__(self, api_url="http://127.0.0.1:9000", http: HttpTransport = None):
         self.api_url = api_url.rstrip("/")
+        self.http = http or shared_transport()  # 공용 keep-alive 세션
 
     def get_depth(self, symbol: str):
         url = f"{self.api_url}/orderbook"
         params = {"symbol": symbol}
 
         try:
-            r = requests.get(url, params=params, timeout=2)
+            r = self.http.get(url, params=params, timeout=2)
             r.raise_for_status()
             return r.json()  # {bids: [...], asks: [...]}
 
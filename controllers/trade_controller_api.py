@@ -1,8 +1,9 @@
-import requests
+from infra.http import HttpTransport, shared_transport
 
 class TradeControllerAPI:
-    def __init__(self, engine_url="http://127.0.0.1:9000"):
+    def __init__(self, engine_url="http://127.0.0.1:9000", http: HttpTransport = None):
         self.engine_url = engine_url.rstrip("/")
+        self.http = http or shared_transport()  # 공용 keep-alive 세션
         self.access_token = None   # AuthControllerAPI에서 주입해야 함
 
     # 내부용 헤더
@@ -15,7 +16,7 @@ class TradeControllerAPI:
     # 거래 삽입 (매칭엔진이 호출하는 경우)
     # -------------------------------------------------
     def insert_trade(self, trade_dict):
-        r = requests.post(
+        r = self.http.post(
             f"{self.engine_url}/trades/insert",
             json=trade_dict,
             headers=self._headers()
@@ -26,7 +27,7 @@ class TradeControllerAPI:
     # 나의 체결 조회 (/trades/my)
     # -------------------------------------------------
     def get_trades(self, limit=100):
-        r = requests.get(
+        r = self.http.get(
             f"{self.engine_url}/trades/my",
             params={"limit": limit},
             headers=self._headers()
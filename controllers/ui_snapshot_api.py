@@ -0,0 +1,75 @@
+# controllers/ui_snapshot_api.py
+from typing import Optional
+
+from infra.http import HttpTransport, shared_transport
+
+SECTIONS = ("depth", "summary", "working_orders", "trades")
+
+
+class UISnapshotAPI:
+    """
+    /ui/snapshot 한 번으로 타이머 1틱에 필요한 데이터를 받는 클라이언트.
+    (로컬 호가 + 계좌 요약 + 미체결 + 최근 체결 → 호출 4~5번을 1번으로)
+
+    GET /ui/snapshot?symbol=&account_id=&since_seq=
+      응답: {"seq": N, "depth": {...}, "summary": {...}, "working_orders": [...], "trades": [...]}
+      since_seq 를 주면 그 이후 바뀐 섹션만 들어 있다 (빠진 키 = 변경 없음)
+
+    - 받은 섹션은 self.view 에 합쳐 두므로 get_snapshot() 반환값에는 항상 4개 섹션이 다 있고,
+      "changed" 로 이번에 새로 온 섹션 이름을 알려준다
+    - symbol / account_id 가 바뀌면 seq 를 버리고 전체를 다시 받는다
+    - 서버에 엔드포인트가 없으면(404) supported=False → 호출부는 기존 개별 API 로 돌아간다
+    """
+
+    def __init__(self, api_url="http://127.0.0.1:9000", http: HttpTransport = None):
+        self.api_url = api_url.rstrip("/")
+        self.http = http or shared_transport()  # 공용 keep-alive 세션
+        self.supported = True
+        self.seq: Optional[int] = None
+        self.view = {}
+        self._key = None
+
+    def reset(self):
+        self.seq = None
+        self.view = {}
+        self._key = None
+
+    def get_snapshot(self, symbol: str, account_id, full: bool = False) -> Optional[dict]:
+        """
+        반환: {"seq", "changed": [섹션...], "depth", "summary", "working_orders", "trades"}
+        실패하면 None
+        """
+        key = (symbol.upper(), account_id)
+        if key != self._key or full:
+            self.reset()
+            self._key = key
+
+        params = {"symbol": key[0], "account_id": account_id}
+        if self.seq is not None:
+            params["since_seq"] = self.seq
+
+        try:
+            r = self.http.get(f"{self.api_url}/ui/snapshot", params=params, timeout=2)
+            if r.status_code == 404:
+                print("[UISnapshotAPI] /ui/snapshot not available, falling back")
+                self.supported = False
+                return None
+            r.raise_for_status()
+            j = r.json()
+        except Exception as e:
+            print("[UISnapshotAPI] get_snapshot error:", e)
+            return None
+
+        changed = [s for s in SECTIONS if s in j]
+        for s in changed:
+            self.view[s] = j[s]
+        self.seq = j.get("seq", self.seq)
+
+        return {
+            "seq": self.seq,
+            "changed": changed,
+            "depth": self.view.get("depth", {"bids": [], "asks": []}),
+            "summary": self.view.get("summary", {"balance": 0, "positions": []}),
+            "working_orders": self.view.get("working_orders", []),
+            "trades": self.view.get("trades", []),
+        }
@@ -16,3 +16,6 @@ DB_URL = (
 engine = create_engine(DB_URL, echo=False, future=True)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# psycopg2.connect() 용 DSN (LISTEN/NOTIFY 등 raw 커넥션이 필요한 곳)
+PG_DSN = DB_URL.replace("postgresql+psycopg2://", "postgresql://")
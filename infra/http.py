@@ -0,0 +1,149 @@
+# infra/http.py
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) 초. 호출부가 timeout 을 주면 그 값을 쓴다
+DEFAULT_TIMEOUT = (1.0, 3.0)
+
+# 로그인 토큰을 붙여도 되는 우리 API 서버 (그 밖의 호스트 — api.binance.com 등 — 에는 절대 안 붙임)
+DEFAULT_API_BASE = "http://127.0.0.1:9000"
+
+
+def _under(url: str, prefixes) -> bool:
+    """url 이 prefixes 중 하나의 경로 아래인지 (http://a:9000 이 http://a:90001 에 걸리지 않게 경계 확인)"""
+    for p in prefixes:
+        if url == p or (url.startswith(p) and url[len(p)] in "/?#"):
+            return True
+    return False
+
+
+class HttpTransport:
+    """
+    모든 API 클라이언트가 같이 쓰는 HTTP 전송 계층.
+    - requests.Session 하나로 keep-alive 커넥션 풀 재사용 (호출마다 TCP/TLS 연결 X)
+    - 호스트별 풀 크기: pool_maxsize 기본값 + host_pools={"https://api.binance.com": 4} 로 개별 지정
+    - timeout 을 안 주면 DEFAULT_TIMEOUT
+    - token 이 있으면 auth_prefixes 아래 URL 에만 Authorization 헤더 자동 추가
+      (호출부가 직접 준 헤더가 우선, 외부 호스트에는 토큰을 보내지 않음)
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 8,
+        pool_maxsize: int = 8,
+        host_pools: Optional[Dict[str, int]] = None,
+        timeout=DEFAULT_TIMEOUT,
+        auth_prefixes=(DEFAULT_API_BASE,),
+    ):
+        self.timeout = timeout
+        self.token: Optional[str] = None
+        self.auth_prefixes = [p.rstrip("/") for p in auth_prefixes]
+
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+        for prefix, size in (host_pools or {}).items():
+            s.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=size))
+        self.session = s
+
+    def add_auth_prefix(self, base_url: str):
+        """토큰을 붙일 API base URL 추가 (기본값이 아닌 서버에 로그인할 때)"""
+        p = base_url.rstrip("/")
+        if p not in self.auth_prefixes:
+            self.auth_prefixes.append(p)
+
+    def authorizes(self, url: str) -> bool:
+        return _under(url, self.auth_prefixes)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        if self.token and self.authorizes(url):
+            headers = kwargs.get("headers") or {}
+            if "Authorization" not in headers:
+                kwargs["headers"] = {**headers, "Authorization": f"Bearer {self.token}"}
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_shared: Optional[HttpTransport] = None
+_shared_lock = threading.Lock()
+
+
+def shared_transport() -> HttpTransport:
+    """프로세스 공용 HttpTransport (처음 부를 때 생성)"""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = HttpTransport(host_pools={"https://api.binance.com": 4})
+    return _shared
+
+
+class AsyncHttpTransport:
+    """
+    HttpTransport 의 asyncio 판 (httpx.AsyncClient).
+    - 커넥션 풀: max_connections / max_keepalive (호스트별로 keep-alive 재사용)
+    - timeout 기본값, Authorization 자동 첨부(auth_prefixes 아래만)는 동기판과 동일
+    - token / auth_prefixes 를 따로 주지 않으면 shared_transport() 것을 따라간다 (로그인 한 번으로 양쪽 다 인증)
+    AsyncClient 는 이벤트 루프에 묶이므로 루프마다 하나씩 만들고 aclose() 로 닫는다.
+    """
+
+    def __init__(self, max_connections: int = 32, max_keepalive: int = 16, timeout=DEFAULT_TIMEOUT,
+                 auth_prefixes=None):
+        import httpx
+
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            timeout=httpx.Timeout(read, connect=connect),
+        )
+        self._token: Optional[str] = None
+        self._auth_prefixes = [p.rstrip("/") for p in auth_prefixes] if auth_prefixes is not None else None
+
+    @property
+    def token(self) -> Optional[str]:
+        return self._token or shared_transport().token
+
+    @token.setter
+    def token(self, value: Optional[str]):
+        self._token = value
+
+    def authorizes(self, url: str) -> bool:
+        if self._auth_prefixes is None:
+            return shared_transport().authorizes(url)
+        return _under(url, self._auth_prefixes)
+
+    async def request(self, method: str, url: str, **kwargs):
+        token = self.token
+        if token and self.authorizes(url):
+            headers = kwargs.get("headers") or {}
+            if "Authorization" not in headers:
+                kwargs["headers"] = {**headers, "Authorization": f"Bearer {token}"}
+        return await self.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
@@ -0,0 +1,27 @@
+-- infra/sql/orders_notify.sql
+-- orders 에 신규 주문이 들어오거나 취소되면 orders_changed 채널로 알림
+-- payload: {"op": "INSERT" | "CANCEL", "symbol": "SOLUSDT", "id": 123}
+-- (매칭 엔진 자신의 FILLED/PARTIAL 업데이트는 알림을 만들지 않는다)
+
+CREATE OR REPLACE FUNCTION notify_orders_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM pg_notify(
+            'orders_changed',
+            json_build_object('op', 'INSERT', 'symbol', UPPER(NEW.symbol), 'id', NEW.id)::text
+        );
+    ELSIF NEW.status = 'CANCELLED' AND OLD.status IS DISTINCT FROM 'CANCELLED' THEN
+        PERFORM pg_notify(
+            'orders_changed',
+            json_build_object('op', 'CANCEL', 'symbol', UPPER(NEW.symbol), 'id', NEW.id)::text
+        );
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS orders_changed_notify ON orders;
+
+CREATE TRIGGER orders_changed_notify
+AFTER INSERT OR UPDATE OF status ON orders
+FOR EACH ROW EXECUTE FUNCTION notify_orders_changed();
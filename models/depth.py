@@ -1,9 +1,106 @@
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from itertools import islice
+from typing import Callable, List, Tuple, Optional
+
+import numpy as np
 
 # (price, size, level)
 Level = Tuple[float, int, int]
 
+class DepthSide(Sequence):
+    """
+    불변(persistent) 한쪽 호가. 최우선 호가부터 (price, size, level).
+    실제 레벨은 공유 tuple(_base) 에 두고, 앞에서부터 소진된 만큼 _start 만 옮기며
+    부분 체결된 최우선 레벨 하나만 _head 로 새로 만든다.
+    → 체결이 레벨 하나를 건드리면 새 객체 O(1), 나머지 레벨/반대편은 부모와 공유.
+    (완전히 소진된 레벨은 빠진다)
+    """
+    __slots__ = ("_base", "_start", "_head")
+
+    def __init__(self, levels=(), start: int = 0, head: Optional["Level"] = None):
+        self._base = levels if isinstance(levels, tuple) else tuple(levels)
+        self._start = start
+        self._head = head
+
+    @classmethod
+    def of(cls, levels) -> "DepthSide":
+        return levels if isinstance(levels, DepthSide) else cls(levels)
+
+    def __len__(self):
+        return len(self._base) - self._start + (self._head is not None)
+
+    def __iter__(self):
+        if self._head is not None:
+            yield self._head
+        yield from islice(self._base, self._start, None)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self)[i]
+        if i < 0:
+            i += len(self)
+        if self._head is not None:
+            if i == 0:
+                return self._head
+            i -= 1
+        if i < 0 or self._start + i >= len(self._base):
+            raise IndexError("DepthSide index out of range")
+        return self._base[self._start + i]
+
+    def __eq__(self, other):
+        if isinstance(other, (DepthSide, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"DepthSide({list(self)!r})"
+
+    def take(self, qty, crosses: Optional[Callable[[float], bool]] = None):
+        """
+        최우선부터 qty 만큼 소진 (crosses(price) 가 False 인 레벨에서 멈춤).
+        반환: ([(price, take), ...], 새 DepthSide, 남은 qty)
+        """
+        fills = []
+        remain = qty
+        base, start, head = self._base, self._start, self._head
+        n = len(base)
+
+        while remain > 0:
+            if head is not None:
+                lvl = head
+            elif start < n:
+                lvl = base[start]
+            else:
+                break
+
+            px, sz, lv = lvl
+            if crosses is not None and not crosses(px):
+                break
+
+            take = min(sz, remain)
+            if take > 0:
+                fills.append((px, take))
+                remain -= take
+
+            if sz - take > 0:
+                # 부분 체결 → 이 레벨만 새로 만든다
+                if head is None:
+                    start += 1
+                head = (px, sz - take, lv)
+                break
+
+            # 완전 소진 → 버림
+            if head is not None:
+                head = None
+            else:
+                start += 1
+
+        if start == self._start and head is self._head:
+            return fills, self, remain
+        return fills, DepthSide(base, start, head), remain
+
+
 @dataclass
 class DepthSnapshot:
     bids: List[Level]
@@ -18,3 +115,167 @@ class DepthSnapshot:
         if bb is not None and ba is not None:
             return (bb + ba) / 2.0
         return bb or ba
+
+
+def _sizes(values) -> np.ndarray:
+    arr = np.asarray(values)
+    if arr.dtype.kind not in "iuf":
+        arr = arr.astype(np.float64)
+    return arr
+
+
+@dataclass
+class DepthBook:
+    """
+    컬럼형 호가 (사이드별 price/size 연속 배열, 최우선 호가가 index 0).
+    시장가 스윕을 cumsum + searchsorted 한 번으로 계산하므로
+    1000 레벨 호가도 레벨마다 파이썬 객체를 만들지 않는다.
+    bids/asks 속성은 기존 DepthSnapshot 처럼 (price, size, level) 리스트를 돌려준다
+    (호환/표시용 — 체결 경로는 take/visible_qty 로 배열만 쓴다).
+    """
+    bid_px: np.ndarray
+    bid_sz: np.ndarray
+    ask_px: np.ndarray
+    ask_sz: np.ndarray
+    mid: Optional[float] = None
+    symbol: Optional[str] = None
+
+    @classmethod
+    def from_levels(cls, bids: List[Level], asks: List[Level], mid: Optional[float] = None,
+                    symbol: Optional[str] = None) -> "DepthBook":
+        bid_px = np.fromiter((p for p, _, _ in bids), dtype=np.float64, count=len(bids))
+        ask_px = np.fromiter((p for p, _, _ in asks), dtype=np.float64, count=len(asks))
+        bid_sz = _sizes([q for _, q, _ in bids]) if bids else np.zeros(0, dtype=np.int64)
+        ask_sz = _sizes([q for _, q, _ in asks]) if asks else np.zeros(0, dtype=np.int64)
+        book = cls(bid_px, bid_sz, ask_px, ask_sz, mid, symbol)
+        if book.mid is None:
+            book.mid = book.calc_mid()
+        return book
+
+    @classmethod
+    def from_snapshot(cls, snap) -> "DepthBook":
+        return cls.from_levels(snap.bids, snap.asks, snap.mid, getattr(snap, "symbol", None))
+
+    def to_snapshot(self) -> DepthSnapshot:
+        return DepthSnapshot(self.bids, self.asks, self.mid, self.symbol)
+
+    # ---- DepthSnapshot 호환 ----
+    @property
+    def bids(self) -> List[Level]:
+        return [(p, q, i) for i, (p, q) in enumerate(zip(self.bid_px.tolist(), self.bid_sz.tolist()))]
+
+    @property
+    def asks(self) -> List[Level]:
+        return [(p, q, i) for i, (p, q) in enumerate(zip(self.ask_px.tolist(), self.ask_sz.tolist()))]
+
+    @staticmethod
+    def _best(px: np.ndarray, sz: np.ndarray) -> Optional[float]:
+        if sz.size and sz[0] > 0:
+            return float(px[0])   # 대부분은 최우선 레벨이 살아 있음 → 배열 전체를 안 본다
+        live = np.flatnonzero(sz > 0)
+        return float(px[live[0]]) if live.size else None
+
+    def best_bid(self) -> Optional[float]:
+        return self._best(self.bid_px, self.bid_sz)
+
+    def best_ask(self) -> Optional[float]:
+        return self._best(self.ask_px, self.ask_sz)
+
+    def calc_mid(self) -> Optional[float]:
+        return self._mid(self.best_bid(), self.best_ask())
+
+    @staticmethod
+    def _mid(bb: Optional[float], ba: Optional[float]) -> Optional[float]:
+        if bb is not None and ba is not None:
+            return (bb + ba) / 2.0
+        return bb or ba
+
+    def visible_qty(self, is_bid: bool, prices, eps: float = 1e-9) -> List[Optional[float]]:
+        """
+        prices 각 가격의 호가 잔량 (정렬된 가격 배열에서 searchsorted — 레벨을 순회하지 않는다).
+        호가에 없는 가격은 보이는 레벨보다 좋은 쪽이면 0.0, 보이는 범위보다 깊으면 None.
+        """
+        px = self.bid_px if is_bid else self.ask_px
+        sz = self.bid_sz if is_bid else self.ask_sz
+        n = len(px)
+        if n == 0:
+            return [0.0] * len(prices)
+
+        q = np.asarray(prices, dtype=np.float64)
+        if is_bid:
+            # bids 는 내림차순 → 뒤집은 뷰(오름차순)에서 q 이하인 마지막 레벨
+            j = np.searchsorted(px[::-1], q + eps, side="right") - 1
+            inside = j >= 0
+            idx = np.minimum(n - 1 - j, n - 1)
+        else:
+            idx = np.searchsorted(px, q - eps, side="left")
+            inside = idx < n
+            idx = np.minimum(idx, n - 1)
+        hit = inside & (np.abs(px[idx] - q) <= eps)
+
+        sizes = sz[idx].tolist()
+        return [float(s) if h else (0.0 if ins else None)
+                for s, h, ins in zip(sizes, hit.tolist(), inside.tolist())]
+
+    # ---- 시장가 스윕 / 지정가 즉시 체결 ----
+    @staticmethod
+    def _cross_count(px: np.ndarray, is_bid: bool, limit: Optional[float]) -> int:
+        """최우선부터 limit 에 닿는 레벨 수 (bids 는 px >= limit, asks 는 px <= limit)"""
+        if limit is None:
+            return len(px)
+        if is_bid:
+            return len(px) - int(np.searchsorted(px[::-1], limit, side="left"))
+        return int(np.searchsorted(px, limit, side="right"))
+
+    def take(self, side: str, qty, limit: Optional[float] = None):
+        """
+        side=BUY 면 asks, SELL 이면 bids 를 최우선부터 qty 만큼 소진.
+        limit 을 주면 그 가격에 닿는 레벨까지만 (지정가) — 닿는 레벨 수는 searchsorted,
+        소진 범위는 그 안에서 cumsum + searchsorted 로 구한다.
+        반환: (체결 가격 배열, 체결 수량 배열, 새 DepthBook, 남은 qty)
+        소진된 레벨은 size 0 으로 남긴다. 체결이 없으면 self 를 그대로 돌려준다.
+        """
+        is_buy = side.upper() == "BUY"
+        px = self.ask_px if is_buy else self.bid_px
+        sz = self.ask_sz if is_buy else self.bid_sz
+
+        n = self._cross_count(px, not is_buy, limit)
+        cum = np.cumsum(sz[:n])
+        if qty <= 0 or n == 0 or cum[-1] <= 0:
+            return px[:0], sz[:0], self, qty
+
+        # k: 누적 잔량이 처음으로 qty 이상이 되는 레벨 (그 앞은 전부 소진)
+        k = int(np.searchsorted(cum, qty, side="left"))
+        if k < n:
+            take = sz[:k + 1].copy()
+            take[k] = qty - (cum[k - 1] if k > 0 else 0)
+            remain = 0
+        else:
+            take = sz[:n].copy()
+            remain = qty - cum[-1].item()
+
+        new_sz = sz.copy()
+        new_sz[:take.size] -= take
+
+        hit = take > 0
+        fill_px, fill_qty = px[:take.size][hit], take[hit]
+
+        # 새 최우선은 마지막으로 건드린 레벨부터 찾으면 된다 (그 앞은 전부 소진)
+        j = take.size - 1
+        best = self._best(px[j:], new_sz[j:])
+        if is_buy:
+            new = replace(self, ask_sz=new_sz)
+            bb, ba = self.best_bid(), best
+        else:
+            new = replace(self, bid_sz=new_sz)
+            bb, ba = best, self.best_ask()
+        new.mid = self._mid(bb, ba) or self.mid
+        return fill_px, fill_qty, new, remain
+
+    def sweep(self, side: str, qty) -> Tuple[np.ndarray, np.ndarray, "DepthBook"]:
+        """
+        시장가: 반대편 호가를 최우선부터 qty 만큼 소진 (take 의 limit 없는 경우).
+        반환: (체결 가격 배열, 체결 수량 배열, 새 DepthBook)
+        """
+        fill_px, fill_qty, new, _ = self.take(side, qty)
+        return fill_px, fill_qty, new
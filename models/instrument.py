@@ -0,0 +1,77 @@
+# models/instrument.py
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR, ROUND_HALF_UP
+from typing import Dict
+
+
+def _dec(x) -> Decimal:
+    return x if isinstance(x, Decimal) else Decimal(str(x))
+
+
+@dataclass(frozen=True)
+class InstrumentSpec:
+    """
+    종목별 호가/수량 단위.
+    매칭 경로에서는 가격=틱 수(int), 수량=로트 수(int) 로만 다루고
+    API/DB 경계에서만 Decimal 로 변환한다.
+    """
+    symbol: str
+    tick_size: Decimal      # 가격 최소 단위
+    lot_size: Decimal       # 수량 최소 단위
+
+    # ---- 가격 ----
+    def price_to_ticks(self, price, side: str = None) -> int:
+        """
+        가격 → 틱. 틱 단위가 아니면
+        - side="BUY" : 내림 (지정가보다 비싸게 사지 않도록)
+        - side="SELL": 올림 (지정가보다 싸게 팔지 않도록)
+        - side 없음  : 가장 가까운 틱 (표시/집계용)
+        """
+        mode = {"BUY": ROUND_FLOOR, "SELL": ROUND_CEILING}.get((side or "").upper(), ROUND_HALF_UP)
+        return int((_dec(price) / self.tick_size).to_integral_value(mode))
+
+    def on_tick(self, price) -> bool:
+        return _dec(price) % self.tick_size == 0
+
+    def ticks_to_price(self, ticks: int) -> Decimal:
+        return ticks * self.tick_size
+
+    # ---- 수량 ----
+    def qty_to_lots(self, qty) -> int:
+        """수량 → 로트 (로트 미만 잔량은 버림 → 과체결 방지. 주문 접수 시 on_lot 으로 먼저 거른다)"""
+        return int((_dec(qty) / self.lot_size).to_integral_value(ROUND_DOWN))
+
+    def on_lot(self, qty) -> bool:
+        return _dec(qty) % self.lot_size == 0
+
+    def lots_to_qty(self, lots: int) -> Decimal:
+        return lots * self.lot_size
+
+
+def _spec(symbol: str, tick: str, lot: str) -> InstrumentSpec:
+    return InstrumentSpec(symbol, Decimal(tick), Decimal(lot))
+
+
+# orders.price 가 NUMERIC(18,4), 체결 수량이 NUMERIC(18,6) 이므로 기본값은 그 정밀도에 맞춘다
+DEFAULT_TICK = "0.0001"
+DEFAULT_LOT = "0.000001"
+
+INSTRUMENTS: Dict[str, InstrumentSpec] = {
+    s.symbol: s for s in (
+        _spec("BTCUSDT", "0.01", "0.00001"),
+        _spec("ETHUSDT", "0.01", "0.0001"),
+        _spec("SOLUSDT", "0.01", "0.001"),
+        _spec("BNBUSDT", "0.01", "0.001"),
+        _spec("XRPUSDT", "0.0001", "0.1"),
+        _spec("NQ", "0.25", "1"),
+    )
+}
+
+
+def get_instrument(symbol: str) -> InstrumentSpec:
+    """등록된 스펙이 없으면 DB 컬럼 정밀도 기준 기본 스펙을 만들어 등록"""
+    symbol = symbol.upper()
+    spec = INSTRUMENTS.get(symbol)
+    if spec is None:
+        spec = INSTRUMENTS[symbol] = _spec(symbol, DEFAULT_TICK, DEFAULT_LOT)
+    return spec
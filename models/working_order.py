@@ -17,5 +17,8 @@ class WorkingOrder:
     type: Literal["LMT"] = "LMT" # 주문 타입 (지정가)
     created_at: float = field(default_factory=time.time)
 
+    # 같은 가격 레벨에서 내 앞에 서 있는 시장 수량 (0 이 되어야 체결 시작)
+    queue_ahead: float = 0.0
+
     # DB 연동용 필드 (선택)
     db_order_id: Optional[int] = None
@@ -0,0 +1,119 @@
+# services/account_aggregator.py
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Set
+
+from services.simaccount import SimAccount
+
+
+@dataclass(frozen=True)
+class AccountTotals:
+    """계좌 합계 (포지션을 훑지 않고 바로 읽는 값)"""
+    cash: float
+    exposure: float        # Σ |qty * last|
+    asset_value: float     # Σ qty * last
+    realized_pnl: float
+    unrealized_pnl: float
+
+    @property
+    def equity(self) -> float:
+        return self.cash + self.asset_value
+
+    @property
+    def total_pnl(self) -> float:
+        return self.realized_pnl + self.unrealized_pnl
+
+
+class AccountAggregator:
+    """
+    계좌별 SimAccount + 실시간 합계.
+    - 체결/시세 1건은 해당 계좌의 해당 심볼 행만 갱신하고 합계를 차이만큼 보정 (O(1))
+    - totals(account_id) 는 언제든 포지션 순회 없이 바로 응답
+    - 서버 /account/summary 응답(load_summary) 또는 체결 스트림(apply_fill) 어느 쪽으로도 채울 수 있다
+    """
+
+    def __init__(self):
+        self.accounts: Dict[Any, SimAccount] = {}
+        self._holders: Dict[str, Set[Any]] = {}  # symbol → 그 심볼 행이 있는 계좌들
+
+    def account(self, account_id) -> SimAccount:
+        acc = self.accounts.get(account_id)
+        if acc is None:
+            acc = self.accounts[account_id] = SimAccount()
+        return acc
+
+    # ---------- 입력 ----------
+    def apply_cash(self, account_id, delta: float):
+        self.account(account_id).apply_cash(delta)
+
+    def apply_fill(self, account_id, symbol: str, side: str, price: float, qty: float, fee: float = 0.0):
+        """체결 1건 → 현금 + 포지션 (현금 부호는 BUY 출금 / SELL 입금)"""
+        acc = self.account(account_id)
+        notional = float(price) * float(qty)
+        acc.apply_cash((-notional if side.upper() == "BUY" else notional) - fee)
+        acc.apply_fill(symbol, side, price, qty)
+        self._holders.setdefault(symbol, set()).add(account_id)
+
+    def update_price(self, symbol: str, price: float):
+        """시세 1건 → 그 심볼을 가진 계좌의 그 행만 재평가"""
+        for account_id in self._holders.get(symbol, ()):
+            self.accounts[account_id].update_price(symbol, price)
+
+    def mark_to_market(self, prices: Dict[str, float]):
+        """전체 재평가 (계좌마다 벡터 연산 한 번, 누적 오차도 여기서 정리)"""
+        for acc in self.accounts.values():
+            acc.mark_to_market(prices)
+
+    def load_summary(self, account_id, summary: Dict[str, Any]):
+        """
+        /account/summary 응답 {"balance", "positions": [{"symbol", "qty", "avg_price", ...}]} 반영.
+        바뀐 포지션 행만 다시 계산하고, 응답에서 빠진 심볼은 수량 0 으로 만든다.
+        """
+        acc = self.account(account_id)
+        st = acc.store
+        balance = float(summary.get("balance", 0.0))
+        if acc.cash != balance:
+            acc.cash = balance
+
+        seen = set()
+        for p in summary.get("positions", []):
+            sym = p["symbol"]
+            seen.add(sym)
+            qty, avg = float(p["qty"]), float(p["avg_price"])
+            realized = p.get("realized_pnl")
+            i = st.index.get(sym)
+            if i is None or st.qty[i] != qty or st.avg[i] != avg or (
+                    realized is not None and st.realized[i] != float(realized)):
+                st.set_position(sym, qty, avg, None if realized is None else float(realized))
+                self._holders.setdefault(sym, set()).add(account_id)
+
+        for sym in st.symbols:
+            if sym not in seen and st.qty[st.index[sym]] != 0:
+                st.set_position(sym, 0.0, 0.0)
+
+    # ---------- 조회 ----------
+    def totals(self, account_id) -> AccountTotals:
+        acc = self.account(account_id)
+        st = acc.store
+        return AccountTotals(
+            cash=float(acc.cash),
+            exposure=float(st.total_exposure),
+            asset_value=float(st.total_asset),
+            realized_pnl=float(st.total_realized),
+            unrealized_pnl=float(st.total_unrealized),
+        )
+
+    def summary(self, account_id) -> Dict[str, Any]:
+        """/account/summary 응답 형태 + 합계 (서버가 그대로 돌려주면 된다)"""
+        acc = self.account(account_id)
+        state = acc.state
+        totals = self.totals(account_id)
+        return {
+            "account_id": account_id,
+            "balance": state["cash"],
+            "positions": [p for p in state["positions"] if p["qty"] != 0],
+            "totals": {**asdict(totals), "equity": totals.equity, "total_pnl": totals.total_pnl},
+            "version": state["version"],
+        }
+
+    def symbols(self) -> Iterable[str]:
+        return self._holders.keys()
@@ -0,0 +1,290 @@
+# services/backtester.py
+from __future__ import annotations
+
+import gzip
+import heapq
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from models.depth import DepthSnapshot
+from models.order import Fill
+from services.order_simulator import OrderSimulator
+from services.simaccount import FillBatch, SimAccount
+
+# 같은 ts 에서는 depth → trade 순으로 처리
+KIND_DEPTH = 0
+KIND_TRADE = 1
+
+
+@dataclass(order=True)
+class MarketEvent:
+    """
+    녹화된 시장 데이터 한 건.
+    정렬 키 (ts, kind, source, seq) 로 여러 파일을 합쳐도 항상 같은 순서가 나온다.
+    """
+    ts: float
+    kind: int
+    source: int
+    seq: int
+    symbol: str = field(compare=False)
+    depth: Optional[DepthSnapshot] = field(default=None, compare=False)
+    trade: Optional[Dict[str, Any]] = field(default=None, compare=False)
+
+
+# ---------------------------------------------
+# 녹화 파일 스트리밍 (JSONL, .gz 지원)
+# ---------------------------------------------
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_depth_file(path: str, source: int = 0, symbol: Optional[str] = None) -> Iterator[MarketEvent]:
+    """
+    한 줄 = {"ts": 1700000000.1, "symbol": "SOLUSDT", "bids": [[p, q], ...], "asks": [[p, q], ...]}
+    한 줄씩 읽어서 바로 넘기므로 파일 크기와 무관하게 메모리 일정.
+    """
+    with _open_text(path) as f:
+        for seq, line in enumerate(f):
+            if not line.strip():
+                continue
+            j = json.loads(line)
+            sym = (j.get("symbol") or symbol or "").upper()
+            bids = [(float(p), float(q), i) for i, (p, q) in enumerate(j.get("bids", []))]
+            asks = [(float(p), float(q), i) for i, (p, q) in enumerate(j.get("asks", []))]
+            depth = DepthSnapshot(bids, asks, DepthSnapshot.calc_mid(bids, asks), sym)
+            yield MarketEvent(float(j["ts"]), KIND_DEPTH, source, seq, sym, depth=depth)
+
+
+def iter_trade_file(path: str, source: int = 0, symbol: Optional[str] = None) -> Iterator[MarketEvent]:
+    """한 줄 = {"ts": ..., "symbol": "SOLUSDT", "price": 100.1, "qty": 3, "side": "BUY"}"""
+    with _open_text(path) as f:
+        for seq, line in enumerate(f):
+            if not line.strip():
+                continue
+            j = json.loads(line)
+            sym = (j.get("symbol") or symbol or "").upper()
+            yield MarketEvent(float(j["ts"]), KIND_TRADE, source, seq, sym, trade=j)
+
+
+def merge_events(*streams: Iterable[MarketEvent]) -> Iterator[MarketEvent]:
+    """이미 시간순인 여러 스트림을 (ts, kind, source, seq) 기준으로 지연 병합"""
+    return heapq.merge(*streams)
+
+
+# ---------------------------------------------
+# 전략 인터페이스
+# ---------------------------------------------
+class Strategy:
+    """필요한 콜백만 오버라이드해서 쓰는 전략 베이스"""
+
+    def on_start(self, ctx: "BacktestContext"):
+        pass
+
+    def on_depth(self, ctx: "BacktestContext", symbol: str, depth: DepthSnapshot):
+        pass
+
+    def on_trade(self, ctx: "BacktestContext", symbol: str, trade: Dict[str, Any]):
+        pass
+
+    def on_fill(self, ctx: "BacktestContext", symbol: str, fill: Fill):
+        pass
+
+    def on_end(self, ctx: "BacktestContext"):
+        pass
+
+
+class BacktestContext:
+    """전략이 보는 창구: 현재 시각/호가, 주문, 계좌"""
+
+    def __init__(self, account: SimAccount, fee_rate: float = 0.0):
+        self.account = account
+        self.fee_rate = fee_rate
+        self.now: float = 0.0
+        self.sims: Dict[str, OrderSimulator] = {}
+        self.depths: Dict[str, DepthSnapshot] = {}
+        self.fills: List[Fill] = []
+        self._strategy: Optional[Strategy] = None
+
+    def sim(self, symbol: str) -> OrderSimulator:
+        sim = self.sims.get(symbol)
+        if sim is None:
+            sim = self.sims[symbol] = OrderSimulator()
+        return sim
+
+    def depth(self, symbol: str) -> Optional[DepthSnapshot]:
+        return self.depths.get(symbol)
+
+    def position(self, symbol: str) -> float:
+        pos = self.account.positions.get(symbol)
+        return pos.position if pos else 0.0
+
+    # ---- 주문 ----
+    def buy_market(self, symbol: str, qty) -> List[Fill]:
+        return self._market(symbol, "BUY", qty)
+
+    def sell_market(self, symbol: str, qty) -> List[Fill]:
+        return self._market(symbol, "SELL", qty)
+
+    def buy_limit(self, symbol: str, price: float, qty) -> List[Fill]:
+        return self._limit(symbol, "BUY", price, qty)
+
+    def sell_limit(self, symbol: str, price: float, qty) -> List[Fill]:
+        return self._limit(symbol, "SELL", price, qty)
+
+    def cancel(self, symbol: str, order_id: int) -> bool:
+        return self.sim(symbol).cancel_working(order_id)
+
+    def _market(self, symbol: str, side: str, qty) -> List[Fill]:
+        depth = self.depths.get(symbol)
+        if depth is None:
+            return []
+        sim = self.sim(symbol)
+        fn = sim.buy_market if side == "BUY" else sim.sell_market
+        fills, self.depths[symbol] = fn(qty, depth)
+        self._book(symbol, fills)
+        return fills
+
+    def _limit(self, symbol: str, side: str, price: float, qty) -> List[Fill]:
+        depth = self.depths.get(symbol)
+        if depth is None:
+            return []
+        sim = self.sim(symbol)
+        fn = sim.buy_limit_now_or_queue if side == "BUY" else sim.sell_limit_now_or_queue
+        fills, self.depths[symbol], _ = fn(price, qty, depth)
+        self._book(symbol, fills)
+        return fills
+
+    def _book(self, symbol: str, fills: List[Fill]):
+        """체결 → 계좌 반영 (현금 + 포지션). 여러 건이면 apply_fills 로 한 번에"""
+        if not fills:
+            return
+        if len(fills) == 1:
+            f = fills[0]
+            self.account.apply_fill(symbol, f.side, f.price, f.qty)
+        else:
+            self.account.apply_fills(FillBatch([symbol] * len(fills), [f.side for f in fills],
+                                               [f.price for f in fills], [f.qty for f in fills]))
+
+        cash = 0.0
+        for f in fills:
+            notional = float(f.price) * float(f.qty)
+            cash += (-notional if f.side == "BUY" else notional) - notional * self.fee_rate
+        self.account.apply_cash(cash)
+
+        self.fills.extend(fills)
+        if self._strategy is not None:
+            for f in fills:
+                self._strategy.on_fill(self, symbol, f)
+
+
+@dataclass
+class BacktestReport:
+    events: int
+    depth_events: int
+    trade_events: int
+    fills: int
+    start_cash: float
+    cash: float
+    equity: float
+    realized_pnl: float
+    unrealized_pnl: float
+    total_pnl: float
+    positions: List[Dict[str, Any]]
+    elapsed: float
+
+    @property
+    def events_per_sec(self) -> float:
+        return self.events / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"events={self.events:,} fills={self.fills:,} "
+            f"pnl={self.total_pnl:+,.2f} (realized {self.realized_pnl:+,.2f} / unrealized {self.unrealized_pnl:+,.2f}) "
+            f"equity={self.equity:,.2f} speed={self.events_per_sec:,.0f} ev/s"
+        )
+
+
+class Backtester:
+    """
+    녹화 depth/trade 를 벽시계와 무관하게 최대 속도로 OrderSimulator + SimAccount 에 흘려보내는 백테스터.
+    - 입력은 MarketEvent 이터러블 (iter_depth_file/iter_trade_file/merge_events 로 디스크에서 스트리밍)
+    - depth 이벤트마다 미체결 자동 매칭(교차 + 대기열 갱신) 후 strategy.on_depth
+    - trade 이벤트마다 대기열 소진 → 미체결 체결 후 strategy.on_trade
+    - 끝나면 마지막 mid 로 마크투마켓해서 BacktestReport 반환
+    """
+
+    def __init__(self, strategy: Strategy, start_cash: float = 0.0, fee_rate: float = 0.0,
+                 mark_every: int = 0):
+        self.strategy = strategy
+        self.start_cash = float(start_cash)
+        self.fee_rate = fee_rate
+        self.mark_every = mark_every  # 0 이면 마지막에 한 번만
+
+    def run(self, events: Iterable[MarketEvent]) -> BacktestReport:
+        account = SimAccount()
+        account.apply_cash(self.start_cash)
+        ctx = BacktestContext(account, self.fee_rate)
+        ctx._strategy = self.strategy
+        strategy = self.strategy
+
+        n = n_depth = n_trade = 0
+        t0 = time.perf_counter()
+        strategy.on_start(ctx)
+
+        for ev in events:
+            n += 1
+            ctx.now = ev.ts
+            symbol = ev.symbol
+
+            if ev.kind == KIND_DEPTH:
+                n_depth += 1
+                depth = ev.depth
+                sim = ctx.sims.get(symbol)
+                if sim is not None:
+                    fills, depth = sim.match_working_on_depth(depth)
+                    ctx.depths[symbol] = depth
+                    ctx._book(symbol, fills)
+                else:
+                    ctx.depths[symbol] = depth
+                strategy.on_depth(ctx, symbol, ctx.depths[symbol])
+            else:
+                n_trade += 1
+                sim = ctx.sims.get(symbol)
+                if sim is not None:
+                    ctx._book(symbol, sim.match_working_on_trade(ev.trade))
+                strategy.on_trade(ctx, symbol, ev.trade)
+
+            if self.mark_every and n % self.mark_every == 0:
+                account.mark_to_market(self._mids(ctx))
+
+        strategy.on_end(ctx)
+        account.mark_to_market(self._mids(ctx))
+        elapsed = time.perf_counter() - t0
+
+        state = account.state
+        realized = sum(p["realized_pnl"] for p in state["positions"])
+        unrealized = account.total_unrealized
+        equity = account.cash + sum(p["asset_value"] for p in state["positions"])
+
+        return BacktestReport(
+            events=n,
+            depth_events=n_depth,
+            trade_events=n_trade,
+            fills=len(ctx.fills),
+            start_cash=self.start_cash,
+            cash=account.cash,
+            equity=equity,
+            realized_pnl=realized,
+            unrealized_pnl=unrealized,
+            total_pnl=equity - self.start_cash,
+            positions=state["positions"],
+            elapsed=elapsed,
+        )
+
+    @staticmethod
+    def _mids(ctx: BacktestContext) -> Dict[str, float]:
+        return {sym: d.mid for sym, d in ctx.depths.items() if d.mid is not None}
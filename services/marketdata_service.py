@@ -1,10 +1,15 @@
 # services/marketdata_service.py
 from __future__ import annotations
-import requests
+import json
+import threading
 import time
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
 
+from infra.http import HttpTransport, shared_transport
+
+BOOK_TICKER_URL = "https://api.binance.com/api/v3/ticker/bookTicker"
 
 # ---------------------------------------------
 # DepthSnapshot 모델 (UI에서 그대로 사용)
@@ -29,21 +34,44 @@ class MarketDataService:
         md.fetch_depth() → DepthSnapshot
 
     형식에 의존하므로, 이 서비스만 교체하면 UI는 변경할 필요 없음.
+
+    provider="STREAM" 이면 BinanceOracle 이 백그라운드에서 WS 로 호가를 유지하고
+    fetch_depth() 는 메모리의 최신 스냅샷만 돌려준다 (HTTP 왕복 없음).
+    stream_rest_url / stream_ws_url 로 로컬 스탠드인에 붙일 수 있다.
     """
 
     def __init__(
         self,
         use_mock: bool = False,
-        provider: str = "BINANCE",        # LOCAL or BINANCE
+        provider: str = "BINANCE",        # LOCAL, BINANCE or STREAM
         symbol: str = "SOLUSDT",
         rows: int = 10,
-        api_base: str = "http://127.0.0.1:9000"
+        api_base: str = "http://127.0.0.1:9000",
+        stream_rest_url: Optional[str] = None,
+        stream_ws_url: Optional[str] = None,
+        http: Optional[HttpTransport] = None,
+        price_ttl: float = 1.0,
+        price_fail_ttl: float = 10.0,
     ):
         self.use_mock = use_mock
         self.provider = provider.upper()
         self._symbol = symbol.upper()
         self.rows = rows
         self.api_base = api_base     # LOCAL MATCHING ENGINE
+        self.http = http or shared_transport()
+
+        # 심볼별 최근가 캐시: symbol → (price, 저장 시각). price_ttl 초 동안 재사용
+        self.price_ttl = price_ttl
+        self._prices: Dict[str, Tuple[float, float]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._price_lock = threading.Lock()
+        # 조회 실패한 심볼: symbol → 재시도 가능 시각. price_fail_ttl 초 동안은 요청하지 않는다
+        self.price_fail_ttl = price_fail_ttl
+        self._failed: Dict[str, float] = {}
+
+        self.stream_rest_url = stream_rest_url
+        self.stream_ws_url = stream_ws_url
+        self._oracles: Dict[str, "BinanceOracle"] = {}
 
     # -----------------------------------------
     # 심볼 제어
@@ -53,6 +81,35 @@ class MarketDataService:
 
     def set_symbol(self, symbol: str):
         self._symbol = symbol.upper()
+        if self.provider == "STREAM" and not self.use_mock:
+            # 보이는 심볼 하나만 스트림 유지 (UI 스레드이므로 멈춤 신호만 보내고 join 은 기다리지 않는다)
+            for sym in [s for s in self._oracles if s != self._symbol]:
+                self._oracles.pop(sym).stop(timeout=None)
+            self.start_oracle()
+
+    # -----------------------------------------
+    # STREAM 모드: 백그라운드 오라클
+    # -----------------------------------------
+    def start_oracle(self, symbol: Optional[str] = None):
+        """심볼의 BinanceOracle 을 띄운다 (이미 있으면 그대로)"""
+        from adapters.binance_oracle import BinanceOracle, REST_DEPTH_URL, WS_DEPTH_URL
+
+        symbol = (symbol or self._symbol).upper()
+        oracle = self._oracles.get(symbol)
+        if oracle is None:
+            oracle = self._oracles[symbol] = BinanceOracle(
+                symbol,
+                levels=self.rows,
+                rest_url=self.stream_rest_url or REST_DEPTH_URL,
+                ws_url=self.stream_ws_url or WS_DEPTH_URL,
+            )
+            oracle.start()
+        return oracle
+
+    def stop_oracles(self):
+        for oracle in self._oracles.values():
+            oracle.stop(timeout=None)
+        self._oracles.clear()
 
     # -----------------------------------------
     # 메인 엔트리
@@ -71,18 +128,21 @@ class MarketDataService:
         elif self.provider == "BINANCE":
             return self._fetch_binance_depth()
 
+        elif self.provider == "STREAM":
+            return self._stream_depth()
+
         else:
             raise ValueError(f"Unknown provider: {self.provider}")
 
     # -----------------------------------------
     # 1) LOCAL MATCHING ENGINE DEPTH
     # -----------------------------------------
-    def _fetch_local_depth(self) -> Optional[DepthSnapshot]:
-        symbol = self._symbol
+    def _fetch_local_depth(self, symbol: Optional[str] = None) -> Optional[DepthSnapshot]:
+        symbol = (symbol or self._symbol).upper()
 
         try:
             url = f"{self.api_base}/orderbook"
-            res = requests.get(url, params={"symbol": symbol}, timeout=0.5)
+            res = self.http.get(url, params={"symbol": symbol}, timeout=0.5)
 
             if res.status_code != 200:
                 print("[MarketDataService] local depth error", res.text)
@@ -113,7 +173,7 @@ class MarketDataService:
         """
         try:
             url = f"https://api.binance.com/api/v3/depth?symbol={self._symbol}&limit={self.rows}"
-            res = requests.get(url, timeout=3.0)
+            res = self.http.get(url, timeout=3.0)
             if res.status_code != 200:
                 print("[MarketDataService] binance error", res.text)
                 return None
@@ -137,6 +197,17 @@ class MarketDataService:
             print("[MarketDataService] BINANCE depth error:", e)
             return None
 
+    # -----------------------------------------
+    # 3) STREAM (메모리 스냅샷)
+    # -----------------------------------------
+    def _stream_depth(self):
+        """
+        오라클이 업데이트마다 만들어 둔 스냅샷을 그대로 반환.
+        첫 스냅샷이 오기 전에는 None (UI 는 빈 호가로 그린다).
+        """
+        oracle = self._oracles.get(self._symbol) or self.start_oracle()
+        return oracle.get_binance_depth(self.rows)
+
     # -----------------------------------------
     # MOCK DEPTH (테스트용)
     # -----------------------------------------
@@ -166,14 +237,120 @@ class MarketDataService:
     # -----------------------------------------
     def get_last_price(self, symbol: Optional[str] = None):
         """
-        특정 심볼의 mid price만 간단히 가져오기 (잔고 평가용)
+        특정 심볼의 mid price만 간단히 가져오기 (잔고 평가용, TTL 캐시 경유)
         """
         symbol = (symbol or self._symbol).upper()
-        depth = self._fetch_local_depth() if self.provider == "LOCAL" else self.fetch_depth()
+        return self.get_last_prices([symbol]).get(symbol)
 
-        if not depth:
-            return None
-        return depth.mid
+    def get_last_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """
+        여러 심볼의 mid 를 한 번에.
+        - TTL 안의 캐시는 그대로 사용
+        - 없는/만료된 심볼만 모아서 한 번의 배치 요청
+        - 다른 스레드가 이미 조회 중인 심볼은 새로 요청하지 않고 그 결과를 기다린다 (single-flight)
+        조회 실패한 심볼은 결과에서 빠지고, price_fail_ttl 동안은 다시 요청하지 않는다.
+        """
+        now = time.monotonic()
+        out: Dict[str, float] = {}
+        missing: List[str] = []
+        waits: List[Tuple[str, Future]] = []
+
+        with self._price_lock:
+            for sym in dict.fromkeys(s.upper() for s in symbols):
+                hit = self._prices.get(sym)
+                if hit is not None and now - hit[1] < self.price_ttl:
+                    out[sym] = hit[0]
+                elif self._failed.get(sym, 0.0) > now:
+                    continue
+                elif sym in self._inflight:
+                    waits.append((sym, self._inflight[sym]))
+                else:
+                    missing.append(sym)
+            if missing:
+                fut: Future = Future()
+                for sym in missing:
+                    self._inflight[sym] = fut
+
+        if missing:
+            try:
+                fetched = self._fetch_prices(missing)
+            except Exception as e:
+                print("[MarketDataService] get_last_prices error:", e)
+                fetched = {}
+            stamp = time.monotonic()
+            with self._price_lock:
+                for sym, px in fetched.items():
+                    self._prices[sym] = (px, stamp)
+                    self._failed.pop(sym, None)
+                for sym in missing:
+                    self._inflight.pop(sym, None)
+                    if sym not in fetched:
+                        self._failed[sym] = stamp + self.price_fail_ttl
+            fut.set_result(fetched)
+            out.update(fetched)
+
+        for sym, f in waits:
+            px = f.result().get(sym)
+            if px is not None:
+                out[sym] = px
+        return out
+
+    def _fetch_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """캐시에 없는 심볼들의 mid 조회 (provider 별 한 번의 요청)"""
+        if self.use_mock:
+            depth = self._mock_depth()
+            return {sym: depth.mid for sym in symbols}
+
+        out: Dict[str, float] = {}
+        rest = list(symbols)
+
+        if self.provider == "STREAM":
+            # 스트림 중인 심볼은 메모리 스냅샷에서 바로
+            for sym in list(rest):
+                oracle = self._oracles.get(sym)
+                snap = oracle.get_binance_depth(1) if oracle else None
+                if snap is not None and snap.mid:
+                    out[sym] = snap.mid
+                    rest.remove(sym)
+
+        if not rest:
+            return out
+
+        if self.provider == "LOCAL":
+            # 로컬 서버에는 배치 시세 엔드포인트가 없어서 심볼별 depth
+            for sym in rest:
+                depth = self._fetch_local_depth(sym)
+                if depth and depth.mid:
+                    out[sym] = depth.mid
+            return out
+
+        # BINANCE / STREAM: bookTicker 배치 한 번 → (bid + ask) / 2
+        res = self.http.get(
+            BOOK_TICKER_URL,
+            params={"symbols": json.dumps(rest, separators=(",", ":"))},
+            timeout=3.0,
+        )
+        if res.status_code == 400 and len(rest) > 1:
+            # 잘못된 심볼이 하나라도 있으면 배치 전체가 400 → 심볼별로 다시 (실패한 것만 빠짐)
+            for sym in rest:
+                r = self.http.get(BOOK_TICKER_URL, params={"symbol": sym}, timeout=3.0)
+                if r.status_code != 200:
+                    print(f"[MarketDataService] binance bookTicker {sym} error", r.text)
+                    continue
+                self._put_book_tickers(out, [r.json()])
+            return out
+        if res.status_code != 200:
+            print("[MarketDataService] binance bookTicker error", res.text)
+            return out
+        self._put_book_tickers(out, res.json())
+        return out
+
+    @staticmethod
+    def _put_book_tickers(out: Dict[str, float], tickers):
+        for t in tickers:
+            bid, ask = float(t["bidPrice"]), float(t["askPrice"])
+            if bid and ask:
+                out[t["symbol"].upper()] = (bid + ask) / 2
 
     def get_latest_prices_dict(self):
         """BalanceTable.render_positions()에서 사용하기 좋은 형태"""
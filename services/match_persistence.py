@@ -0,0 +1,146 @@
+# services/match_persistence.py
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from psycopg2.extras import execute_values
+
+from models.instrument import InstrumentSpec, get_instrument
+from services.order_book import BookOrder
+
+
+class StaleOrdersError(RuntimeError):
+    """
+    체결에 걸린 주문 중 DB 에서 이미 WORKING/PARTIAL 이 아니거나(취소 등)
+    잔량이 메모리 북이 알던 값과 다른 것이 있음 → 사이클 롤백
+    """
+
+    def __init__(self, ids):
+        self.ids = sorted(ids)
+        super().__init__(f"orders no longer live or remaining changed: {self.ids}")
+
+
+class MatchBatch:
+    """
+    매칭 한 사이클 동안 나온 체결을 모아뒀다가 한 번에 DB 에 반영.
+    - orders  : UPDATE ... FROM (VALUES ...) ... RETURNING id 1회 (주문별 최종 잔량만,
+                WORKING/PARTIAL 이고 DB 잔량이 이 사이클 시작 잔량과 같은 행만 — 그 사이 취소됐거나
+                저널 복구 북이 DB 보다 뒤처져 있으면 StaleOrdersError → 같은 수량을 두 번 체결하지 않는다)
+    - trades  : multi-row INSERT 1회
+    - accounts: 계좌별로 상계한 잔고 증감을 UPDATE ... FROM (VALUES ...) 1회
+    → 체결 N건이 몇 건이든 라운드트립은 최대 3회
+    틱/로트 정수 → Decimal 변환은 여기(DB 경계)에서만 한다.
+    """
+
+    def __init__(self, symbol: str, spec: InstrumentSpec | None = None):
+        self.symbol = symbol
+        self.spec = spec or get_instrument(symbol)
+        self.trade_rows: List[Tuple] = []
+        self.orders: Dict[int, BookOrder] = {}
+        self.filled: Dict[int, int] = defaultdict(int)   # 주문별 이번 사이클 체결 로트
+        self.balance_delta: Dict[int, Decimal] = defaultdict(Decimal)
+
+    def add(self, buy: BookOrder, sell: BookOrder, price: int, qty: int):
+        px = self.spec.ticks_to_price(price)
+        q = self.spec.lots_to_qty(qty)
+        self.trade_rows.append((buy.id, sell.id, self.symbol, px, q))
+
+        # 같은 주문이 여러 번 체결돼도 마지막 잔량만 쓰면 된다
+        self.orders[buy.id] = buy
+        self.orders[sell.id] = sell
+        self.filled[buy.id] += qty
+        self.filled[sell.id] += qty
+
+        #   - BUY: balance -= notional
+        #   - SELL: balance += notional
+        notional = px * q
+        if buy.account_id is not None:
+            self.balance_delta[buy.account_id] -= notional
+        if sell.account_id is not None:
+            self.balance_delta[sell.account_id] += notional
+
+    def extend(self, trades):
+        for buy, sell, price, qty in trades:
+            self.add(buy, sell, price, qty)
+
+    def __len__(self):
+        return len(self.trade_rows)
+
+    # 행 순서를 id 오름차순으로 고정 (계좌 UPDATE 는 FOR UPDATE ... ORDER BY id 로 잠금 순서까지 고정)
+    # → 같은 계좌를 건드리는 샤드 워커끼리 교착 없음
+    def order_rows(self) -> List[Tuple]:
+        """(id, 새 잔량, 상태, 사이클 시작 잔량, 로트) — 시작 잔량 = 최종 잔량 + 이번 사이클 체결량"""
+        rows = []
+        lot = self.spec.lot_size
+        for oid in sorted(self.orders):
+            o = self.orders[oid]
+            remaining = max(o.remaining, 0)
+            status = "FILLED" if remaining <= 0 else "PARTIAL"
+            prev = self.spec.lots_to_qty(remaining + self.filled[oid])
+            rows.append((o.id, self.spec.lots_to_qty(remaining), status, prev, lot))
+        return rows
+
+    def account_rows(self) -> List[Tuple]:
+        return sorted((acc, delta) for acc, delta in self.balance_delta.items() if delta != 0)
+
+    def flush(self, cur):
+        """cursor 에 bulk 문장을 실행 (commit 은 호출자 몫)"""
+        if not self.trade_rows:
+            return
+
+        # 주문 잔량부터: 살아있고 잔량이 사이클 시작 값(로트 미만 자투리 허용)인 행만 갱신하고,
+        # 하나라도 빠지면 체결 전체를 되돌리게 한다
+        order_rows = self.order_rows()
+        live = execute_values(
+            cur,
+            """
+            UPDATE orders AS o
+            SET remaining_qty = v.remaining_qty,
+                status = v.status
+            FROM (VALUES %s) AS v(id, remaining_qty, status, prev_qty, lot)
+            WHERE o.id = v.id
+              AND o.status IN ('WORKING','PARTIAL')
+              AND o.remaining_qty >= v.prev_qty
+              AND o.remaining_qty < v.prev_qty + v.lot
+            RETURNING o.id;
+            """,
+            order_rows,
+            template="(%s::bigint, %s::numeric, %s::text, %s::numeric, %s::numeric)",
+            page_size=len(order_rows),
+            fetch=True,
+        )
+        dead = set(self.orders) - {r[0] for r in live}
+        if dead:
+            raise StaleOrdersError(dead)
+
+        execute_values(
+            cur,
+            """
+            INSERT INTO trades (buy_order_id, sell_order_id, symbol, price, quantity, trade_time)
+            VALUES %s;
+            """,
+            self.trade_rows,
+            template="(%s, %s, %s, %s, %s, now())",
+            page_size=len(self.trade_rows),
+        )
+
+        account_rows = self.account_rows()
+        if account_rows:
+            execute_values(
+                cur,
+                """
+                WITH v(id, delta) AS (VALUES %s),
+                     locked AS (
+                         SELECT a.id FROM accounts a JOIN v ON v.id = a.id
+                         ORDER BY a.id
+                         FOR UPDATE OF a
+                     )
+                UPDATE accounts AS a
+                SET balance = a.balance + v.delta
+                FROM v JOIN locked l ON l.id = v.id
+                WHERE a.id = l.id;
+                """,
+                account_rows,
+                template="(%s::bigint, %s::numeric)",
+                page_size=len(account_rows),
+            )
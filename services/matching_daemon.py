@@ -0,0 +1,163 @@
+# services/matching_daemon.py
+import json
+import select
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+import psycopg2
+import psycopg2.extensions
+
+from infra.db import PG_DSN
+
+NOTIFY_SQL = Path(__file__).resolve().parents[1] / "infra" / "sql" / "orders_notify.sql"
+
+
+def install_orders_trigger(conn):
+    """orders_changed 알림 트리거 설치 (여러 번 실행해도 안전)"""
+    with conn.cursor() as cur:
+        cur.execute(NOTIFY_SQL.read_text(encoding="utf-8"))
+    conn.commit()
+
+
+class MatchingDaemon:
+    """
+    Postgres LISTEN/NOTIFY 기반 매칭 데몬.
+    engine 은 MatchingEngine 또는 ShardedMatchingEngine (match_symbol / cancel_orders / books 만 쓴다)
+    - orders_changed 채널을 LISTEN (전용 커넥션, autocommit)
+    - 알림이 오면 coalesce_ms 동안 더 모아서 바뀐 심볼만 engine.match_symbol()
+    - CANCEL 알림은 모아서 engine.cancel_orders(persist=False) 한 번으로 북에서 제거
+    - 알림이 없으면 select() 에서 잠들어 있으므로 idle 심볼을 주기적으로 훑지 않는다
+    - LISTEN 커넥션이 끊기면 backoff 하며 재접속하고, (재)접속할 때마다 미체결이 있는
+      심볼을 한 번씩 매칭 (끊겨 있던 동안 놓친 알림 보충)
+    """
+
+    def __init__(
+        self,
+        engine,
+        dsn: Optional[str] = None,
+        channel: str = "orders_changed",
+        coalesce_ms: float = 2.0,
+        idle_timeout: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        self.engine = engine
+        self.dsn = dsn or PG_DSN
+        self.channel = channel
+        self.coalesce = coalesce_ms / 1000.0
+        self.idle_timeout = idle_timeout
+        self.max_backoff = max_backoff
+
+        self._listen_conn = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_evt = threading.Event()
+
+    # ---------- public ----------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="MatchingDaemon", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 3.0):
+        self._stop_evt.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def run_forever(self):
+        backoff = min(0.5, self.max_backoff)
+        while not self._stop_evt.is_set():
+            try:
+                self._connect()
+                print(f"[MatchingDaemon] LISTEN {self.channel}")
+                backoff = min(0.5, self.max_backoff)
+                # LISTEN 을 건 뒤에 훑어야 그 사이 들어온 주문도 알림이나 이 catch-up 둘 중 하나로 잡힌다
+                self._catch_up()
+                while not self._stop_evt.is_set():
+                    symbols, cancels = self._wait_for_changes()
+                    if cancels:
+                        self.engine.cancel_orders(cancels, persist=False)
+                    for symbol in sorted(symbols):
+                        self.engine.match_symbol(symbol)
+            except Exception as e:
+                print(f"[MatchingDaemon] connection lost, retry in {backoff:.1f}s:", e)
+                self._close()
+                self._stop_evt.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+        self._close()
+        print("[MatchingDaemon] stopped")
+
+    # ---------- internal ----------
+    def _close(self):
+        if self._listen_conn is not None:
+            try:
+                self._listen_conn.close()
+            except Exception:
+                pass
+            self._listen_conn = None
+
+    def _catch_up(self):
+        """미체결이 남아 있는 심볼 + 이미 북이 있는 심볼을 한 번씩 매칭"""
+        with self._listen_conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT DISTINCT UPPER(symbol)
+                FROM orders
+                WHERE status IN ('WORKING','PARTIAL');
+                """
+            )
+            symbols = {r[0] for r in cur.fetchall()}
+        symbols.update(self.engine.books)
+        for symbol in sorted(symbols):
+            self.engine.match_symbol(symbol)
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {self.channel};")
+        self._listen_conn = conn
+
+    def _drain(self, symbols: Set[str], cancels: List[int]):
+        conn = self._listen_conn
+        conn.poll()
+        while conn.notifies:
+            n = conn.notifies.pop(0)
+            op, symbol, order_id = self._parse(n.payload)
+            if op == "CANCEL" and order_id is not None:
+                cancels.append(order_id)
+            elif symbol:
+                symbols.add(symbol)
+
+    @staticmethod
+    def _parse(payload: str) -> Tuple[str, Optional[str], Optional[int]]:
+        try:
+            j = json.loads(payload)
+            return j.get("op", "INSERT").upper(), j["symbol"].upper(), j.get("id")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # 트리거 대신 주문 API 가 NOTIFY orders_changed, 'SOLUSDT' 로 보내는 경우
+            return "INSERT", payload.strip().upper() or None, None
+
+    def _wait_for_changes(self) -> Tuple[Set[str], List[int]]:
+        symbols: Set[str] = set()
+        cancels: List[int] = []
+        conn = self._listen_conn
+
+        # 1) 첫 알림까지 대기
+        if select.select([conn], [], [], self.idle_timeout) == ([], [], []):
+            return symbols, cancels
+        self._drain(symbols, cancels)
+
+        # 2) 버스트 합치기: coalesce 창 안에 들어온 알림까지 한 번에 처리
+        deadline = time.monotonic() + self.coalesce
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            if select.select([conn], [], [], left) == ([], [], []):
+                break
+            self._drain(symbols, cancels)
+
+        return symbols, cancels
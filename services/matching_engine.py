@@ -1,146 +1,392 @@
 # services/matching_engine.py
+import time
+
 import psycopg2.extras
 
+from models.instrument import get_instrument
+from services.order_book import OrderBook, BookOrder
+from services.match_persistence import MatchBatch, StaleOrdersError
 
 
 class MatchingEngine:
-    def __init__(self, db: "DBService"):
+    """
+    심볼별 메모리 상주 오더북(OrderBook) 기반 매칭 엔진.
+    - 최초 match_symbol() 호출 시 DB 의 미체결 주문으로 북을 부트스트랩
+    - 이후에는 last_order_id 보다 큰 신규 주문만 읽어서 도착 순서대로 매칭
+      (id 시퀀스는 커밋 순서와 다를 수 있어서 워터마크 아래 lookback 개 id 구간은
+       매번 다시 훑는다 — 이미 처리한 id 는 쿼리에서 제외)
+    - 취소는 NOTIFY → cancel_orders(persist=False) 로 북에서 빠지고, 저장 시점에 살아있지 않은
+      주문이 체결에 걸리면 그 사이클을 롤백하고 DB 기준으로 다시 부트스트랩
+      (놓친 취소는 evict_interval 초마다 한 번 북 전체를 DB 와 대조해서 정리)
+    - Postgres 는 체결/잔량/잔고 저장 용도로만 사용 (사이클당 MatchBatch 로 일괄 반영)
+    - journal 을 넘기면 모든 적재/체결 이벤트를 저널에 남기고,
+      recover() 로 스냅샷 + 저널 꼬리만 재생해서 북을 복구 (orders 전체 재조회 없음)
+    - 가격/수량은 InstrumentSpec 의 틱/로트 정수로만 매칭 (DB 경계에서만 변환)
+    """
+
+    def __init__(self, db: "DBService", journal: "MatchingJournal | None" = None, lookback: int = 512,
+                 evict_interval: "float | None" = 30.0):
         self.db = db
+        self.journal = journal
+        self.lookback = lookback
+        self.evict_interval = evict_interval   # None 이면 대조 안 함
+        self._evicted_at: dict[str, float] = {}
+        self.books: dict[str, OrderBook] = {}
+        self._last_order_id: dict[str, int] = {}
+        self._seen: dict[str, set] = {}   # 워터마크 - lookback 위쪽에서 이미 처리한 주문 id
 
     import psycopg2
     import psycopg2.extras
 
-    def match_symbol(self, symbol: str):
+    # -----------------------------------------
+    # 북 관리
+    # -----------------------------------------
+    def get_book(self, symbol: str) -> OrderBook:
+        symbol = symbol.upper()
+        book = self.books.get(symbol)
+        if book is None:
+            book = OrderBook(symbol)
+            self.books[symbol] = book
+        return book
+
+    def recover(self):
+        """저널에서 북/last_order_id 복구. 이후 match_symbol 은 그 뒤 주문만 읽는다"""
+        if self.journal is None:
+            return
+        self.books, self._last_order_id = self.journal.recover()
+        self._seen = {
+            symbol: {od.id for od in book.resting_orders()} for symbol, book in self.books.items()
+        }
+
+    def _fetch_orders(self, symbol: str, after_id: int, exclude=()):
+        """after_id 보다 큰 미체결 주문 (exclude 에 있는 id 는 제외)"""
+        from psycopg2.extras import RealDictCursor
+
+        with self.db.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                """
+                SELECT id, account_id, side, price, remaining_qty, created_at
+                FROM orders
+                WHERE UPPER(symbol) = UPPER(%s)
+                  AND status IN ('WORKING','PARTIAL')
+                  AND remaining_qty > 0
+                  AND id > %s
+                  AND id <> ALL(%s::bigint[])
+                ORDER BY id ASC;
+                """,
+                (symbol, after_id, list(exclude)),
+            )
+            return cur.fetchall()
+
+    def _mark_seen(self, symbol: str, ids, prune: bool = False):
+        seen = self._seen.setdefault(symbol, set())
+        seen.update(ids)
+        # 재조회 구간 밑으로 내려간 id 는 더 들고 있을 필요 없음 (submit_order 경로는 가끔만 정리)
+        if prune or len(seen) > 4 * self.lookback:
+            floor = self._last_order_id.get(symbol, 0) - self.lookback
+            self._seen[symbol] = {i for i in seen if i > floor}
+
+    def _close_dust(self, rows):
         """
-        symbol에 대한 WORKING 주문들을 가져와
-        BUY.price >= SELL.price 인 만큼 체결 생성
+        로트 미만 잔량만 남은 주문은 북에 올라가지 못하므로 DB 에서 마감
+        (체결 이력이 있으면 FILLED, 없으면 CANCELLED) — 안 하면 영원히 WORKING/PARTIAL 로 남는다
         """
+        ids = [r["id"] for r in rows]
+        if not ids:
+            return
         conn = self.db.conn
-        trades = []  # 예외 발생 시에도 참조 가능하도록 미리 선언
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE orders
+                SET status = CASE WHEN status = 'PARTIAL' THEN 'FILLED' ELSE 'CANCELLED' END
+                WHERE id = ANY(%s)
+                  AND status IN ('WORKING','PARTIAL');
+                """,
+                (ids,),
+            )
+        conn.commit()
+
+    def _evict_dead(self, symbol: str, book: OrderBook):
+        """
+        북에 있지만 DB 에서 이미 WORKING/PARTIAL 이 아닌(취소 등) 주문 제거.
+        북 크기만큼 id 를 보내므로 매 사이클이 아니라 evict_interval 초에 한 번만
+        (NOTIFY 를 놓친 취소용 안전망 — 체결에 걸린 죽은 주문은 StaleOrdersError 가 잡는다)
+        """
+        if self.evict_interval is None:
+            return
+        now = time.monotonic()
+        last = self._evicted_at.get(symbol)
+        if last is not None and now - last < self.evict_interval:
+            return   # (recover() 직후처럼 기록이 없으면 바로 한 번 대조)
+        self._evicted_at[symbol] = now
+
+        ids = [od.id for od in book.resting_orders()]
+        if not ids:
+            return
+        with self.db.conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id FROM orders
+                WHERE id = ANY(%s)
+                  AND status NOT IN ('WORKING','PARTIAL');
+                """,
+                (ids,),
+            )
+            dead = [r[0] for r in cur.fetchall()]
+        for od in book.remove_many(dead):
+            if self.journal is not None:
+                self.journal.log_cancel(symbol, od.id)
+
+    @staticmethod
+    def _to_book_order(symbol: str, row) -> BookOrder:
+        spec = get_instrument(symbol)
+        return BookOrder(
+            id=row["id"],
+            side=row["side"].upper(),
+            price=spec.price_to_ticks(row["price"], row["side"]),
+            remaining=spec.qty_to_lots(row["remaining_qty"]),
+            account_id=row.get("account_id"),
+            created_at=row.get("created_at"),
+        )
+
+    # -----------------------------------------
+    # 매칭
+    # -----------------------------------------
+    def submit_order(self, symbol: str, row) -> list:
+        """
+        신규 주문 1건을 도착 즉시 매칭하고 체결을 DB 에 반영.
+        row: orders 테이블 한 행과 같은 키를 가진 dict
+        """
+        symbol = symbol.upper()
+        if symbol not in self._last_order_id:
+            # 아직 부트스트랩 전 → DB 미체결부터 적재 (이 주문이 이미 커밋돼 있으면 거기서 같이 처리된다)
+            self.match_symbol(symbol)
+            if symbol not in self._last_order_id:
+                return []
+        if row["id"] in self._seen.get(symbol, ()):
+            return []
 
         try:
-            from psycopg2.extras import RealDictCursor
+            book = self.get_book(symbol)
+            od = self._to_book_order(symbol, row)
+            self._last_order_id[symbol] = max(self._last_order_id.get(symbol, 0), row["id"])
+            self._mark_seen(symbol, (row["id"],))
+            if od.remaining <= 0:
+                self._close_dust([row])
+                return []
+            trades = self._add(book, od)
+            self._end_cycle(symbol, trades)
+            return trades
+        except StaleOrdersError as e:
+            # 체결 상대가 그 사이 취소됨 → 이 사이클 버리고 DB 기준으로 다시 적재/매칭
+            self._reset_symbol(symbol)
+            print(f"[MatchingEngine] symbol={symbol} rebuilding book:", e)
+            self.match_symbol(symbol)
+            return []
+        except Exception as e:
+            self._reset_symbol(symbol)
+            print(f"[MatchingEngine] symbol={symbol} submit error:", e)
+            return []
 
-            # 1) 매칭 대상 주문 조회 (잔량 > 0 인 주문만)
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(
-                    """
-                    SELECT *
-                    FROM orders
-                    WHERE UPPER(symbol) = UPPER(%s)
-                      AND status IN ('WORKING','PARTIAL')
-                      AND remaining_qty > 0
-                    ORDER BY
-                        CASE WHEN side='BUY' THEN -price ELSE price END,
-                        created_at ASC;
-                    """,
-                    (symbol,),
-                )
-                orders = cur.fetchall()
+    def match_symbol(self, symbol: str, _retry: bool = True):
+        """
+        symbol 의 오더북에 아직 반영되지 않은 신규 주문을 읽어와
+        도착 순서대로 매칭하고 체결을 DB 에 반영
+        """
+        symbol = symbol.upper()
+        trades = []  # 예외 발생 시에도 참조 가능하도록 미리 선언
 
-            buys = [o for o in orders if o["side"].upper() == "BUY"]
-            sells = [o for o in orders if o["side"].upper() == "SELL"]
+        try:
+            book = self.get_book(symbol)
+            bootstrap = symbol not in self._last_order_id
+            if bootstrap:
+                rows = self._fetch_orders(symbol, 0)
+                self._evicted_at[symbol] = time.monotonic()   # 방금 DB 에서 적재 → 대조 주기 새로 시작
+            else:
+                self._evict_dead(symbol, book)
+                after = max(self._last_order_id[symbol] - self.lookback, 0)
+                rows = self._fetch_orders(symbol, after, self._seen.get(symbol, ()))
 
-            if not buys or not sells:
-                # 한쪽이라도 없으면 체결 없음
-                return
+            # 로트 미만 잔량뿐인 주문은 북에 못 올라가므로 따로 마감
+            orders, dust = [], []
+            for row in rows:
+                od = self._to_book_order(symbol, row)
+                if od.remaining > 0:
+                    orders.append(od)
+                else:
+                    dust.append(row)
+            self._close_dust(dust)
 
-            # 2) 가격 매칭: 최고 매수 vs 최저 매도
-            while buys and sells:
-                buy = buys[0]
-                sell = sells[0]
+            if bootstrap:
+                # 1) 최초 로딩: 매칭 없이 적재 후 교차된 부분만 정리
+                if self.journal is not None:
+                    self.journal.log_reset(symbol)
+                for od in orders:
+                    book.rest(od)
+                    if self.journal is not None:
+                        self.journal.log_order(symbol, od)
+                trades = book.match()
+                self._log_fills(symbol, trades)
+            else:
+                # 2) 신규 주문만 도착 순서대로 매칭
+                for od in orders:
+                    trades.extend(self._add(book, od))
 
-                buy_price = float(buy["price"])
-                sell_price = float(sell["price"])
+            if rows:
+                self._last_order_id[symbol] = max(self._last_order_id.get(symbol, 0), rows[-1]["id"])
+            else:
+                self._last_order_id.setdefault(symbol, 0)
+            self._mark_seen(symbol, [r["id"] for r in rows], prune=True)
 
-                # 가격 교차 조건: 최고 매수 < 최저 매도 이면 더 이상 체결 불가
-                if buy_price < sell_price:
-                    break
+            self._end_cycle(symbol, trades)
 
-                buy_rem = float(buy["remaining_qty"])
-                sell_rem = float(sell["remaining_qty"])
+        except StaleOrdersError as e:
+            self._reset_symbol(symbol)
+            print(f"[MatchingEngine] symbol={symbol} rebuilding book:", e)
+            if _retry:
+                self.match_symbol(symbol, _retry=False)
+        except Exception as e:
+            self._reset_symbol(symbol)
+            print(f"[MatchingEngine] symbol={symbol} error:", e)
 
-                # 혹시라도 0 이하 잔량이 섞여 있으면 해당 주문 제거하고 진행
-                if buy_rem <= 1e-9:
-                    buys.pop(0)
-                    continue
-                if sell_rem <= 1e-9:
-                    sells.pop(0)
-                    continue
+    # -----------------------------------------
+    # 호가 (/orderbook/local)
+    # -----------------------------------------
+    def get_depth(self, symbol: str, levels: int = 10) -> dict:
+        """
+        메모리 북의 레벨 집계로 상위 levels 개 호가 반환 — DB 조회/주문 순회 없음.
+        seq 가 이전 응답과 같으면 호가가 바뀌지 않은 것.
+        {"symbol", "seq", "bids": [{"price", "qty", "cnt"}], "asks": [...]}
+        """
+        symbol = symbol.upper()
+        spec = get_instrument(symbol)
+        book = self.books.get(symbol)
+        if book is None:
+            return {"symbol": symbol, "seq": 0, "bids": [], "asks": []}
 
-                qty = min(buy_rem, sell_rem)
-                if qty <= 1e-9:
-                    # 실질적인 체결량이 없으면 루프 종료
-                    break
+        bids, asks = book.depth(levels)
 
-                # 체결 가격(간단히 양쪽 가격 평균으로)
-                price = (buy_price + sell_price) / 2.0
+        def rows(side):
+            return [
+                {
+                    "price": float(spec.ticks_to_price(px)),
+                    "qty": float(spec.lots_to_qty(qty)),
+                    "cnt": cnt,
+                }
+                for px, qty, cnt in side
+            ]
 
-                # 메모리 상 잔량 업데이트
-                buy_rem -= qty
-                sell_rem -= qty
-                buy["remaining_qty"] = buy_rem
-                sell["remaining_qty"] = sell_rem
+        return {"symbol": symbol, "seq": book.seq, "bids": rows(bids), "asks": rows(asks)}
 
-                trades.append((buy, sell, price, qty))
+    # -----------------------------------------
+    # 취소
+    # -----------------------------------------
+    def cancel_orders(self, order_ids, persist: bool = True) -> list:
+        """
+        주문 일괄 취소.
+        - persist=True : UPDATE 한 문장으로 WORKING/PARTIAL → CANCELLED 후 실제로 취소된 id 만 북에서 제거
+        - persist=False: DB 는 이미 취소됨 (주문 API/NOTIFY 경로) → 메모리 북에서만 제거
+        반환: 북에서 제거된 BookOrder 목록
+        """
+        ids = list(dict.fromkeys(int(i) for i in order_ids))
+        if not ids:
+            return []
 
-                # 잔량이 거의 0 이하면 FILLED 로 보고 리스트에서 제거
-                if buy_rem <= 1e-9:
-                    buys.pop(0)
-                if sell_rem <= 1e-9:
-                    sells.pop(0)
+        if persist:
+            ids = self.mark_cancelled(ids)
 
-            # 3) DB 반영
-            if not trades:
-                # 실제 체결 없으면 DB 안 건드림
-                return
+        removed = []
+        for symbol, book in self.books.items():
+            gone = book.remove_many(ids)
+            if not gone:
+                continue
+            if self.journal is not None:
+                for od in gone:
+                    self.journal.log_cancel(symbol, od.id)
+            removed.extend(gone)
 
-            with conn.cursor() as cur:
-                for buy, sell, price, qty in trades:
-                    # 체결 기록
-                    cur.execute(
-                        """
-                        INSERT INTO trades (buy_order_id, sell_order_id, symbol, price, quantity, trade_time)
-                        VALUES (%s, %s, %s, %s, %s, now());
-                        """,
-                        (buy["id"], sell["id"], symbol, price, qty),
-                    )
-
-                    # 주문 잔량/상태 업데이트
-                    for o in (buy, sell):
-                        rem = float(o["remaining_qty"])
-                        # 소수점 오차 보정
-                        if rem < 1e-9:
-                            rem = 0.0
-                        status = "FILLED" if rem <= 0 else "PARTIAL"
-
-                        cur.execute(
-                            """
-                            UPDATE orders
-                            SET remaining_qty = %s,
-                                status = %s
-                            WHERE id = %s;
-                            """,
-                            (rem, status, o["id"]),
-                        )
-
-                    # 🔁 계좌 잔고 갱신
-                    notional = float(price) * float(qty)
-                    #   - BUY: balance -= notional
-                    #   - SELL: balance += notional
-                    cur.execute(
-                        "UPDATE accounts SET balance = balance - %s WHERE id = %s;",
-                        (notional, buy["account_id"]),
-                    )
-                    cur.execute(
-                        "UPDATE accounts SET balance = balance + %s WHERE id = %s;",
-                        (notional, sell["account_id"]),
-                    )
+        if removed and self.journal is not None:
+            self.journal.flush()
+        return removed
 
+    def mark_cancelled(self, order_ids) -> list:
+        """DB 에서만 WORKING/PARTIAL → CANCELLED (북은 안 건드림). 반환: 실제로 취소된 id"""
+        ids = list(dict.fromkeys(int(i) for i in order_ids))
+        if not ids:
+            return []
+        conn = self.db.conn
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE orders
+                    SET status = 'CANCELLED'
+                    WHERE id = ANY(%s)
+                      AND status IN ('WORKING','PARTIAL')
+                    RETURNING id;
+                    """,
+                    (ids,),
+                )
+                ids = [r[0] for r in cur.fetchall()]
             conn.commit()
-            print(f"[MatchingEngine] symbol={symbol} trades={len(trades)} created")
-
+            return ids
         except Exception as e:
             conn.rollback()
-            print(f"[MatchingEngine] symbol={symbol} error:", e)
+            print("[MatchingEngine] cancel_orders error:", e)
+            return []
+
+    def _add(self, book: OrderBook, od: BookOrder) -> list:
+        if self.journal is not None:
+            # 체결 전 잔량 기준으로 먼저 기록 → 재생 시 rest + fill 로 같은 상태가 된다
+            self.journal.log_order(book.symbol, od)
+        trades = book.add(od)
+        self._log_fills(book.symbol, trades)
+        return trades
+
+    def _log_fills(self, symbol: str, trades: list):
+        if self.journal is None:
+            return
+        for buy, sell, price, qty in trades:
+            self.journal.log_fill(symbol, buy, sell, price, qty)
+
+    def _end_cycle(self, symbol: str, trades: list):
+        self._persist(symbol, trades)
+        if self.journal is not None:
+            # DB commit 이 끝난 사이클만 저널에 남긴다 (롤백된 체결이 복구 때 재생되지 않도록)
+            # commit 과 flush 사이에 죽으면 복구된 북의 잔량이 DB 보다 크게 남지만,
+            # MatchBatch 가 DB 잔량 = 사이클 시작 잔량인 행만 갱신하므로 그 주문이 다시 체결에
+            # 걸리는 순간 StaleOrdersError → DB 기준으로 다시 적재 (같은 수량 재체결 없음)
+            self.journal.flush()
+            self.journal.maybe_snapshot(self.books, self._last_order_id)
+
+    def _reset_symbol(self, symbol: str):
+        self.db.conn.rollback()
+        if self.journal is not None:
+            # 이번 사이클 기록은 버리고, 복구 시에도 이 심볼은 DB 에서 다시 적재하도록 리셋 표시
+            self.journal.discard()
+            self.journal.log_reset(symbol)
+            self.journal.flush()
+        # 메모리 북이 DB 와 어긋났을 수 있으므로 다음 호출에서 다시 부트스트랩
+        self.books.pop(symbol, None)
+        self._last_order_id.pop(symbol, None)
+        self._seen.pop(symbol, None)
+        self._evicted_at.pop(symbol, None)
+
+    # -----------------------------------------
+    # DB 반영
+    # -----------------------------------------
+    def _persist(self, symbol: str, trades: list):
+        if not trades:
+            # 실제 체결 없으면 DB 안 건드림
+            return
+
+        batch = MatchBatch(symbol)
+        batch.extend(trades)
+
+        conn = self.db.conn
+        with conn.cursor() as cur:
+            batch.flush(cur)
 
+        conn.commit()
+        print(f"[MatchingEngine] symbol={symbol} trades={len(trades)} created")
@@ -0,0 +1,249 @@
+# services/matching_journal.py
+import math
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+
+from services.order_book import OrderBook, BookOrder
+
+# ---------------------------------------------
+# 레코드 포맷 (little-endian, 고정 길이)
+#   HEAD  : type(1) + symbol_len(1) + symbol
+#   ORDER : id, side(b'B'/b'S'), price(틱), remaining(로트), account_id(-1=None), created_ts(NaN=None)
+#   CANCEL: id
+#   FILL  : buy_id, sell_id, price(틱), qty(로트)
+#   RESET : (body 없음) → 해당 심볼 북을 비움 (DB 재부트스트랩 직전)
+# ---------------------------------------------
+HEAD = struct.Struct("<cB")
+ORDER = struct.Struct("<qcqqqd")
+CANCEL = struct.Struct("<q")
+FILL = struct.Struct("<qqqq")
+
+T_ORDER = b"O"
+T_CANCEL = b"C"
+T_FILL = b"F"
+T_RESET = b"R"
+
+SNAP_MAGIC = b"MHSNAP2\0"
+SNAP_HEAD = struct.Struct("<8sqI")       # magic, journal_offset, n_symbols
+SNAP_SYMBOL = struct.Struct("<qI")       # last_order_id, n_orders
+
+
+def _pack_order(od: BookOrder) -> bytes:
+    created = od.created_at
+    if isinstance(created, datetime):
+        ts = created.timestamp()
+    elif created is None:
+        ts = math.nan
+    else:
+        ts = float(created)
+    return ORDER.pack(
+        od.id,
+        b"B" if od.side == "BUY" else b"S",
+        od.price,
+        od.remaining,
+        -1 if od.account_id is None else od.account_id,
+        ts,
+    )
+
+
+def _unpack_order(buf, offset: int = 0) -> BookOrder:
+    oid, side, price, remaining, account_id, ts = ORDER.unpack_from(buf, offset)
+    return BookOrder(
+        id=oid,
+        side="BUY" if side == b"B" else "SELL",
+        price=price,
+        remaining=remaining,
+        account_id=None if account_id < 0 else account_id,
+        created_at=None if math.isnan(ts) else datetime.fromtimestamp(ts, tz=timezone.utc),
+    )
+
+
+class MatchingJournal:
+    """
+    MatchingEngine 용 append-only 바이너리 저널 + 주기적 북 스냅샷.
+    - 엔진은 주문 적재/체결/취소/리셋 이벤트를 append 하고 사이클의 DB commit 이 끝난 뒤 flush()
+      (append 는 메모리에만 쌓이고 flush 때 파일에 쓴다 → 롤백된 사이클은 discard() 로 버림)
+    - snapshot_every 이벤트마다 전체 북을 압축 스냅샷으로 저장 (tmp → rename)
+    - recover(): 마지막 스냅샷 로드 후 그 이후 저널 꼬리만 재생
+    → 재시작 비용이 주문 이력 전체가 아니라 '스냅샷 크기 + 꼬리' 에 비례
+    """
+
+    def __init__(self, directory: Optional[str] = None, snapshot_every: int = 10000, fsync: bool = False):
+        self.directory = directory or os.getenv("MATCHING_JOURNAL_DIR", "./matching_journal")
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.journal_path = os.path.join(self.directory, "journal.bin")
+        self.snapshot_path = os.path.join(self.directory, "snapshot.bin")
+
+        self._fp = open(self.journal_path, "ab")
+        self._pending: list = []
+        self._events_since_snapshot = 0
+
+    # -----------------------------------------
+    # append
+    # -----------------------------------------
+    def _append(self, kind: bytes, symbol: str, body: bytes = b""):
+        sym = symbol.encode()
+        self._pending.append(HEAD.pack(kind, len(sym)) + sym + body)
+
+    def log_order(self, symbol: str, order: BookOrder):
+        """북에 들어가는 시점의 주문 (체결 전 잔량 기준)"""
+        self._append(T_ORDER, symbol, _pack_order(order))
+
+    def log_fill(self, symbol: str, buy: BookOrder, sell: BookOrder, price: int, qty: int):
+        self._append(T_FILL, symbol, FILL.pack(buy.id, sell.id, price, qty))
+
+    def log_cancel(self, symbol: str, order_id: int):
+        self._append(T_CANCEL, symbol, CANCEL.pack(order_id))
+
+    def log_reset(self, symbol: str):
+        self._append(T_RESET, symbol)
+
+    def flush(self):
+        """쌓인 레코드를 파일에 기록 (엔진은 DB commit 성공 후에만 부른다)"""
+        if self._pending:
+            self._fp.write(b"".join(self._pending))
+            self._events_since_snapshot += len(self._pending)
+            self._pending.clear()
+        self._fp.flush()
+        if self.fsync:
+            os.fsync(self._fp.fileno())
+
+    def discard(self):
+        """DB 반영에 실패한 사이클의 레코드 버림"""
+        self._pending.clear()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._fp.close()
+
+    # -----------------------------------------
+    # snapshot
+    # -----------------------------------------
+    def maybe_snapshot(self, books: Dict[str, OrderBook], last_order_ids: Dict[str, int]) -> bool:
+        if self._events_since_snapshot < self.snapshot_every:
+            return False
+        self.snapshot(books, last_order_ids)
+        return True
+
+    def snapshot(self, books: Dict[str, OrderBook], last_order_ids: Dict[str, int]):
+        self.flush()
+        offset = self._fp.tell()
+
+        symbols = sorted(set(books) | set(last_order_ids))
+        parts = [SNAP_HEAD.pack(SNAP_MAGIC, offset, len(symbols))]
+        for symbol in symbols:
+            book = books.get(symbol)
+            orders = list(book.resting_orders()) if book else []
+            sym = symbol.encode()
+            parts.append(bytes([len(sym)]) + sym)
+            parts.append(SNAP_SYMBOL.pack(last_order_ids.get(symbol, 0), len(orders)))
+            parts.extend(_pack_order(od) for od in orders)
+
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(parts))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+        self._events_since_snapshot = 0
+        print(f"[MatchingJournal] snapshot symbols={len(symbols)} offset={offset}")
+
+    # -----------------------------------------
+    # recovery
+    # -----------------------------------------
+    def _load_snapshot(self) -> Tuple[Dict[str, OrderBook], Dict[str, int], int]:
+        books: Dict[str, OrderBook] = {}
+        last_ids: Dict[str, int] = {}
+        if not os.path.exists(self.snapshot_path):
+            return books, last_ids, 0
+
+        with open(self.snapshot_path, "rb") as f:
+            buf = f.read()
+
+        magic, offset, n_symbols = SNAP_HEAD.unpack_from(buf, 0)
+        if magic != SNAP_MAGIC:
+            raise ValueError(f"bad snapshot file: {self.snapshot_path}")
+
+        pos = SNAP_HEAD.size
+        for _ in range(n_symbols):
+            n = buf[pos]
+            symbol = buf[pos + 1:pos + 1 + n].decode()
+            pos += 1 + n
+            last_id, n_orders = SNAP_SYMBOL.unpack_from(buf, pos)
+            pos += SNAP_SYMBOL.size
+
+            book = OrderBook(symbol)
+            for _ in range(n_orders):
+                book.rest(_unpack_order(buf, pos))
+                pos += ORDER.size
+            books[symbol] = book
+            last_ids[symbol] = last_id
+
+        return books, last_ids, offset
+
+    def _iter_records(self, offset: int) -> Iterator[Tuple[bytes, str, memoryview]]:
+        with open(self.journal_path, "rb") as f:
+            f.seek(offset)
+            buf = memoryview(f.read())
+
+        sizes = {T_ORDER: ORDER.size, T_CANCEL: CANCEL.size, T_FILL: FILL.size, T_RESET: 0}
+        pos = 0
+        self._valid_end = offset
+        end = len(buf)
+        while pos + HEAD.size <= end:
+            kind, n = HEAD.unpack_from(buf, pos)
+            body_at = pos + HEAD.size + n
+            size = sizes.get(kind)
+            if size is None or body_at + size > end:
+                # 알 수 없는 타입 / 마지막 레코드가 잘린 경우 (쓰다 죽음) → 여기까지만
+                print(f"[MatchingJournal] truncated journal tail at {offset + pos}")
+                break
+            symbol = bytes(buf[pos + HEAD.size:body_at]).decode()
+            yield kind, symbol, buf[body_at:body_at + size]
+            pos = body_at + size
+            self._valid_end = offset + pos
+
+    def recover(self) -> Tuple[Dict[str, OrderBook], Dict[str, int]]:
+        """스냅샷 + 저널 꼬리 재생 → (books, last_order_ids)"""
+        books, last_ids, offset = self._load_snapshot()
+
+        def book_of(symbol: str) -> OrderBook:
+            book = books.get(symbol)
+            if book is None:
+                book = books[symbol] = OrderBook(symbol)
+            return book
+
+        replayed = 0
+        for kind, symbol, body in self._iter_records(offset):
+            replayed += 1
+            if kind == T_ORDER:
+                od = _unpack_order(body)
+                book_of(symbol).rest(od)
+                last_ids[symbol] = max(last_ids.get(symbol, 0), od.id)
+            elif kind == T_FILL:
+                buy_id, sell_id, _price, qty = FILL.unpack(body)
+                book = book_of(symbol)
+                book.reduce(buy_id, qty)
+                book.reduce(sell_id, qty)
+            elif kind == T_CANCEL:
+                (oid,) = CANCEL.unpack(body)
+                book_of(symbol).remove(oid)
+            elif kind == T_RESET:
+                books.pop(symbol, None)
+                last_ids.pop(symbol, None)
+
+        # 잘린 꼬리는 잘라내야 이후 append 가 깨진 레코드 뒤에 붙지 않는다
+        if os.path.getsize(self.journal_path) > self._valid_end:
+            os.truncate(self.journal_path, self._valid_end)
+
+        self._events_since_snapshot = replayed
+        print(f"[MatchingJournal] recovered symbols={len(books)} replayed={replayed}")
+        return books, last_ids
@@ -0,0 +1,260 @@
+# services/matching_shards.py
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+from services.matching_engine import MatchingEngine
+
+
+class OrderRouter:
+    """
+    심볼 → 샤드 번호 매핑.
+    - symbols 로 넘긴 심볼은 순서대로 전용 샤드를 받음 (샤드 수보다 많으면 라운드로빈)
+    - 그 외 심볼은 crc32 해시 버킷으로 배정 (프로세스가 달라도 결과가 같음)
+    """
+
+    def __init__(self, n_shards: int, symbols: Optional[Sequence[str]] = None):
+        if n_shards <= 0:
+            raise ValueError("n_shards must be > 0")
+        self.n_shards = n_shards
+        self._pinned: Dict[str, int] = {
+            s.upper(): i % n_shards for i, s in enumerate(symbols or [])
+        }
+
+    def shard_of(self, symbol: str) -> int:
+        symbol = symbol.upper()
+        shard = self._pinned.get(symbol)
+        if shard is None:
+            shard = zlib.crc32(symbol.encode()) % self.n_shards
+        return shard
+
+
+# 워커에서 호출을 받아 결과를 돌려주는 엔진 메서드 (("call", ...) 메시지)
+_CALLS = ("get_depth", "mark_cancelled", "symbols")
+
+
+def _shard_worker(shard_id: int, inbox, outbox, db_factory: Callable, journal_dir: Optional[str] = None):
+    """
+    샤드 하나의 루프. 자기 DB 커넥션과 MatchingEngine(=메모리 오더북),
+    journal_dir 을 주면 자기 저널(journal_dir/shard-N)을 따로 가진다.
+    메시지:
+        ("match", symbol)
+        ("order", symbol, row)
+        ("cancel", order_ids)               → 북에서만 제거 (DB 는 이미 취소됨)
+        ("call", req_id, method, args)      → outbox 로 (req_id, 결과)
+        None → 종료
+    """
+    journal = None
+    if journal_dir:
+        from services.matching_journal import MatchingJournal
+        journal = MatchingJournal(os.path.join(journal_dir, f"shard-{shard_id}"))
+    engine = MatchingEngine(db_factory(), journal=journal)
+    engine.recover()
+    print(f"[MatchingShard-{shard_id}] started")
+
+    while True:
+        msg = inbox.get()
+        if msg is None:
+            break
+
+        kind = msg[0]
+        try:
+            if kind == "match":
+                engine.match_symbol(msg[1])
+            elif kind == "order":
+                engine.submit_order(msg[1], msg[2])
+            elif kind == "cancel":
+                engine.cancel_orders(msg[1], persist=False)
+            elif kind == "call":
+                req_id, method, args = msg[1], msg[2], msg[3]
+                if method == "symbols":
+                    result = list(engine.books)
+                else:
+                    result = getattr(engine, method)(*args)
+                outbox.put((req_id, result))
+            else:
+                print(f"[MatchingShard-{shard_id}] unknown message:", kind)
+        except Exception as e:
+            print(f"[MatchingShard-{shard_id}] {kind} error:", e)
+            if kind == "call":
+                outbox.put((msg[1], None))
+
+    if journal is not None:
+        journal.close()
+    try:
+        engine.db.conn.close()
+    except Exception:
+        pass
+    print(f"[MatchingShard-{shard_id}] stopped")
+
+
+class ShardedMatchingEngine:
+    """
+    심볼별 샤드 매칭 엔진.
+    각 샤드는 전용 워커(스레드 또는 프로세스) + 전용 DB 커넥션 + 전용 오더북(+ 전용 저널)을 가지므로
+    BTCUSDT/ETHUSDT/SOLUSDT ... 가 하나의 커넥션에 줄 서지 않고 병렬로 매칭된다.
+    같은 심볼은 항상 같은 샤드로 가기 때문에 심볼 내 순서는 보장된다.
+
+    MatchingDaemon 이 쓰는 MatchingEngine 인터페이스(match_symbol / cancel_orders / books)와
+    get_depth 를 그대로 제공하므로 데몬에 MatchingEngine 대신 넘길 수 있다.
+    - match/order/cancel 은 담당 샤드 큐에 넣고 바로 돌아온다 (샤드 안에서는 도착 순서대로 처리)
+    - 취소는 주문 id 만으로는 샤드를 모르므로 모든 샤드에 보낸다 (없는 id 는 각 샤드에서 무시)
+    - get_depth / books 는 샤드에 물어보고 답을 기다린다
+
+    mode="process" 만 CPU 병렬 매칭이 된다. mode="thread" 는 GIL 때문에 매칭 자체는 한 번에
+    하나씩이고 DB 왕복 대기만 겹친다 (db_factory 를 pickle 할 수 없을 때/테스트용).
+
+    db_factory : 워커 안에서 호출되어 DBService 를 만드는 함수.
+                 mode="process" 이면 pickle 가능해야 함 (예: DBService 클래스 자체)
+    journal_dir: 주면 샤드마다 journal_dir/shard-N 저널을 쓰고 시작할 때 recover() —
+                 재시작해도 같은 심볼이 같은 샤드로 가도록 n_shards / symbols 는 바꾸지 않는다
+    """
+
+    def __init__(
+        self,
+        db_factory: Callable,
+        n_shards: int = 4,
+        symbols: Optional[Sequence[str]] = None,
+        mode: str = "thread",     # thread or process
+        journal_dir: Optional[str] = None,
+        call_timeout: float = 2.0,
+    ):
+        self.db_factory = db_factory
+        self.router = OrderRouter(n_shards, symbols)
+        self.mode = mode.lower()
+        if self.mode not in ("thread", "process"):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.journal_dir = journal_dir
+        self.call_timeout = call_timeout
+
+        self._inboxes: List = []
+        self._outboxes: List = []
+        self._locks: List[threading.Lock] = []
+        self._workers: List = []
+        self._req_id = itertools.count(1)
+
+    @property
+    def n_shards(self) -> int:
+        return self.router.n_shards
+
+    # -----------------------------------------
+    # 수명 관리
+    # -----------------------------------------
+    def start(self):
+        if self._workers:
+            return
+
+        for shard_id in range(self.n_shards):
+            if self.mode == "process":
+                inbox, outbox = mp.Queue(), mp.Queue()
+                worker = mp.Process(
+                    target=_shard_worker,
+                    args=(shard_id, inbox, outbox, self.db_factory, self.journal_dir),
+                    name=f"MatchingShard-{shard_id}",
+                    daemon=True,
+                )
+            else:
+                inbox, outbox = queue.Queue(), queue.Queue()
+                worker = threading.Thread(
+                    target=_shard_worker,
+                    args=(shard_id, inbox, outbox, self.db_factory, self.journal_dir),
+                    name=f"MatchingShard-{shard_id}",
+                    daemon=True,
+                )
+            worker.start()
+            self._inboxes.append(inbox)
+            self._outboxes.append(outbox)
+            self._locks.append(threading.Lock())
+            self._workers.append(worker)
+
+    def stop(self, timeout: float = 5.0):
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        self._inboxes = []
+        self._outboxes = []
+        self._locks = []
+        self._workers = []
+
+    # -----------------------------------------
+    # 라우팅
+    # -----------------------------------------
+    def _inbox_for(self, symbol: str):
+        if not self._inboxes:
+            raise RuntimeError("ShardedMatchingEngine is not started")
+        return self._inboxes[self.router.shard_of(symbol)]
+
+    def _call(self, shard: int, method: str, *args):
+        """샤드 워커에서 engine.method(*args) 를 실행하고 결과를 기다린다 (시간 초과면 None)"""
+        if not self._inboxes:
+            raise RuntimeError("ShardedMatchingEngine is not started")
+        if method not in _CALLS:
+            raise ValueError(f"Unknown call: {method}")
+        req_id = next(self._req_id)
+        with self._locks[shard]:
+            self._inboxes[shard].put(("call", req_id, method, args))
+            deadline = time.monotonic() + self.call_timeout
+            while True:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    print(f"[ShardedMatchingEngine] shard {shard} {method} timed out")
+                    return None
+                try:
+                    got_id, result = self._outboxes[shard].get(timeout=left)
+                except queue.Empty:
+                    continue
+                if got_id == req_id:   # 앞서 시간 초과된 요청의 늦은 답은 버린다
+                    return result
+
+    def submit_order(self, symbol: str, row: dict):
+        """신규 주문을 담당 샤드로 보내 도착 즉시 매칭"""
+        self._inbox_for(symbol).put(("order", symbol.upper(), row))
+
+    def match_symbol(self, symbol: str):
+        """담당 샤드에 해당 심볼 매칭 요청 (비동기)"""
+        self._inbox_for(symbol).put(("match", symbol.upper()))
+
+    def match_symbols(self, symbols: Sequence[str]):
+        for s in symbols:
+            self.match_symbol(s)
+
+    def cancel_orders(self, order_ids, persist: bool = True) -> list:
+        """
+        주문 일괄 취소.
+        - persist=True : 샤드 0 의 커넥션으로 DB 를 한 번 UPDATE 하고, 실제로 취소된 id 만 전 샤드 북에서 제거
+        - persist=False: DB 는 이미 취소됨 (NOTIFY 경로) → 전 샤드 북에서만 제거
+        북 제거는 비동기 (각 샤드에서 앞서 들어온 매칭 뒤에 처리). 반환: 취소 대상 id 목록
+        """
+        if not self._inboxes:
+            raise RuntimeError("ShardedMatchingEngine is not started")
+        ids = list(dict.fromkeys(int(i) for i in order_ids))
+        if not ids:
+            return []
+        if persist:
+            ids = self._call(0, "mark_cancelled", ids) or []
+            if not ids:
+                return []
+        for inbox in self._inboxes:
+            inbox.put(("cancel", ids))
+        return ids
+
+    def get_depth(self, symbol: str, levels: int = 10) -> dict:
+        """담당 샤드의 메모리 북 호가 (MatchingEngine.get_depth 와 같은 모양)"""
+        symbol = symbol.upper()
+        depth = self._call(self.router.shard_of(symbol), "get_depth", symbol, levels)
+        return depth or {"symbol": symbol, "seq": 0, "bids": [], "asks": []}
+
+    @property
+    def books(self) -> Dict[str, int]:
+        """북이 올라와 있는 심볼 → 샤드 번호 (실제 북은 각 워커에 있으므로 심볼 목록만)"""
+        out: Dict[str, int] = {}
+        for shard in range(len(self._inboxes)):
+            for symbol in self._call(shard, "symbols") or []:
+                out[symbol] = shard
+        return out
@@ -0,0 +1,285 @@
+# services/order_book.py
+from __future__ import annotations
+
+import bisect
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class BookOrder:
+    """오더북에 올라가 있는(또는 막 들어온) 주문 한 건 (가격/수량은 InstrumentSpec 기준 정수)"""
+    id: int                         # orders.id
+    side: str                       # BUY / SELL
+    price: int                      # 지정가 (틱)
+    remaining: int                  # 미체결 잔량 (로트)
+    account_id: Optional[int] = None
+    created_at: Any = None          # DB created_at (정렬/표시용)
+
+
+# (buy, sell, price_ticks, qty_lots) — 기존 match_symbol 의 trades 튜플과 같은 모양
+Trade = Tuple[BookOrder, BookOrder, int, int]
+
+# (price_ticks, qty_lots, order_count)
+DepthLevel = Tuple[int, int, int]
+
+
+class PriceLevel:
+    """
+    가격 하나에 대한 FIFO 큐 (order_id → BookOrder, 삽입 순서 = 시간 우선)
+    qty(잔량 합계)는 적재/체결/취소 때마다 증분 갱신 → 호가 집계에 주문 순회 불필요
+    """
+    __slots__ = ("price", "orders", "qty")
+
+    def __init__(self, price: int):
+        self.price = price
+        self.orders: "OrderedDict[int, BookOrder]" = OrderedDict()
+        self.qty = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.orders)
+
+    def head(self) -> Optional[BookOrder]:
+        for od in self.orders.values():
+            return od
+        return None
+
+    def __len__(self):
+        return len(self.orders)
+
+
+class BookSide:
+    """
+    한쪽 호가(BUY 또는 SELL).
+    가격 키를 오름차순 리스트로 들고 있고 최우선 호가가 항상 리스트 끝에 오도록
+    BUY 는 price, SELL 은 -price 를 키로 쓴다. → best 조회/제거가 O(1), 신규 레벨은 bisect.
+    """
+
+    def __init__(self, side: str):
+        self.side = side
+        self._sign = 1 if side == "BUY" else -1
+        self._keys: List[int] = []
+        self._levels: Dict[int, PriceLevel] = {}  # key(±price) → PriceLevel
+
+    def best(self) -> Optional[PriceLevel]:
+        if not self._keys:
+            return None
+        return self._levels[self._keys[-1]]
+
+    def level(self, price: int) -> Optional[PriceLevel]:
+        return self._levels.get(self._sign * price)
+
+    def get_or_create(self, price: int) -> PriceLevel:
+        key = self._sign * price
+        lv = self._levels.get(key)
+        if lv is None:
+            lv = PriceLevel(price)
+            self._levels[key] = lv
+            bisect.insort(self._keys, key)
+        return lv
+
+    def remove_level(self, price: int):
+        key = self._sign * price
+        if self._levels.pop(key, None) is None:
+            return
+        if self._keys and self._keys[-1] == key:
+            self._keys.pop()
+        else:
+            i = bisect.bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+    def levels(self):
+        """최우선 호가부터 순회"""
+        for key in reversed(self._keys):
+            yield self._levels[key]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class OrderBook:
+    """
+    심볼 하나에 대한 메모리 상주 가격-시간 우선 오더북.
+    - add(): 신규 주문을 도착 즉시 매칭하고 잔량은 레벨 큐에 적재
+    - rest(): 매칭 없이 적재 (DB 부트스트랩용)
+    - match(): 교차된 상태의 북을 정리 (부트스트랩 직후 등)
+    - depth(): 레벨별 집계(qty, cnt) 상위 N 개 — O(N), seq 는 변경마다 증가
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol.upper()
+        self.bids = BookSide("BUY")
+        self.asks = BookSide("SELL")
+        self._index: Dict[int, BookOrder] = {}
+        self.seq = 0
+
+    # -----------------------------------------
+    # 조회
+    # -----------------------------------------
+    def get(self, order_id: int) -> Optional[BookOrder]:
+        return self._index.get(order_id)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def best_bid(self) -> Optional[int]:
+        lv = self.bids.best()
+        return lv.price if lv else None
+
+    def best_ask(self) -> Optional[int]:
+        lv = self.asks.best()
+        return lv.price if lv else None
+
+    def _side(self, side: str) -> BookSide:
+        return self.bids if side == "BUY" else self.asks
+
+    def depth(self, levels: int = 10) -> Tuple[List[DepthLevel], List[DepthLevel]]:
+        """최우선 호가부터 levels 개 (price, qty, cnt). 적재 주문 수와 무관하게 O(levels)"""
+        bids = [(lv.price, lv.qty, lv.count) for lv in islice(self.bids.levels(), levels)]
+        asks = [(lv.price, lv.qty, lv.count) for lv in islice(self.asks.levels(), levels)]
+        return bids, asks
+
+    # -----------------------------------------
+    # 적재 / 매칭
+    # -----------------------------------------
+    def rest(self, order: BookOrder):
+        """매칭 없이 해당 가격 레벨 큐 맨 뒤에 적재"""
+        order.side = order.side.upper()
+        if order.remaining <= 0 or order.id in self._index:
+            return
+        lv = self._side(order.side).get_or_create(order.price)
+        lv.orders[order.id] = order
+        lv.qty += order.remaining
+        self._index[order.id] = order
+        self.seq += 1
+
+    def add(self, order: BookOrder) -> List[Trade]:
+        """신규 주문: 반대편 최우선 호가부터 체결 후 잔량 적재"""
+        order.side = order.side.upper()
+        if order.id in self._index:
+            return []
+
+        trades: List[Trade] = []
+        is_buy = order.side == "BUY"
+        opposite = self.asks if is_buy else self.bids
+
+        while order.remaining > 0:
+            lv = opposite.best()
+            if lv is None:
+                break
+            if is_buy and order.price < lv.price:
+                break
+            if not is_buy and order.price > lv.price:
+                break
+            self._fill_level(order, lv, opposite, trades)
+
+        self.rest(order)
+        return trades
+
+    def match(self) -> List[Trade]:
+        """양쪽 최우선 호가가 교차하는 동안 체결 (적재된 주문끼리)"""
+        trades: List[Trade] = []
+        while True:
+            bid_lv = self.bids.best()
+            ask_lv = self.asks.best()
+            if bid_lv is None or ask_lv is None or bid_lv.price < ask_lv.price:
+                break
+
+            # 먼저 들어온 쪽을 maker 로 본다 (나중에 들어온 쪽이 taker 로 상대 레벨을 먹는다)
+            bid, ask = bid_lv.head(), ask_lv.head()
+            if _arrival_key(bid) <= _arrival_key(ask):
+                taker, taker_lv, lv, side = ask, ask_lv, bid_lv, self.bids
+            else:
+                taker, taker_lv, lv, side = bid, bid_lv, ask_lv, self.asks
+
+            # taker 도 북에 적재돼 있으므로 자기 레벨 집계도 같이 줄인다
+            taker_lv.qty -= self._fill_one(taker, lv, side, trades)
+            if taker.remaining <= 0:
+                self._drop(taker)
+        return trades
+
+    def remove(self, order_id: int) -> Optional[BookOrder]:
+        """주문을 북에서 제거 (취소/복구용)"""
+        od = self._index.get(order_id)
+        if od is not None:
+            self._drop(od)
+        return od
+
+    def remove_many(self, order_ids) -> List[BookOrder]:
+        """일괄 취소: id 마다 O(1) (인덱스 → 레벨 → OrderedDict.pop)"""
+        removed = []
+        for oid in order_ids:
+            od = self.remove(oid)
+            if od is not None:
+                removed.append(od)
+        return removed
+
+    def reduce(self, order_id: int, qty: int) -> Optional[BookOrder]:
+        """잔량만 qty 만큼 차감 (저널 재생용). 0 이 되면 제거"""
+        od = self._index.get(order_id)
+        if od is None:
+            return None
+        self._side(od.side).level(od.price).qty -= min(qty, od.remaining)
+        od.remaining -= qty
+        self.seq += 1
+        if od.remaining <= 0:
+            self._drop(od)
+        return od
+
+    def resting_orders(self):
+        """매수 → 매도, 가격 우선 → 시간 우선 순서로 적재된 주문 순회 (스냅샷용)"""
+        for side in (self.bids, self.asks):
+            for lv in side.levels():
+                yield from lv.orders.values()
+
+    # -----------------------------------------
+    # 내부
+    # -----------------------------------------
+    def _fill_level(self, taker: BookOrder, lv: PriceLevel, side: BookSide, trades: List[Trade]):
+        while taker.remaining > 0 and lv.orders:
+            self._fill_one(taker, lv, side, trades)
+
+    def _fill_one(self, taker: BookOrder, lv: PriceLevel, side: BookSide, trades: List[Trade]) -> int:
+        maker = lv.head()
+        qty = min(taker.remaining, maker.remaining)
+
+        taker.remaining -= qty
+        maker.remaining -= qty
+        lv.qty -= qty
+        self.seq += 1
+
+        buy, sell = (taker, maker) if taker.side == "BUY" else (maker, taker)
+        # 체결 가격(양쪽 가격 평균). 평균이 틱 사이에 떨어지면 maker 쪽 틱으로 붙인다
+        twice = buy.price + sell.price
+        price = twice // 2
+        if twice % 2 and maker is buy:
+            price += 1
+        trades.append((buy, sell, price, qty))
+
+        if maker.remaining <= 0:
+            self._drop(maker)
+        return qty
+
+    def _drop(self, order: BookOrder):
+        self._index.pop(order.id, None)
+        side = self._side(order.side)
+        lv = side.level(order.price)
+        if lv is None:
+            return
+        if lv.orders.pop(order.id, None) is None:
+            return
+        lv.qty -= max(order.remaining, 0)
+        self.seq += 1
+        if not lv.orders:
+            side.remove_level(order.price)
+
+
+def _arrival_key(od: BookOrder):
+    return (od.created_at is None, od.created_at or 0, od.id)
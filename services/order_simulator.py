@@ -1,193 +1,397 @@
-from typing import List, Tuple
-from models.depth import DepthSnapshot
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+from models.depth import DepthSnapshot, DepthBook, DepthSide
 from models.order import Side, Fill
 from models.working_order import WorkingOrder
 
+_PX_EPS = 1e-9
+
+
+def _px_key(price) -> float:
+    """float 가격 비교용 키 (depth 가격과 전략이 계산한 지정가를 같은 레벨로 묶기 위함)"""
+    return round(float(price), 9)
+
+
+class QueueLevel:
+    """
+    내 미체결 주문이 서 있는 가격 레벨 하나.
+    - orders: 접수 순 (취소/체결된 주문은 지나가면서 정리)
+    - last_qty: 마지막으로 본 시장 잔량. 모든 queue_ahead <= last_qty 를 유지하므로
+      잔량이 줄어든 틱에서만 주문들을 건드린다.
+    """
+    __slots__ = ("price", "orders", "last_qty")
+
+    def __init__(self, price: float, last_qty: float = 0.0):
+        self.price = price
+        self.orders: List[WorkingOrder] = []
+        self.last_qty = last_qty
+
+    def compact(self) -> bool:
+        """끝난 주문 정리. 반환: 레벨이 비었는지"""
+        if any(od.remaining <= 0 for od in self.orders):
+            self.orders = [od for od in self.orders if od.remaining > 0]
+        return not self.orders
+
+    def observe(self, qty: float):
+        """depth 에서 본 레벨 잔량. 줄었으면 (취소든 체결이든) 내 앞 대기량도 그만큼까지만 남는다"""
+        if qty < self.last_qty:
+            for od in self.orders:
+                if od.queue_ahead > qty:
+                    od.queue_ahead = qty
+        self.last_qty = qty
+
+    def trade(self, qty: float, through: bool) -> List[Tuple[WorkingOrder, float]]:
+        """
+        이 레벨에서 qty 만큼 체결이 찍힘 → 대기열 소진 후 넘치는 만큼 내 주문 체결.
+        through=True 면 가격이 이 레벨을 뚫고 지나간 것이므로 전량 체결.
+        반환: [(order, fill_qty)]
+        """
+        out = []
+        mine = 0.0  # 앞선 내 주문이 이미 받아간 수량
+        for od in self.orders:
+            if od.remaining <= 0:
+                continue
+            if through:
+                q = od.remaining
+                od.queue_ahead = 0
+            else:
+                left = qty - od.queue_ahead - mine
+                q = min(od.remaining, left) if left > 0 else 0
+                od.queue_ahead = max(0.0, od.queue_ahead - qty)
+            if q > 0:
+                od.remaining -= q
+                mine += q
+                out.append((od, q))
+        self.last_qty = max(0.0, self.last_qty - (qty - mine))
+        return out
+
+
 class OrderSimulator:
-    """시장가/지정가 체결 로직 + 미체결(대기) 관리."""
+    """
+    시장가/지정가 체결 로직 + 미체결(대기) 관리.
+    미체결은 BUY/SELL 별 가격 우선 힙으로 들고 있어서 depth 틱마다
+    최우선 호가에 교차된 주문만 꺼내 본다 (틱 비용 ∝ 체결 수).
+
+    호가에 닿기만 한 미체결은 바로 체결되지 않는다: 주문마다 같은 가격 레벨의
+    queue_ahead(내 앞 시장 잔량)를 들고 있다가 depth 잔량 감소/체결(trade)로 깎고,
+    대기열이 다 소진된 뒤 들어오는 체결량만큼만 체결한다.
+    """
     def __init__(self):
-        self.working: List[WorkingOrder] = []
+        # BUY: (-price, id, order) → 가장 높은 매수 지정가가 top
+        # SELL: (price, id, order) → 가장 낮은 매도 지정가가 top
+        self._buy_heap: List[Tuple[float, int, WorkingOrder]] = []
+        self._sell_heap: List[Tuple[float, int, WorkingOrder]] = []
+        self._working_by_id: Dict[int, WorkingOrder] = {}
+        self._next_id = 1
+        # 가격 키 → QueueLevel (내 주문이 있는 레벨만)
+        self._buy_levels: Dict[float, QueueLevel] = {}
+        self._sell_levels: Dict[float, QueueLevel] = {}
+
+    @property
+    def working(self) -> List[WorkingOrder]:
+        """현재 미체결 주문 목록 (접수 순)"""
+        return sorted(self._working_by_id.values(), key=lambda od: od.id)
+
+    def cancel_working(self, order_id: int) -> bool:
+        """미체결 취소 (힙에서는 다음에 top 으로 올라올 때 지운다)"""
+        od = self._working_by_id.pop(order_id, None)
+        if od is None:
+            return False
+        od.remaining = 0
+        self._unlevel(od)
+        return True
+
+    def _unlevel(self, od: WorkingOrder):
+        """끝난 주문을 대기열 레벨에서 뺀다 (레벨이 비면 레벨째 삭제)"""
+        levels = self._buy_levels if od.side == "BUY" else self._sell_levels
+        key = _px_key(od.price)
+        lvl = levels.get(key)
+        if lvl is not None and lvl.compact():
+            del levels[key]
+
+    def _queue(self, side: str, price: float, qty: int, remain: int, ahead: float = 0.0) -> WorkingOrder:
+        """미체결 등록. ahead 는 내 쪽 호가(BUY 면 bids)의 같은 가격 잔량 — 내 앞 대기열"""
+        key = _px_key(price)
+        wo = WorkingOrder(id=self._next_id, side=side, price=price, qty=qty, remaining=remain,
+                          queue_ahead=ahead)
+        self._next_id += 1
+        self._working_by_id[wo.id] = wo
+        if side == "BUY":
+            heapq.heappush(self._buy_heap, (-price, wo.id, wo))
+            levels = self._buy_levels
+        else:
+            heapq.heappush(self._sell_heap, (price, wo.id, wo))
+            levels = self._sell_levels
+
+        lvl = levels.get(key)
+        if lvl is None:
+            lvl = levels[key] = QueueLevel(price, ahead)
+        else:
+            lvl.last_qty = max(lvl.last_qty, ahead)
+        lvl.orders.append(wo)
+        return wo
+
+    @staticmethod
+    def _visible_qty(book, key: float) -> float:
+        for px, q, _ in book:
+            if _px_key(px) == key:
+                return float(q)
+        return 0.0
 
     # --- 시장가 ---
+    @staticmethod
+    def _sweep_book(side: str, qty: int, depth: DepthBook) -> Tuple[List[Fill], DepthBook]:
+        """DepthBook(컬럼형)은 cumsum/searchsorted 로 한 번에 스윕 — 체결된 레벨만 Fill 생성"""
+        px, take, new_depth = depth.sweep(side, qty)
+        fills = [Fill(side, p, q) for p, q in zip(px.tolist(), take.tolist())]
+        return (fills, new_depth)
+
+    @staticmethod
+    def _book_fills(side: str, px, take, symbol) -> List[Fill]:
+        return [Fill(side, p, q, symbol=symbol) for p, q in zip(px.tolist(), take.tolist())]
+
     def sell_market(self, qty: int, depth: DepthSnapshot) -> Tuple[List[Fill], DepthSnapshot]:
-        bids = list(depth.bids)
-        asks = list(depth.asks)
-        remaining = qty
-        fills: List[Fill] = []
-        new_bids = []
-        for px, sz, lv in bids:
-            if remaining <= 0:
-                new_bids.append((px, sz, lv)); continue
-            take = min(sz, remaining)
-            if take > 0:
-                fills.append(Fill("SELL", px, take))
-            remaining -= take
-            new_bids.append((px, sz - take, lv))
-        new_mid = DepthSnapshot.calc_mid(new_bids, asks) or depth.mid
-        return (fills, DepthSnapshot(new_bids, asks, new_mid))
+        if isinstance(depth, DepthBook):
+            return self._sweep_book("SELL", qty, depth)
+        return self._market("SELL", qty, depth)
 
     def buy_market(self, qty: int, depth: DepthSnapshot) -> Tuple[List[Fill], DepthSnapshot]:
-        bids = list(depth.bids)
-        asks = list(depth.asks)
-        remaining = qty
-        fills: List[Fill] = []
-        new_asks = []
-        for px, sz, lv in asks:
-            if remaining <= 0:
-                new_asks.append((px, sz, lv)); continue
-            take = min(sz, remaining)
-            if take > 0:
-                fills.append(Fill("BUY", px, take))
-            remaining -= take
-            new_asks.append((px, sz - take, lv))
-        new_mid = DepthSnapshot.calc_mid(bids, new_asks) or depth.mid
-        return (fills, DepthSnapshot(bids, new_asks, new_mid))
+        if isinstance(depth, DepthBook):
+            return self._sweep_book("BUY", qty, depth)
+        return self._market("BUY", qty, depth)
 
-    # --- 지정가(SELL) ---
-    def sell_limit_now_or_queue(self, price: float, qty: int, depth) -> tuple[list[Fill], object, int]:
+    def _market(self, side: str, qty: int, depth) -> Tuple[List[Fill], DepthSnapshot]:
         """
-        지정가 매도:
-        - 호가창(depth)에서 매수호가와 맞춰 즉시 체결할 수 있는 만큼 체결
-        - 남는 잔량이 있으면 WorkingOrder 로 self.working 에 등록
+        시장가: 반대편 호가를 최우선부터 소진.
+        호가는 DepthSide(copy-on-write) 라서 건드린 레벨만 새로 만들고 나머지/반대편은 공유.
+        """
+        is_buy = side == "BUY"
+        book = DepthSide.of(depth.asks if is_buy else depth.bids)
+        taken, new_book, _ = book.take(qty)
+        fills = [Fill(side, px, q) for px, q in taken]
+        return (fills, self._with_side(depth, is_buy, new_book))
+
+    @staticmethod
+    def _with_side(depth, is_buy: bool, new_book):
+        """한쪽 호가만 바뀐 새 스냅샷 (반대편은 부모 객체 그대로 공유)"""
+        if new_book is (depth.asks if is_buy else depth.bids):
+            return depth
+        if is_buy:
+            bids, asks = depth.bids, new_book
+        else:
+            bids, asks = new_book, depth.asks
+        new_mid = DepthSnapshot.calc_mid(bids, asks) or depth.mid
+        return DepthSnapshot(bids=bids, asks=asks, mid=new_mid, symbol=getattr(depth, "symbol", None))
+
+    # --- 지정가 공통 ---
+    def _limit_now_or_queue(self, side: str, price: float, qty: int, depth) -> tuple[list[Fill], object, int]:
+        """
+        지정가 주문:
+        - BUY 는 매도호가(asks), SELL 은 매수호가(bids) 중 지정가에 닿는 만큼 즉시 체결
+        - 남는 잔량이 있으면 WorkingOrder 로 미체결 등록
         반환: (fills, new_depth, remain)
         """
-        fills: list[Fill] = []
-        remain = qty
-
-        # 1) depth 에서 즉시 체결 가능한 부분 매칭 (예: 최우선 bid부터 탐색)
-        bids = list(depth.bids)  # [(price, qty, level), ...] 가정
-        new_bids = []
-        for bp, bqty, level in bids:
-            if remain <= 0:
-                new_bids.append((bp, bqty, level))
-                continue
+        if isinstance(depth, DepthBook):
+            return self._limit_book(side, price, qty, depth)
 
-            if bp >= price:
-                # 이 가격 이상이면 체결
-                trade_qty = min(remain, bqty)
-                fills.append(
-                    Fill(
-                        side=Side.SELL,
-                        price=bp,
-                        qty=trade_qty,
-                        symbol=getattr(depth, "symbol", None),
-                    )
-                )
-                remain -= trade_qty
-                rest = bqty - trade_qty
-                if rest > 0:
-                    new_bids.append((bp, rest, level))
-            else:
-                new_bids.append((bp, bqty, level))
+        symbol = getattr(depth, "symbol", None)
+        is_buy = side == "BUY"
 
-        # asks 는 그대로 사용 (매도니까 매수호가만 소진)
-        new_asks = list(depth.asks)
+        # 1) depth 에서 즉시 체결 가능한 부분 매칭 (최우선 호가부터)
+        book = DepthSide.of(depth.asks if is_buy else depth.bids)
+        crosses = (lambda px: px <= price) if is_buy else (lambda px: px >= price)
+        taken, new_book, remain = book.take(qty, crosses)
+        fills = [Fill(side=side, price=px, qty=q, symbol=symbol) for px, q in taken]
 
         # 2) 남은 잔량을 WorkingOrder 로 미체결 등록
         if remain > 0:
-            order_id = len(self.working) + 1  # 간단한 내부 ID
-            wo = WorkingOrder(
-                id=order_id,
-                side=Side.SELL,
-                price=price,
-                qty=qty,
-                remaining=remain,
-            )
-            self.working.append(wo)
-
-        # 3) new_depth 구성 (DepthSnapshot 을 다시 만들어 돌려줌)
-        new_mid = depth.mid  # 필요하면 재계산
-        new_depth = type(depth)(bids=new_bids, asks=new_asks, mid=new_mid)
-        setattr(new_depth, "symbol", getattr(depth, "symbol", None))
+            ahead = self._visible_qty(depth.bids if is_buy else depth.asks, _px_key(price))
+            self._queue(side, price, qty, remain, ahead)
 
+        # 3) new_depth 구성 (반대편은 공유)
+        return fills, self._with_side(depth, is_buy, new_book), remain
+
+    def _limit_book(self, side: str, price: float, qty: int, depth: DepthBook) -> tuple[list[Fill], DepthBook, int]:
+        """DepthBook 지정가: 닿는 레벨 수는 searchsorted, 소진은 그 안에서 cumsum (레벨 리스트를 만들지 않는다)"""
+        px, take, new_depth, remain = depth.take(side, qty, price)
+        fills = self._book_fills(side, px, take, depth.symbol)
+        if remain > 0:
+            ahead = depth.visible_qty(side == "BUY", [price], _PX_EPS)[0] or 0.0
+            self._queue(side, price, qty, remain, ahead)
         return fills, new_depth, remain
 
+    # --- 지정가(SELL) ---
+    def sell_limit_now_or_queue(self, price: float, qty: int, depth) -> tuple[list[Fill], object, int]:
+        """지정가 매도: 매수호가와 즉시 체결 후 잔량은 미체결 등록. 반환: (fills, new_depth, remain)"""
+        return self._limit_now_or_queue("SELL", price, qty, depth)
+
     # --- 지정가(BUY) ---
     def buy_limit_now_or_queue(self, price: float, qty: int, depth) -> tuple[list[Fill], object, int]:
+        """지정가 매수: 매도호가와 즉시 체결 후 잔량은 미체결 등록. 반환: (fills, new_depth, remain)"""
+        return self._limit_now_or_queue("BUY", price, qty, depth)
+
+    # --- 미체결 자동 매칭 (BUY/SELL 대칭) ---
+    def match_working_on_depth(self, depth: DepthSnapshot) -> Tuple[List[Fill], DepthSnapshot]:
+        if not self._working_by_id:
+            return ([], depth)
+        if isinstance(depth, DepthBook):
+            return self._match_working_book(depth)
+
+        symbol = getattr(depth, "symbol", None)
+        fills: List[Fill] = []
+
+        # SELL 미체결 ← 매수호가, BUY 미체결 ← 매도호가
+        new_bids = self._match_heap(self._sell_heap, "SELL", DepthSide.of(depth.bids), fills, symbol)
+        new_asks = self._match_heap(self._buy_heap, "BUY", DepthSide.of(depth.asks), fills, symbol)
+
+        # 내 쪽 호가 잔량 변화로 대기열 갱신 (BUY 미체결 ← bids, SELL 미체결 ← asks)
+        self._observe_levels(self._buy_levels, depth.bids, True)
+        self._observe_levels(self._sell_levels, depth.asks, False)
+
+        if not fills:
+            return (fills, depth)
+
+        new_mid = DepthSnapshot.calc_mid(new_bids, new_asks) or depth.mid
+        return (fills, DepthSnapshot(bids=new_bids, asks=new_asks, mid=new_mid, symbol=symbol))
+
+    def _match_heap(self, heap: list, side: str, book: DepthSide, fills: List[Fill], symbol) -> DepthSide:
         """
-        지정가 매도:
-        - 호가창(depth)에서 매수호가와 맞춰 즉시 체결할 수 있는 만큼 체결
-        - 남는 잔량이 있으면 WorkingOrder 로 self.working 에 등록
-        반환: (fills, new_depth, remain)
+        heap top(가장 공격적인 지정가)부터 book 최우선 호가와 교차하는 동안만 체결.
+        반환: 소진된 만큼 앞부분만 바뀐 새 DepthSide (나머지 레벨은 공유)
         """
-        fills: list[Fill] = []
-        remain = qty
-
-        # 1) depth 에서 즉시 체결 가능한 부분 매칭 (예: 최우선 bid부터 탐색)
-        bids = list(depth.bids)  # [(price, qty, level), ...] 가정
-        new_bids = []
-        for bp, bqty, level in bids:
-            if remain <= 0:
-                new_bids.append((bp, bqty, level))
+        is_buy = side == "BUY"
+
+        while heap:
+            od = heap[0][2]
+            if od.remaining <= 0:
+                # 취소/체결 완료분 정리
+                heapq.heappop(heap)
                 continue
 
-            if bp >= price:
-                # 이 가격 이상이면 체결
-                trade_qty = min(remain, bqty)
-                fills.append(
-                    Fill(
-                        side=Side.SELL,
-                        price=bp,
-                        qty=trade_qty,
-                        symbol=getattr(depth, "symbol", None),
-                    )
-                )
-                remain -= trade_qty
-                rest = bqty - trade_qty
-                if rest > 0:
-                    new_bids.append((bp, rest, level))
-            else:
-                new_bids.append((bp, bqty, level))
+            limit = od.price
+            crosses = (lambda px: px <= limit) if is_buy else (lambda px: px >= limit)
+            taken, book, od.remaining = book.take(od.remaining, crosses)
+            if not taken:
+                # 최우선 호가도 안 닿으면 뒤의 주문들은 더더욱 안 닿는다
+                break
+            for px, q in taken:
+                fills.append(Fill(side, px, q, symbol=symbol))
 
-        # asks 는 그대로 사용 (매도니까 매수호가만 소진)
-        new_asks = list(depth.asks)
+            if od.remaining > 0:
+                # 지정가까지의 호가를 다 먹고도 남음 → 다음 틱에서 다시
+                break
+            heapq.heappop(heap)
+            self._working_by_id.pop(od.id, None)
+            self._unlevel(od)
 
-        # 2) 남은 잔량을 WorkingOrder 로 미체결 등록
-        if remain > 0:
-            order_id = len(self.working) + 1  # 간단한 내부 ID
-            wo = WorkingOrder(
-                id=order_id,
-                side=Side.SELL,
-                price=price,
-                qty=qty,
-                remaining=remain,
-            )
-            self.working.append(wo)
-
-        # 3) new_depth 구성 (DepthSnapshot 을 다시 만들어 돌려줌)
-        new_mid = depth.mid  # 필요하면 재계산
-        new_depth = type(depth)(bids=new_bids, asks=new_asks, mid=new_mid)
-        setattr(new_depth, "symbol", getattr(depth, "symbol", None))
+        return book
 
-        return fills, new_depth, remain
+    def _match_working_book(self, depth: DepthBook) -> Tuple[List[Fill], DepthBook]:
+        """DepthBook 판 match_working_on_depth: 주문마다 depth.take(limit) — 배열만 다룬다"""
+        fills: List[Fill] = []
+        book = self._match_heap_book(self._sell_heap, "SELL", depth, fills)
+        book = self._match_heap_book(self._buy_heap, "BUY", book, fills)
 
-    # --- 미체결 자동 매칭 (현재 SELL만) ---
-    def match_working_on_depth(self, depth: DepthSnapshot) -> Tuple[List[Fill], DepthSnapshot]:
-        if not self.working:
-            return ([], depth)
+        self._observe_book(self._buy_levels, depth, True)
+        self._observe_book(self._sell_levels, depth, False)
+        return (fills, book if fills else depth)
+
+    def _match_heap_book(self, heap: list, side: str, book: DepthBook, fills: List[Fill]) -> DepthBook:
+        """_match_heap 과 같은 순서/중단 조건, 소진은 DepthBook.take"""
+        while heap:
+            od = heap[0][2]
+            if od.remaining <= 0:
+                heapq.heappop(heap)
+                continue
+
+            px, take, book, od.remaining = book.take(side, od.remaining, od.price)
+            if not take.size:
+                break
+            fills.extend(self._book_fills(side, px, take, book.symbol))
+
+            if od.remaining > 0:
+                break
+            heapq.heappop(heap)
+            self._working_by_id.pop(od.id, None)
+            self._unlevel(od)
+
+        return book
+
+    # --- 대기열(queue position) ---
+    @staticmethod
+    def _observe_levels(levels: Dict[float, QueueLevel], book, is_buy: bool):
+        """
+        내 주문이 있는 레벨만 depth 잔량과 맞춘다.
+        호가는 최우선부터 내 가장 뒤쪽 가격까지만 훑고, 잔량이 줄어든 레벨만 주문을 건드린다.
+        """
+        if not levels:
+            return
 
-        bids = list(depth.bids)
-        asks = list(depth.asks)
+        # 내 레벨(최우선 → 깊은 쪽)과 호가를 나란히 한 번 훑는다
+        keys = sorted(levels, reverse=is_buy)
+        sign = 1 if is_buy else -1
+        j, n = 0, len(keys)
+        seen = False
+        for px, q, _ in book:
+            seen = True
+            spx = sign * px
+            # 호가에 없는 (이 가격보다 좋은) 내 레벨 → 앞에 아무도 없음
+            while j < n and sign * keys[j] > spx + _PX_EPS:
+                levels[keys[j]].observe(0.0)
+                j += 1
+            if j == n:
+                return
+            if abs(keys[j] - px) <= _PX_EPS:
+                levels[keys[j]].observe(float(q))
+                j += 1
+        if not seen:
+            for key in keys:
+                levels[key].observe(0.0)
+        # 남은 레벨은 보이는 호가보다 깊은 곳 → 판단 보류
+
+    @staticmethod
+    def _observe_book(levels: Dict[float, QueueLevel], depth: DepthBook, is_buy: bool):
+        """_observe_levels 의 DepthBook 판: 내 레벨 가격만 searchsorted 로 찾아 잔량을 맞춘다"""
+        if not levels:
+            return
+        keys = list(levels)
+        for key, q in zip(keys, depth.visible_qty(is_buy, keys, _PX_EPS)):
+            if q is not None:   # None = 보이는 호가보다 깊음 → 판단 보류
+                levels[key].observe(q)
+
+    def match_working_on_trade(self, trade: Dict[str, Any]) -> List[Fill]:
+        """
+        시장 체결 1건 → 대기열 소진 후 내 미체결 체결.
+        - 매도 주도(side=SELL) 체결은 BUY 미체결, 매수 주도는 SELL 미체결에 영향 (side 없으면 양쪽)
+        - 체결가와 같은 레벨: 대기열을 깎고 넘치는 수량만 체결
+        - 체결가보다 유리한 레벨 (BUY 는 더 높은 가격): 가격이 뚫고 지나갔으므로 전량 체결
+        체결가는 내 지정가 (패시브 체결).
+        """
+        if not self._working_by_id:
+            return []
+
+        price = _px_key(trade["price"])
+        qty = float(trade["qty"])
+        aggressor = str(trade.get("side") or "").upper()
+        symbol = trade.get("symbol")
         fills: List[Fill] = []
-        remains: List[WorkingOrder] = []
-
-        for od in self.working:
-            if od.side == "SELL":
-                need = od.qty
-                for i, (bp, bs, lv) in enumerate(bids):
-                    if need <= 0: break
-                    if bp < od.price: break
-                    take = min(bs, need)
-                    if take > 0:
-                        fills.append(Fill("SELL", bp, take))
-                        need -= take
-                        bids[i] = (bp, bs - take, lv)
-                if need > 0:
-                    od.qty = need
-                    remains.append(od)
-            else:
-                remains.append(od)  # BUY 지정가 대칭 로직 필요시 추가
 
-        self.working = remains
-        new_mid = DepthSnapshot.calc_mid(bids, asks) or depth.mid
-        return (fills, DepthSnapshot(bids, asks, new_mid))
+        if aggressor != "BUY":
+            self._trade_levels(self._buy_levels, "BUY", price, qty, fills, symbol)
+        if aggressor != "SELL":
+            self._trade_levels(self._sell_levels, "SELL", price, qty, fills, symbol)
+        return fills
+
+    def _trade_levels(self, levels: Dict[float, QueueLevel], side: str, price: float, qty: float,
+                      fills: List[Fill], symbol: Optional[str]):
+        is_buy = side == "BUY"
+        for key in list(levels):
+            if (key < price) if is_buy else (key > price):
+                continue
+            lvl = levels[key]
+            for od, q in lvl.trade(qty, through=key != price):
+                fills.append(Fill(side, od.price, q, order_id=od.id, symbol=symbol))
+                if od.remaining <= 0:
+                    self._working_by_id.pop(od.id, None)
+            if lvl.compact():
+                del levels[key]
@@ -0,0 +1,258 @@
+# services/param_sweep.py
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from models.depth import DepthSnapshot
+from services.backtester import (
+    KIND_DEPTH,
+    KIND_TRADE,
+    Backtester,
+    MarketEvent,
+    Strategy,
+)
+
+# ---------------------------------------------
+# 녹화 데이터 → 고정 폭 레코드 .npy (메모리 매핑용)
+# ---------------------------------------------
+SIDE_CODE = {"BUY": 1, "SELL": 2}
+SIDE_NAME = {1: "BUY", 2: "SELL"}
+
+
+def record_dtype(levels: int) -> np.dtype:
+    """
+    한 레코드 = depth 스냅샷 또는 trade 1건.
+    trade 는 bid_px[0]=가격, bid_sz[0]=수량, side 에 BUY/SELL 코드.
+    """
+    return np.dtype([
+        ("ts", "f8"),
+        ("sym", "u2"),
+        ("kind", "u1"),
+        ("side", "u1"),
+        ("n_bid", "u2"),
+        ("n_ask", "u2"),
+        ("bid_px", "f8", (levels,)),
+        ("bid_sz", "f8", (levels,)),
+        ("ask_px", "f8", (levels,)),
+        ("ask_sz", "f8", (levels,)),
+    ])
+
+
+def _meta_path(path: str) -> str:
+    return path + ".json"
+
+
+def _fill_record(rec, ev: MarketEvent, sym: int, levels: int):
+    rec["ts"] = ev.ts
+    rec["sym"] = sym
+    rec["kind"] = ev.kind
+    if ev.kind == KIND_DEPTH:
+        bids = list(ev.depth.bids)[:levels]
+        asks = list(ev.depth.asks)[:levels]
+        rec["n_bid"], rec["n_ask"] = len(bids), len(asks)
+        for k, (p, q, _) in enumerate(bids):
+            rec["bid_px"][k], rec["bid_sz"][k] = p, q
+        for k, (p, q, _) in enumerate(asks):
+            rec["ask_px"][k], rec["ask_sz"][k] = p, q
+    else:
+        t = ev.trade
+        rec["side"] = SIDE_CODE.get(str(t.get("side", "")).upper(), 0)
+        rec["bid_px"][0], rec["bid_sz"][0] = float(t["price"]), float(t["qty"])
+
+
+def _iter_chunks(events: Iterable[MarketEvent], dtype: np.dtype, levels: int,
+                 symbols: Dict[str, int], chunk: int) -> Iterator[np.ndarray]:
+    """이벤트를 chunk 개씩 레코드 배열로 (메모리에는 항상 chunk 개만)"""
+    buf = np.zeros(chunk, dtype=dtype)
+    n = 0
+    for ev in events:
+        _fill_record(buf[n], ev, symbols.setdefault(ev.symbol, len(symbols)), levels)
+        n += 1
+        if n == chunk:
+            yield buf
+            buf = np.zeros(chunk, dtype=dtype)
+            n = 0
+    if n:
+        yield buf[:n]
+
+
+def write_recording(events: Iterable[MarketEvent], path: str, levels: int = 10,
+                    count: Optional[int] = None, chunk: int = 65536) -> int:
+    """
+    MarketEvent 스트림(예: merge_events(iter_depth_file(...), ...))을 .npy 한 파일로 저장.
+    심볼 테이블/레벨 수는 옆에 path.json 으로 둔다. 반환: 레코드 수
+    - 이벤트 수를 알면(count 또는 len() 가능) open_memmap 으로 파일을 미리 잡고 chunk 단위로 채운다
+    - 모르면 chunk 단위로 임시 파일에 흘려 쓴 뒤 같은 방식으로 옮긴다
+    어느 쪽이든 메모리에는 chunk 개 레코드만 올라간다.
+    """
+    dtype = record_dtype(levels)
+    symbols: Dict[str, int] = {}
+    if count is None and hasattr(events, "__len__"):
+        count = len(events)
+
+    if count is not None:
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(count,))
+        n = 0
+        for block in _iter_chunks(events, dtype, levels, symbols, chunk):
+            if n + len(block) > count:
+                raise ValueError(f"more than count={count} events")
+            out[n:n + len(block)] = block
+            n += len(block)
+        if n != count:
+            raise ValueError(f"expected {count} events, got {n}")
+        out.flush()
+        del out
+    else:
+        tmp = path + ".part"
+        n = 0
+        try:
+            with open(tmp, "wb") as f:
+                for block in _iter_chunks(events, dtype, levels, symbols, chunk):
+                    block.tofile(f)
+                    n += len(block)
+            out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(n,))
+            with open(tmp, "rb") as f:
+                for start in range(0, n, chunk):
+                    block = np.fromfile(f, dtype=dtype, count=min(chunk, n - start))
+                    out[start:start + len(block)] = block
+            out.flush()
+            del out
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    with open(_meta_path(path), "w", encoding="utf-8") as f:
+        json.dump({"levels": levels, "symbols": sorted(symbols, key=symbols.get)}, f)
+    return n
+
+
+def iter_recording(path: str, chunk: int = 4096) -> Iterator[MarketEvent]:
+    """
+    .npy 녹화를 mmap_mode='r' 로 열어 MarketEvent 로 스트리밍.
+    여러 프로세스가 같은 파일을 열면 OS 페이지 캐시를 읽기 전용으로 공유한다 (복사/pickle 없음).
+    """
+    with open(_meta_path(path), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    symbols = meta["symbols"]
+    arr = np.load(path, mmap_mode="r", allow_pickle=False)
+
+    seq = 0
+    for start in range(0, len(arr), chunk):
+        block = arr[start:start + chunk]
+        ts = block["ts"].tolist()
+        sym = block["sym"].tolist()
+        kind = block["kind"].tolist()
+        side = block["side"].tolist()
+        n_bid = block["n_bid"].tolist()
+        n_ask = block["n_ask"].tolist()
+        bid_px = block["bid_px"].tolist()
+        bid_sz = block["bid_sz"].tolist()
+        ask_px = block["ask_px"].tolist()
+        ask_sz = block["ask_sz"].tolist()
+
+        for i in range(len(ts)):
+            symbol = symbols[sym[i]]
+            if kind[i] == KIND_DEPTH:
+                nb, na = n_bid[i], n_ask[i]
+                bids = list(zip(bid_px[i][:nb], bid_sz[i][:nb], range(nb)))
+                asks = list(zip(ask_px[i][:na], ask_sz[i][:na], range(na)))
+                depth = DepthSnapshot(bids, asks, DepthSnapshot.calc_mid(bids, asks), symbol)
+                yield MarketEvent(ts[i], KIND_DEPTH, 0, seq, symbol, depth=depth)
+            else:
+                trade = {
+                    "ts": ts[i],
+                    "symbol": symbol,
+                    "price": bid_px[i][0],
+                    "qty": bid_sz[i][0],
+                    "side": SIDE_NAME.get(side[i]),
+                }
+                yield MarketEvent(ts[i], KIND_TRADE, 0, seq, symbol, trade=trade)
+            seq += 1
+
+
+# ---------------------------------------------
+# 파라미터 스윕
+# ---------------------------------------------
+def param_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """{"a": [1, 2], "b": [x]} → [{"a": 1, "b": x}, {"a": 2, "b": x}] (순서 고정)"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _run_one(task) -> Dict[str, Any]:
+    """워커 프로세스에서 실행: 녹화 파일 경로만 받아서 직접 mmap"""
+    idx, data_path, factory, params, bt_kwargs = task
+    strategy = factory(**params)
+    report = Backtester(strategy, **bt_kwargs).run(iter_recording(data_path))
+    return {
+        "run": idx,
+        **params,
+        "total_pnl": report.total_pnl,
+        "realized_pnl": report.realized_pnl,
+        "unrealized_pnl": report.unrealized_pnl,
+        "equity": report.equity,
+        "fills": report.fills,
+        "events": report.events,
+        "elapsed": report.elapsed,
+    }
+
+
+class SweepRunner:
+    """
+    같은 녹화 데이터 위에서 전략 파라미터 조합 수백 개를 프로세스 풀로 돌린다.
+    - 워커에는 (파일 경로, 전략 팩토리, 파라미터) 만 넘긴다 → 데이터는 각 워커가 mmap
+    - factory 는 pickle 가능해야 함 (모듈 레벨 클래스/함수): factory(**params) -> Strategy
+    - 결과는 run 번호 순으로 정렬된 dict 리스트 (한 테이블)
+    """
+
+    def __init__(
+        self,
+        factory: Callable[..., Strategy],
+        data_path: str,
+        processes: Optional[int] = None,
+        **backtest_kwargs,
+    ):
+        self.factory = factory
+        self.data_path = data_path
+        self.processes = processes or os.cpu_count() or 1
+        self.backtest_kwargs = backtest_kwargs
+
+    def run(self, grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+        combos = param_grid(grid)
+        tasks = [(i, self.data_path, self.factory, p, self.backtest_kwargs) for i, p in enumerate(combos)]
+
+        t0 = time.perf_counter()
+        if self.processes <= 1:
+            rows = [_run_one(t) for t in tasks]
+        else:
+            chunksize = max(1, len(tasks) // (self.processes * 4))
+            with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                rows = list(pool.map(_run_one, tasks, chunksize=chunksize))
+        print(f"[SweepRunner] runs={len(rows)} processes={self.processes} "
+              f"elapsed={time.perf_counter() - t0:.2f}s")
+
+        rows.sort(key=lambda r: r["run"])
+        return rows
+
+
+def write_results_csv(rows: List[Dict[str, Any]], path: str):
+    if not rows:
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        w.writeheader()
+        w.writerows(rows)
+
+
+def results_dataframe(rows: List[Dict[str, Any]]):
+    """pandas DataFrame 으로 보고 싶을 때 (pandas 는 UI requirements 에 이미 있음)"""
+    import pandas as pd
+    return pd.DataFrame(rows).set_index("run")
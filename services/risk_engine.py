@@ -0,0 +1,235 @@
+# services/risk_engine.py
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+INF = float("inf")
+
+
+@dataclass(frozen=True)
+class RiskLimits:
+    """계좌 한도 (None/inf 면 검사 안 함)"""
+    max_order_qty: float = INF          # 주문 1건 수량
+    max_order_notional: float = INF     # 주문 1건 금액
+    max_position: float = INF           # 심볼별 |포지션 + 같은 방향 미체결|
+    max_open_notional: float = INF      # 미체결 금액 합계
+    max_gross_exposure: float = INF     # Σ |포지션 × 시세| + 미체결 금액
+    require_cash: bool = True           # 매수는 (현금 - 매수 미체결 금액) 안에서만
+
+
+@dataclass(frozen=True)
+class RiskDecision:
+    accepted: bool
+    reason: str = ""
+
+    def __bool__(self):
+        return self.accepted
+
+
+ACCEPT = RiskDecision(True)
+
+
+class AccountRisk:
+    """계좌 하나의 메모리 상태 (체결/주문 이벤트로 증분 갱신)"""
+    __slots__ = ("account_id", "limits", "cash", "positions", "open_buy", "open_sell",
+                 "open_notional", "open_buy_notional", "exposure", "_exp", "order_ids")
+
+    def __init__(self, account_id, limits: RiskLimits, cash: float = 0.0):
+        self.account_id = account_id
+        self.limits = limits
+        self.cash = cash
+        self.positions: Dict[str, float] = {}
+        self.open_buy: Dict[str, float] = {}    # symbol → 매수 미체결 수량
+        self.open_sell: Dict[str, float] = {}   # symbol → 매도 미체결 수량
+        self.open_notional = 0.0
+        self.open_buy_notional = 0.0
+        self.exposure = 0.0                     # Σ |pos × mark|
+        self._exp: Dict[str, float] = {}        # symbol → 그 심볼 몫의 exposure
+        self.order_ids: Set[Any] = set()        # RiskEngine.orders 중 이 계좌 것 (재동기화용 인덱스)
+
+    def reprice(self, symbol: str, mark: Optional[float]):
+        """한 심볼 몫의 exposure 만 다시 계산해서 합계 보정"""
+        if mark is None:
+            return
+        new = abs(self.positions.get(symbol, 0.0)) * mark
+        self.exposure += new - self._exp.get(symbol, 0.0)
+        self._exp[symbol] = new
+
+
+class RiskEngine:
+    """
+    멀티 계좌 사전 리스크 엔진 (주문 경로에서 DB 조회 없음).
+    - 계좌별 현금/포지션/미체결 수량·금액/익스포저를 메모리에 들고 있다가
+    - check() 는 dict 조회 몇 번 + 산술만으로 accept/reject
+    - 주문 접수/체결/취소 이벤트와 시세 변경을 받아 해당 계좌·심볼만 갱신
+    """
+
+    def __init__(self, default_limits: RiskLimits = RiskLimits()):
+        self.default_limits = default_limits
+        self.accounts: Dict[Any, AccountRisk] = {}
+        self.marks: Dict[str, float] = {}
+        # order_id → [account_id, symbol, side, remaining, price]
+        self.orders: Dict[Any, list] = {}
+        self._holders: Dict[str, Set[Any]] = {}
+
+    # ---------- 계좌 ----------
+    def account(self, account_id) -> AccountRisk:
+        acc = self.accounts.get(account_id)
+        if acc is None:
+            acc = self.accounts[account_id] = AccountRisk(account_id, self.default_limits)
+        return acc
+
+    def set_limits(self, account_id, limits: RiskLimits):
+        self.account(account_id).limits = limits
+
+    def sync_account(self, account_id, summary: Dict[str, Any]):
+        """
+        /account/summary 응답으로 현금/포지션을 맞춘다 (서버가 기준값).
+        미체결 예약분은 그대로 둔다.
+        """
+        acc = self.account(account_id)
+        acc.cash = float(summary.get("balance", acc.cash))
+        seen = set()
+        for p in summary.get("positions", []):
+            sym = p["symbol"]
+            seen.add(sym)
+            self._set_position(acc, sym, float(p["qty"]))
+        for sym in [s for s in acc.positions if s not in seen]:
+            self._set_position(acc, sym, 0.0)
+
+    def sync_orders(self, account_id, rows):
+        """
+        /orders/working 응답으로 미체결 예약을 통째로 다시 맞춘다 (서버가 기준값).
+        체결/취소가 이벤트로 안 들어와도 여기서 사라진 주문의 예약이 풀린다.
+        rows: dict(id, symbol, side, price, qty, remaining_qty) 또는
+              (id, symbol, side, price, qty, remaining_qty, created_at) 튜플
+        """
+        acc = self.account(account_id)
+        for oid in acc.order_ids:
+            self.orders.pop(oid, None)
+        acc.order_ids.clear()
+        acc.open_buy.clear()
+        acc.open_sell.clear()
+        acc.open_notional = 0.0
+        acc.open_buy_notional = 0.0
+
+        for row in rows or ():
+            if isinstance(row, dict):
+                oid = row.get("id", row.get("order_id"))
+                symbol, side, price = row.get("symbol"), str(row.get("side", "")).upper(), row.get("price")
+                remain = row.get("remaining_qty", row.get("qty", 0))
+            else:
+                oid, symbol, side, price, _, remain = row[:6]
+                side = str(side).upper()
+            remain = float(remain or 0)
+            if oid is None or remain <= 0 or price is None:
+                continue
+            self._track(acc, oid, symbol, side, remain, float(price))
+            self._reserve(acc, symbol, side, remain, float(price))
+
+    def _set_position(self, acc: AccountRisk, symbol: str, qty: float):
+        acc.positions[symbol] = qty
+        self._holders.setdefault(symbol, set()).add(acc.account_id)
+        acc.reprice(symbol, self.marks.get(symbol))
+
+    # ---------- 시세 ----------
+    def update_price(self, symbol: str, price: float):
+        self.marks[symbol] = price
+        for account_id in self._holders.get(symbol, ()):
+            self.accounts[account_id].reprice(symbol, price)
+
+    # ---------- 사전 검사 ----------
+    def check(self, account_id, symbol: str, side: str, qty: float, price: float = None) -> RiskDecision:
+        """
+        주문 1건 사전 검사. price 가 없으면(시장가) 마지막 시세로 금액 계산.
+        """
+        acc = self.account(account_id)
+        lim = acc.limits
+
+        if qty <= 0:
+            return RiskDecision(False, "qty must be positive")
+        px = price if price is not None else self.marks.get(symbol)
+        if px is None or px <= 0:
+            return RiskDecision(False, f"no reference price for {symbol}")
+        notional = qty * px
+
+        if qty > lim.max_order_qty:
+            return RiskDecision(False, f"order qty {qty} > {lim.max_order_qty}")
+        if notional > lim.max_order_notional:
+            return RiskDecision(False, f"order notional {notional:,.2f} > {lim.max_order_notional:,.2f}")
+
+        pos = acc.positions.get(symbol, 0.0)
+        if side == "BUY":
+            worst = pos + acc.open_buy.get(symbol, 0.0) + qty
+        else:
+            worst = pos - acc.open_sell.get(symbol, 0.0) - qty
+        if abs(worst) > lim.max_position:
+            return RiskDecision(False, f"position {worst:+} would exceed {lim.max_position}")
+
+        if acc.open_notional + notional > lim.max_open_notional:
+            return RiskDecision(False, f"open notional would exceed {lim.max_open_notional:,.2f}")
+        if acc.exposure + acc.open_notional + notional > lim.max_gross_exposure:
+            return RiskDecision(False, f"gross exposure would exceed {lim.max_gross_exposure:,.2f}")
+
+        if lim.require_cash and side == "BUY" and acc.cash - acc.open_buy_notional < notional:
+            return RiskDecision(False, "insufficient cash")
+
+        return ACCEPT
+
+    # ---------- 이벤트 ----------
+    def on_order(self, account_id, order_id, symbol: str, side: str, qty: float, price: float):
+        """주문 접수 → 미체결 예약 (order_id 없이는 해제할 방법이 없으므로 받지 않는다)"""
+        if order_id is None:
+            raise ValueError("order_id is required to reserve an order")
+        acc = self.account(account_id)
+        self._track(acc, order_id, symbol, side, qty, price)
+        self._reserve(acc, symbol, side, qty, price)
+
+    def on_order_done(self, order_id):
+        """취소/거부/만료 → 남은 예약 해제"""
+        od = self.orders.pop(order_id, None)
+        if od is None:
+            return
+        account_id, symbol, side, remaining, price = od
+        acc = self.accounts[account_id]
+        acc.order_ids.discard(order_id)
+        self._reserve(acc, symbol, side, -remaining, price)
+
+    def on_fill(self, account_id, symbol: str, side: str, qty: float, price: float, order_id=None, fee: float = 0.0):
+        """체결 → 예약 차감 + 포지션/현금/익스포저 갱신"""
+        acc = self.account(account_id)
+        if order_id is not None:
+            od = self.orders.get(order_id)
+            if od is not None:
+                take = min(qty, od[3])
+                od[3] -= take
+                self._reserve(acc, symbol, side, -take, od[4])
+                if od[3] <= 0:
+                    del self.orders[order_id]
+                    acc.order_ids.discard(order_id)
+
+        signed = qty if side == "BUY" else -qty
+        acc.cash += (-signed * price) - fee
+        self._set_position(acc, symbol, acc.positions.get(symbol, 0.0) + signed)
+
+    def _track(self, acc: AccountRisk, order_id, symbol: str, side: str, qty: float, price: float):
+        """orders 와 계좌별 order_ids 인덱스를 같이 갱신 (같은 id 가 다른 계좌에 있었으면 거기서 뺀다)"""
+        prev = self.orders.get(order_id)
+        if prev is not None and prev[0] != acc.account_id:
+            self.accounts[prev[0]].order_ids.discard(order_id)
+        self.orders[order_id] = [acc.account_id, symbol, side, qty, price]
+        acc.order_ids.add(order_id)
+
+    @staticmethod
+    def _reserve(acc: AccountRisk, symbol: str, side: str, qty: float, price: float):
+        book = acc.open_buy if side == "BUY" else acc.open_sell
+        book[symbol] = book.get(symbol, 0.0) + qty
+        notional = qty * price
+        acc.open_notional += notional
+        if side == "BUY":
+            acc.open_buy_notional += notional
+
+    # ---------- 조회 ----------
+    def exposure(self, account_id) -> Tuple[float, float]:
+        """(포지션 익스포저, 미체결 금액)"""
+        acc = self.account(account_id)
+        return acc.exposure, acc.open_notional
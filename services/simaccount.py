@@ -1,6 +1,9 @@
 # accounts.py
+from collections.abc import Mapping
 from dataclasses import dataclass
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, NamedTuple, Sequence
+
+import numpy as np
 
 
 @dataclass
@@ -17,26 +20,245 @@ class PositionState:
     unrealized_pnl: float = 0.0 # 미실현손익
 
 
+class FillBatch(NamedTuple):
+    """
+    컬럼형 체결 묶음 (같은 길이의 시퀀스/배열 4개).
+    sides 는 "BUY"/"SELL" 문자열 또는 +1/-1 부호.
+    """
+    symbols: Sequence[str]
+    sides: Sequence[Any]
+    prices: Sequence[float]
+    qtys: Sequence[float]
+
+    @classmethod
+    def from_fills(cls, fills, symbol: str = None) -> "FillBatch":
+        """models.order.Fill 리스트 → FillBatch (fill.symbol 이 없으면 symbol 사용)"""
+        return cls(
+            [f.symbol or symbol for f in fills],
+            [f.side for f in fills],
+            [f.price for f in fills],
+            [f.qty for f in fills],
+        )
+
+
+def _buy_mask(sides) -> np.ndarray:
+    arr = np.asarray(sides)
+    if arr.dtype.kind in "iuf":
+        return arr > 0
+    return np.char.upper(arr.astype(str)) == "BUY"
+
+
+class PositionStore:
+    """
+    컬럼형 포지션 저장소.
+    symbol → 행 번호, 컬럼(qty/avg/last/realized/upnl/asset)은 NumPy 배열.
+    - 전체 마크투마켓은 배열 식 한 번
+    - 체결/단일 시세 변경은 해당 행만 갱신하고 합계(total_*)를 그 행의 차이만큼 보정
+    - 행이 바뀔 때마다 version 을 올리고 row_version[i] 에 기록 (state 캐시/델타용)
+    """
+
+    COLUMNS = ("qty", "avg", "last", "realized", "upnl", "asset")
+
+    def __init__(self, capacity: int = 16):
+        self.index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.size = 0
+        for name in self.COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=np.float64))
+        self.row_version = np.zeros(capacity, dtype=np.int64)
+        self.version = 0
+
+        # 계좌 합계 (포지션을 훑지 않고 바로 읽는 값)
+        self.total_unrealized = 0.0
+        self.total_realized = 0.0
+        self.total_asset = 0.0     # Σ qty * last (순 평가금액)
+        self.total_exposure = 0.0  # Σ |qty * last| (총 익스포저)
+
+    def __len__(self):
+        return self.size
+
+    def row(self, symbol: str) -> int:
+        """행 번호 (없으면 추가)"""
+        i = self.index.get(symbol)
+        if i is not None:
+            return i
+        i = self.size
+        if i == len(self.qty):
+            self._grow()
+        self.index[symbol] = i
+        self.symbols.append(symbol)
+        self.size += 1
+        self.touch(i)
+        return i
+
+    def touch(self, i: int = None) -> int:
+        """변경 기록: version +1 (i 가 있으면 그 행도 표시)"""
+        self.version += 1
+        if i is not None:
+            self.row_version[i] = self.version
+        return self.version
+
+    def changed_rows(self, since: int) -> np.ndarray:
+        """since 버전 이후 바뀐 행 번호"""
+        return np.flatnonzero(self.row_version[:self.size] > since)
+
+    def _grow(self):
+        cap = max(16, len(self.qty) * 2)
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(cap, dtype=np.float64)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        rv = np.zeros(cap, dtype=np.int64)
+        rv[:len(self.row_version)] = self.row_version
+        self.row_version = rv
+
+    def refresh_row(self, i: int):
+        """qty/avg/last 중 하나가 바뀐 행의 미실현손익만 다시 계산"""
+        last = self.last[i] or self.avg[i]  # 아직 시세가 없으면 평균단가로 평가
+        qty = self.qty[i]
+        upnl = (last - self.avg[i]) * qty
+        self.total_unrealized += upnl - self.upnl[i]
+        self.upnl[i] = upnl
+
+        asset, old = qty * last, self.asset[i]
+        self.total_asset += asset - old
+        self.total_exposure += abs(asset) - abs(old)
+        self.asset[i] = asset
+        self.touch(i)
+
+    def add_realized(self, i: int, delta: float):
+        self.realized[i] += delta
+        self.total_realized += delta
+
+    def set_position(self, symbol: str, qty: float, avg: float, realized: float = None):
+        """외부(서버 요약 등)에서 받은 포지션 값으로 행을 덮어쓴다 — 그 행만 합계 보정"""
+        i = self.row(symbol)
+        self.qty[i] = qty
+        self.avg[i] = avg
+        if realized is not None:
+            self.add_realized(i, realized - self.realized[i])
+        self.refresh_row(i)
+
+    def set_price(self, symbol: str, price: float):
+        i = self.index.get(symbol)
+        if i is None:
+            return
+        self.last[i] = price
+        self.refresh_row(i)
+
+    def mark(self, prices):
+        """
+        전체 재평가: prices 에 있는 심볼은 새 시세, 없는 심볼은 기존 시세(없으면 평균단가) 유지
+        prices 는 {symbol: price} 또는 symbols 순서에 맞춘 ndarray
+        """
+        n = self.size
+        if n == 0:
+            return
+        last, avg = self.last[:n], self.avg[:n]
+        prev_last = last.copy()
+        np.copyto(last, avg, where=(last == 0.0))
+
+        if isinstance(prices, np.ndarray):
+            # symbols 순서에 맞춘 시세 배열 (NaN = 시세 없음)
+            px = prices[:n]
+            np.copyto(last, px, where=~np.isnan(px))
+        elif prices:
+            index = self.index
+            rows = np.fromiter((index.get(s, -1) for s in prices), dtype=np.intp, count=len(prices))
+            px = np.fromiter(prices.values(), dtype=np.float64, count=len(prices))
+            hit = rows >= 0
+            last[rows[hit]] = px[hit]
+
+        qty = self.qty[:n]
+        upnl, asset = self.upnl[:n], self.asset[:n]
+        np.multiply(last - avg, qty, out=upnl)
+        np.multiply(qty, last, out=asset)
+        self.total_unrealized = float(upnl.sum())
+        self.total_asset = float(asset.sum())
+        self.total_exposure = float(np.abs(asset).sum())
+        self.total_realized = float(self.realized[:n].sum())
+
+        changed = last != prev_last
+        if changed.any():
+            self.row_version[:n][changed] = self.touch()
+
+    def get(self, symbol: str) -> PositionState:
+        i = self.index[symbol]
+        qty, last = float(self.qty[i]), float(self.last[i])
+        return PositionState(
+            position=qty,
+            avg_price=float(self.avg[i]),
+            last_price=last,
+            asset_value=qty * last,
+            realized_pnl=float(self.realized[i]),
+            unrealized_pnl=float(self.upnl[i]),
+        )
+
+
+class _PositionsView(Mapping):
+    """기존 account.positions[sym].position 식 접근용 읽기 전용 뷰"""
+
+    def __init__(self, store: PositionStore):
+        self._store = store
+
+    def __getitem__(self, symbol: str) -> PositionState:
+        return self._store.get(symbol)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._store.symbols))
+
+    def __len__(self):
+        return len(self._store)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self._store.index
+
+
 class SimAccount:
     """
-    멀티 심볼 시뮬 계좌
+    멀티 심볼 시뮬 계좌 (포지션은 PositionStore 컬럼에 보관)
     """
 
     def __init__(self):
-        self.cash: float = 0.0
-        self.positions: Dict[str, PositionState] = {}
-        self.total_unrealized: float = 0.0
+        self.store = PositionStore()
+        self._cash: float = 0.0
+
+        # state 캐시: 마지막으로 만든 버전 + 행별 dict (바뀐 행만 다시 만든다)
+        self._state: Dict[str, Any] = None
+        self._state_version = -1
+        self._row_dicts: List[Dict[str, Any]] = []
+
+    @property
+    def cash(self) -> float:
+        return self._cash
+
+    @cash.setter
+    def cash(self, value: float):
+        self._cash = float(value)
+        self.store.touch()
+
+    @property
+    def version(self) -> int:
+        """계좌가 바뀔 때마다 올라가는 번호 (changes_since 인자로 사용)"""
+        return self.store.version
+
+    @property
+    def positions(self) -> Mapping:
+        return _PositionsView(self.store)
+
+    @property
+    def total_unrealized(self) -> float:
+        return self.store.total_unrealized
 
     # ============================================================
     # 🔥 여기! _get_or_create_position 추가했다
     # ============================================================
-    def _get_or_create_position(self, symbol: str) -> PositionState:
+    def _get_or_create_position(self, symbol: str) -> int:
         """
-        해당 symbol의 포지션이 없으면 생성해서 반환
+        해당 symbol의 포지션 행이 없으면 생성해서 행 번호 반환
         """
-        if symbol not in self.positions:
-            self.positions[symbol] = PositionState()
-        return self.positions[symbol]
+        return self.store.row(symbol)
 
     # ============================================================
     # 계좌 현금 적용
@@ -58,10 +280,12 @@ class SimAccount:
         price = float(price)
         qty = float(qty)
 
-        pos = self._get_or_create_position(symbol)
+        st = self.store
+        i = self._get_or_create_position(symbol)
 
-        old_pos = pos.position
-        old_avg = pos.avg_price
+        old_pos = float(st.qty[i])
+        old_avg = float(st.avg[i])
+        avg = old_avg
 
         # --------------------------------
         # BUY 체결
@@ -72,18 +296,15 @@ class SimAccount:
             if old_pos >= 0:
                 # 롱 포지션 증가
                 total_cost = old_pos * old_avg + qty * price
-                pos.avg_price = total_cost / new_pos if new_pos != 0 else 0.0
+                avg = total_cost / new_pos if new_pos != 0 else 0.0
             else:
                 # 숏 청산 또는 반전
                 closed_qty = min(abs(old_pos), qty)
-                realized = (old_avg - price) * closed_qty
-                pos.realized_pnl += realized
+                st.add_realized(i, (old_avg - price) * closed_qty)
 
                 if new_pos > 0:
                     # 숏 완전 청산 후 롱 반전
-                    pos.avg_price = price
-
-            pos.position = new_pos
+                    avg = price
 
         # --------------------------------
         # SELL 체결
@@ -94,55 +315,149 @@ class SimAccount:
             if old_pos <= 0:
                 # 숏 포지션 증가
                 total_cost = old_pos * old_avg - qty * price
-                pos.avg_price = total_cost / new_pos if new_pos != 0 else 0.0
+                avg = total_cost / new_pos if new_pos != 0 else 0.0
             else:
                 # 롱 청산 또는 반전
                 closed_qty = min(abs(old_pos), qty)
-                realized = (price - old_avg) * closed_qty
-                pos.realized_pnl += realized
+                st.add_realized(i, (price - old_avg) * closed_qty)
 
                 if new_pos < 0:
                     # 롱 완전 청산 후 숏 반전
-                    pos.avg_price = price
+                    avg = price
 
-            pos.position = new_pos
+        st.qty[i] = new_pos
+        st.avg[i] = avg
+        st.refresh_row(i)
 
     # ============================================================
-    # 마크투마켓 (현재가 dict 기반)
+    # 체결 묶음 반영 (심볼별로 모아서 한 번에)
     # ============================================================
-    def mark_to_market(self, prices: Dict[str, float]):
-        total_unrealized = 0.0
+    def apply_fills(self, batch) -> int:
+        """
+        FillBatch (또는 symbols/sides/prices/qtys 4-튜플, 같은 키의 dict) 를 계좌에 반영.
+        - side/가격/수량 변환은 배열 단위로 한 번
+        - 심볼별로 묶어서 (심볼 안에서는 입력 순서 유지) 행을 한 번만 읽고 쓴다
+        - 한 방향으로만 쌓이는 심볼은 가중평균 한 번, 청산/반전이 섞이면 순서대로 접는다
+        반환: 반영한 체결 수
+        """
+        if isinstance(batch, dict):
+            batch = FillBatch(batch["symbols"], batch["sides"], batch["prices"], batch["qtys"])
+        symbols, sides, prices, qtys = batch
+        n = len(prices)
+        if n == 0:
+            return 0
 
-        for sym, pos in self.positions.items():
-            last = float(prices.get(sym, pos.last_price or pos.avg_price))
-            pos.last_price = last
+        px = np.asarray(prices, dtype=np.float64)
+        q = np.asarray(qtys, dtype=np.float64)
+        signed = np.where(_buy_mask(sides), q, -q)
 
-            pos.asset_value = pos.position * last
-            pos.unrealized_pnl = (last - pos.avg_price) * pos.position
+        names, inv = np.unique(np.asarray(symbols).astype(str), return_inverse=True)
+        order = np.argsort(inv, kind="stable")
+        bounds = np.flatnonzero(np.diff(inv[order])) + 1
 
-            total_unrealized += pos.unrealized_pnl
+        st = self.store
+        for g, idx in enumerate(np.split(order, bounds)):
+            i = st.row(str(names[g]))
+            pos, avg, realized = float(st.qty[i]), float(st.avg[i]), float(st.realized[i])
+            gq, gp = signed[idx], px[idx]
+
+            if (pos >= 0 and (gq > 0).all()) or (pos <= 0 and (gq < 0).all()):
+                # 포지션 증가만 → 가중평균 한 번
+                new_pos = pos + float(gq.sum())
+                avg = (pos * avg + float(gq @ gp)) / new_pos if new_pos != 0 else 0.0
+                pos = new_pos
+            else:
+                for dq, p in zip(gq.tolist(), gp.tolist()):
+                    new_pos = pos + dq
+                    if pos == 0 or (pos > 0) == (dq > 0):
+                        avg = (pos * avg + dq * p) / new_pos if new_pos != 0 else 0.0
+                    else:
+                        closed = min(abs(pos), abs(dq))
+                        realized += (p - avg) * closed * (1.0 if pos > 0 else -1.0)
+                        if new_pos != 0 and (new_pos > 0) != (pos > 0):
+                            avg = p
+                    pos = new_pos
 
-        self.total_unrealized = total_unrealized
+            st.qty[i] = pos
+            st.avg[i] = avg
+            st.add_realized(i, realized - float(st.realized[i]))
+            st.refresh_row(i)
+        return n
+
+    # ============================================================
+    # 마크투마켓 (현재가 dict 기반)
+    # ============================================================
+    def mark_to_market(self, prices: Dict[str, float]):
+        """prices: {symbol: price} 또는 account.store.symbols 순서의 ndarray (틱마다 전체 재평가할 때 빠름)"""
+        self.store.mark(prices)
+
+    def update_price(self, symbol: str, price: float):
+        """시세 1건 → 해당 심볼 행만 재평가"""
+        self.store.set_price(str(symbol), float(price))
 
     # ============================================================
     # ui/DB용 구조 변환
     # ============================================================
+    def _row_dict(self, i: int, qty, avg, last, realized, upnl, asset) -> Dict[str, Any]:
+        # asset 은 store 가 refresh_row 에서 (시세 없으면 평균단가로) 계산해 둔 값 → 합계와 항상 일치
+        return {
+            "symbol": self.store.symbols[i],
+            "qty": qty,
+            "avg_price": avg,
+            "last_price": last,
+            "asset_value": asset,
+            "realized_pnl": realized,
+            "unrealized_pnl": upnl,
+        }
+
+    def _sync_rows(self):
+        """마지막 state 이후 바뀐 행 dict 만 새로 만든다 (기존 dict 는 건드리지 않음)"""
+        st = self.store
+        rows = st.changed_rows(self._state_version)
+        if len(rows) == 0:
+            return
+        missing = st.size - len(self._row_dicts)
+        if missing > 0:
+            self._row_dicts.extend([None] * missing)
+        cols = zip(
+            rows.tolist(),
+            st.qty[rows].tolist(),
+            st.avg[rows].tolist(),
+            st.last[rows].tolist(),
+            st.realized[rows].tolist(),
+            st.upnl[rows].tolist(),
+            st.asset[rows].tolist(),
+        )
+        for i, *values in cols:
+            self._row_dicts[i] = self._row_dict(i, *values)
+
     @property
     def state(self) -> Dict[str, Any]:
-        position_list = []
-
-        for sym, pos in self.positions.items():
-            position_list.append({
-                "symbol": sym,
-                "qty": pos.position,
-                "avg_price": pos.avg_price,
-                "last_price": pos.last_price,
-                "asset_value": pos.asset_value,
-                "realized_pnl": pos.realized_pnl,
-                "unrealized_pnl": pos.unrealized_pnl,
-            })
+        """
+        ui/DB용 전체 스냅샷. 바뀐 게 없으면 같은 dict 를 그대로 돌려준다 (읽기 전용으로 쓸 것).
+        """
+        version = self.store.version
+        if self._state is not None and self._state_version == version:
+            return self._state
 
-        return {
+        self._sync_rows()
+        self._state = {
             "cash": self.cash,
-            "positions": position_list
+            "positions": list(self._row_dicts),
+            "version": version,
+        }
+        self._state_version = version
+        return self._state
+
+    def changes_since(self, version: int) -> Dict[str, Any]:
+        """
+        version 이후 바뀐 심볼만: {"version": 현재 버전, "cash": ..., "positions": [바뀐 행]}
+        소비자는 받은 version 을 다음 호출에 넘기면 된다.
+        """
+        state = self.state
+        rows = self.store.changed_rows(version).tolist()
+        return {
+            "version": state["version"],
+            "cash": state["cash"],
+            "positions": [self._row_dicts[i] for i in rows],
         }
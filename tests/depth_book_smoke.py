@@ -0,0 +1,47 @@
+# OrderSimulator 체결 경로를 DepthSnapshot / DepthBook 양쪽으로 돌려 결과 비교
+#   python -m tests.depth_book_smoke
+from models.depth import DepthBook, DepthSnapshot
+from services.order_simulator import OrderSimulator
+
+
+def depth(symbol="SMOKEUSDT"):
+    bids = [(100.0 - i * 0.01, 10, i) for i in range(20)]
+    asks = [(100.01 + i * 0.01, 10, i) for i in range(20)]
+    return DepthSnapshot(bids, asks, DepthSnapshot.calc_mid(bids, asks), symbol)
+
+
+def run(book):
+    sim = OrderSimulator()
+    out = []
+
+    # 지정가 즉시 체결 + 잔량 대기
+    f, book, remain = sim.buy_limit_now_or_queue(100.03, 35, book)
+    out.append(("buy_limit", [(x.price, x.qty) for x in f], remain))
+    f, book, remain = sim.sell_limit_now_or_queue(99.98, 25, book)
+    out.append(("sell_limit", [(x.price, x.qty) for x in f], remain))
+
+    # 시장가
+    f, book = sim.buy_market(12, book)
+    out.append(("buy_market", [(x.price, x.qty) for x in f]))
+
+    # 미체결 매칭: 깔아둔 주문과 교차하는 틱
+    sim.sell_limit_now_or_queue(100.5, 5, book)
+    tick = DepthSnapshot([(100.6, 3, 0)] + list(book.bids), list(book.asks), None, "SMOKEUSDT")
+    if isinstance(book, DepthBook):
+        tick = DepthBook.from_snapshot(tick)
+    f, book = sim.match_working_on_depth(tick)
+    out.append(("working", [(x.price, x.qty) for x in f]))
+
+    # DepthBook.sweep 은 소진 레벨을 size 0 으로 남기므로 살아있는 레벨만 비교
+    live = lambda levels: [(p, q) for p, q, _ in levels if q > 0][:5]
+    return out, type(book).__name__, live(book.bids), live(book.asks)
+
+
+if __name__ == "__main__":
+    snap_res, snap_t, snap_b, snap_a = run(depth())
+    book_res, book_t, book_b, book_a = run(DepthBook.from_snapshot(depth()))
+    for row in book_res:
+        print(row)
+    print("result type:", snap_t, "/", book_t)
+    print("fills match:", snap_res == book_res)
+    print("book matches:", snap_b == book_b and snap_a == book_a)
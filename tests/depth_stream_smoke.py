@@ -0,0 +1,133 @@
+# Binance depth REST/WS 로컬 스탠드인 + MarketDataService(provider="STREAM") 스모크
+#   python -m tests.depth_stream_smoke
+import asyncio
+import json
+import random
+import threading
+import time
+
+from aiohttp import web
+
+from services.marketdata_service import MarketDataService
+
+SYMBOL = "SMOKEUSDT"
+
+
+class LocalDepthFeed:
+    """
+    /api/v3/depth (REST 스냅샷) + /ws/{stream} (diff 업데이트, U/u 시퀀스) 를 흉내내는 로컬 서버.
+    호가는 랜덤워크로 interval_ms 마다 몇 레벨씩 바뀐다.
+    """
+
+    def __init__(self, port: int = 18765, interval_ms: float = 20.0, seed: int = 7):
+        self.port = port
+        self.interval = interval_ms / 1000.0
+        self.rng = random.Random(seed)
+        self.bids = {round(100.0 - i * 0.01, 2): 10.0 for i in range(50)}
+        self.asks = {round(100.01 + i * 0.01, 2): 10.0 for i in range(50)}
+        self.last_u = 1000
+        self._loop = None
+        self._thread = None
+        self._runner = None
+
+    @property
+    def rest_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api/v3/depth?symbol={{symbol}}&limit=1000"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/ws/{{stream}}"
+
+    def top(self, n: int):
+        bids = sorted(self.bids.items(), reverse=True)[:n]
+        asks = sorted(self.asks.items())[:n]
+        return bids, asks
+
+    # ---------- server ----------
+    async def _depth(self, request):
+        return web.json_response({
+            "lastUpdateId": self.last_u,
+            "bids": [[str(p), str(q)] for p, q in sorted(self.bids.items(), reverse=True)],
+            "asks": [[str(p), str(q)] for p, q in sorted(self.asks.items())],
+        })
+
+    async def _ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        while not ws.closed:
+            await ws.send_str(json.dumps(self._step()))
+            await asyncio.sleep(self.interval)
+        return ws
+
+    def _step(self) -> dict:
+        r = self.rng
+        b, a = [], []
+        for _ in range(3):
+            for book, out, base, step in ((self.bids, b, 100.0, -0.01), (self.asks, a, 100.01, 0.01)):
+                p = round(base + r.randint(0, 20) * step, 2)
+                q = 0.0 if r.random() < 0.2 else float(r.randint(1, 50))
+                out.append([str(p), str(q)])
+                if q == 0:
+                    book.pop(p, None)
+                else:
+                    book[p] = q
+        U = self.last_u + 1
+        self.last_u += 1
+        return {"e": "depthUpdate", "s": SYMBOL, "U": U, "u": self.last_u, "b": b, "a": a}
+
+    # ---------- lifecycle ----------
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            app = web.Application()
+            app.router.add_get("/api/v3/depth", self._depth)
+            app.router.add_get("/ws/{stream}", self._ws)
+            self._runner = web.AppRunner(app)
+            self._loop.run_until_complete(self._runner.setup())
+            self._loop.run_until_complete(web.TCPSite(self._runner, "127.0.0.1", self.port).start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="LocalDepthFeed", daemon=True)
+        self._thread.start()
+        ready.wait(5.0)
+
+    def stop(self):
+        # 데몬 스레드라 루프만 멈추면 된다 (열린 WS 핸들러를 기다리지 않음)
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+if __name__ == "__main__":
+    feed = LocalDepthFeed()
+    feed.start()
+
+    md = MarketDataService(provider="STREAM", symbol=SYMBOL, rows=10,
+                           stream_rest_url=feed.rest_url, stream_ws_url=feed.ws_url)
+    oracle = md.start_oracle()
+    print("ready:", oracle.wait_ready(5.0))
+    time.sleep(0.5)
+
+    n = 100_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        snap = md.fetch_depth()
+    per_call = (time.perf_counter() - t0) / n * 1e6
+    print(f"fetch_depth: {per_call:.2f} us/call, updates={oracle.updates}")
+
+    # 스탠드인과 같은 시점의 상위 호가 비교 (업데이트를 잠깐 멈출 수 없으니 u 가 같을 때만)
+    for _ in range(50):
+        snap = md.fetch_depth()
+        if oracle._last_u == feed.last_u:
+            bids, asks = feed.top(10)
+            ok = [(p, q) for p, q, _ in snap.bids] == bids and [(p, q) for p, q, _ in snap.asks] == asks
+            print("book matches feed:", ok)
+            break
+        time.sleep(0.002)
+
+    md.stop_oracles()
+    oracle.stop()   # stop_oracles 는 기다리지 않으므로 스탠드인을 내리기 전에 루프가 끝날 때까지 대기
+    feed.stop()
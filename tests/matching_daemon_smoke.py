@@ -0,0 +1,59 @@
+# docker compose up -d db 로 띄운 로컬 Postgres 에 대해 실행
+#   python -m tests.matching_daemon_smoke
+import time
+from types import SimpleNamespace
+
+import psycopg2
+
+from infra.db import PG_DSN
+from services.matching_daemon import MatchingDaemon, install_orders_trigger
+from services.matching_engine import MatchingEngine
+
+SYMBOL = "SMOKEUSDT"
+
+
+def insert_order(conn, side, price, qty):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO orders (symbol, side, price, qty, remaining_qty, status, created_at)
+            VALUES (%s, %s, %s, %s, %s, 'WORKING', now())
+            RETURNING id;
+            """,
+            (SYMBOL, side, price, qty, qty),
+        )
+        oid = cur.fetchone()[0]
+    conn.commit()
+    return oid
+
+
+def wait_status(conn, order_id, status, timeout=2.0):
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        with conn.cursor() as cur:
+            cur.execute("SELECT status FROM orders WHERE id=%s", (order_id,))
+            if cur.fetchone()[0] == status:
+                return time.perf_counter() - t0
+        conn.commit()
+        time.sleep(0.001)
+    return None
+
+
+if __name__ == "__main__":
+    client = psycopg2.connect(PG_DSN)
+    install_orders_trigger(client)
+
+    engine = MatchingEngine(SimpleNamespace(conn=psycopg2.connect(PG_DSN)))
+    engine.match_symbol(SYMBOL)  # 부트스트랩
+
+    daemon = MatchingDaemon(engine)
+    daemon.start()
+    time.sleep(0.2)
+
+    sell_id = insert_order(client, "SELL", 100.0, 1)
+    buy_id = insert_order(client, "BUY", 100.0, 1)
+
+    elapsed = wait_status(client, buy_id, "FILLED")
+    print("FILLED in:", f"{elapsed * 1000:.1f} ms" if elapsed is not None else "TIMEOUT")
+
+    daemon.stop()
@@ -0,0 +1,198 @@
+# /ui/snapshot 레퍼런스 로컬 서버 + UISnapshotAPI 스모크
+#   python -m tests.ui_snapshot_server
+import asyncio
+import threading
+import time
+
+from aiohttp import web
+
+from controllers.account_controller_api import AccountControllerAPI
+from controllers.order_controller_api import OrdersControllerAPI
+from controllers.orderbook_api_client import OrderBookAPIClient
+from controllers.trade_controller_api import TradeControllerAPI
+from controllers.ui_snapshot_api import UISnapshotAPI
+from infra.http import HttpTransport
+
+SYMBOL = "SMOKEUSDT"
+ACCOUNT_ID = 1
+
+
+class SnapshotStore:
+    """
+    섹션별 (seq, 값) 저장소. 값이 실제로 바뀔 때만 전역 seq 를 올려 그 섹션에 찍는다.
+    depth 는 심볼 단위, 나머지는 계좌 단위.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self._data = {}   # (section, scope) → (seq, value)
+
+    def put(self, section: str, scope, value):
+        cur = self._data.get((section, scope))
+        if cur is not None and cur[1] == value:
+            return
+        self.seq += 1
+        self._data[(section, scope)] = (self.seq, value)
+
+    def get(self, section: str, scope, default=None):
+        cur = self._data.get((section, scope))
+        return cur[1] if cur else default
+
+    def snapshot(self, symbol: str, account_id, since_seq=None) -> dict:
+        if since_seq is not None and since_seq > self.seq:
+            since_seq = None   # 서버 재시작 등으로 seq 가 되돌아가면 전체
+        out = {"seq": self.seq, "symbol": symbol, "account_id": account_id}
+        for section, scope, default in (
+            ("depth", symbol, {"bids": [], "asks": []}),
+            ("summary", account_id, {"balance": 0, "positions": []}),
+            ("working_orders", account_id, []),
+            ("trades", account_id, []),
+        ):
+            seq, value = self._data.get((section, scope), (0, default))
+            if since_seq is None or seq > since_seq:
+                out[section] = value
+        return out
+
+
+class LocalSnapshotServer:
+    """
+    /ui/snapshot + 기존 개별 엔드포인트(/account/primary, /account/summary,
+    /orders/working, /trades/my, /orderbook/local) 를 같은 저장소로 흉내내는 로컬 서버.
+    latency_ms 로 요청당 서버 처리 지연(DB 조회 등)을 흉내낸다.
+    """
+
+    def __init__(self, port: int = 18766, latency_ms: float = 2.0):
+        self.port = port
+        self.latency = latency_ms / 1000.0
+        self.store = SnapshotStore()
+        self.requests = 0
+        self._loop = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    # ---------- handlers ----------
+    async def _wait(self):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def _snapshot(self, request):
+        await self._wait()
+        q = request.query
+        since = q.get("since_seq")
+        return web.json_response(self.store.snapshot(
+            q.get("symbol", "").upper(), int(q["account_id"]), int(since) if since is not None else None))
+
+    async def _primary(self, request):
+        await self._wait()
+        return web.json_response({"account_id": ACCOUNT_ID})
+
+    async def _summary(self, request):
+        await self._wait()
+        return web.json_response(self.store.get("summary", int(request.query["account_id"]),
+                                                {"balance": 0, "positions": []}))
+
+    async def _working(self, request):
+        await self._wait()
+        return web.json_response(self.store.get("working_orders", ACCOUNT_ID, []))
+
+    async def _trades(self, request):
+        await self._wait()
+        return web.json_response(self.store.get("trades", ACCOUNT_ID, []))
+
+    async def _local(self, request):
+        await self._wait()
+        return web.json_response(self.store.get("depth", request.query.get("symbol", "").upper(),
+                                                {"bids": [], "asks": []}))
+
+    # ---------- lifecycle ----------
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            app = web.Application()
+            app.router.add_get("/ui/snapshot", self._snapshot)
+            app.router.add_get("/account/primary", self._primary)
+            app.router.add_get("/account/summary", self._summary)
+            app.router.add_get("/orders/working", self._working)
+            app.router.add_get("/trades/my", self._trades)
+            app.router.add_get("/orderbook/local", self._local)
+            runner = web.AppRunner(app)
+            self._loop.run_until_complete(runner.setup())
+            self._loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", self.port).start())
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name="LocalSnapshotServer", daemon=True).start()
+        ready.wait(5.0)
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def call(self, fn, *args):
+        """서버 루프에서 저장소를 바꾼다 (핸들러와 경합 없이)"""
+        done = threading.Event()
+
+        def run():
+            fn(*args)
+            done.set()
+
+        self._loop.call_soon_threadsafe(run)
+        done.wait(2.0)
+
+
+if __name__ == "__main__":
+    srv = LocalSnapshotServer()
+    srv.start()
+    st = srv.store
+    srv.call(st.put, "depth", SYMBOL, {"bids": [{"price": 100.0, "qty": 3, "cnt": 1}], "asks": []})
+    srv.call(st.put, "summary", ACCOUNT_ID, {"balance": 10_000.0, "positions": []})
+    srv.call(st.put, "working_orders", ACCOUNT_ID, [{"order_id": 1, "side": "BUY", "price": 100.0, "qty": 3}])
+    srv.call(st.put, "trades", ACCOUNT_ID, [])
+
+    http = HttpTransport()
+    api = UISnapshotAPI(srv.url, http=http)
+
+    # 1) 처음엔 전체, 그 다음엔 바뀐 섹션만
+    s1 = api.get_snapshot(SYMBOL, ACCOUNT_ID)
+    print("first:", s1["changed"])
+    s2 = api.get_snapshot(SYMBOL, ACCOUNT_ID)
+    print("idle :", s2["changed"], "working kept:", s2["working_orders"] == s1["working_orders"])
+    srv.call(st.put, "trades", ACCOUNT_ID, [{"trade_id": 1, "side": "BUY", "price": 100.0, "qty": 1}])
+    srv.call(st.put, "summary", ACCOUNT_ID, {"balance": 9_900.0,
+                                             "positions": [{"symbol": SYMBOL, "qty": 1, "avg_price": 100.0}]})
+    s3 = api.get_snapshot(SYMBOL, ACCOUNT_ID)
+    print("fill :", s3["changed"], "balance:", s3["summary"]["balance"])
+
+    # 2) 틱당 지연: 기존 개별 호출 5번 vs /ui/snapshot 1번
+    account = AccountControllerAPI(srv.url, http=http)
+    orders = OrdersControllerAPI(srv.url, http=http)
+    trades = TradeControllerAPI(srv.url, http=http)
+    book = OrderBookAPIClient(srv.url, http=http)
+
+    def legacy_tick():
+        account_id = account.get_primary_account_id(1)
+        book.get_local_depth(SYMBOL)
+        account.get_account_summary(account_id)
+        orders.get_user_working_orders(1)
+        trades.get_trades()
+
+    def snapshot_tick():
+        api.get_snapshot(SYMBOL, ACCOUNT_ID)
+
+    for name, tick in (("legacy  ", legacy_tick), ("snapshot", snapshot_tick)):
+        n = 100
+        r0 = srv.requests
+        t0 = time.perf_counter()
+        for _ in range(n):
+            tick()
+        ms = (time.perf_counter() - t0) / n * 1e3
+        print(f"{name}: {ms:.2f} ms/tick, {(srv.requests - r0) / n:.0f} req/tick")
+
+    http.close()
+    srv.stop()
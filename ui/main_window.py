@@ -14,6 +14,7 @@ from controllers.account_controller_api import AccountControllerAPI
 from controllers.trade_controller_api import TradeControllerAPI
 from controllers.orderbook_api import OrderBookAPI
 from controllers.orderbook_api_client import OrderBookAPIClient
+from controllers.ui_snapshot_api import UISnapshotAPI
 
 from services.marketdata_service import MarketDataService
 
@@ -57,6 +58,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.accountApi = AccountControllerAPI()
         self.tradeApi = TradeControllerAPI()
         self.orderBookApi = OrderBookAPIClient()
+        self.snapshotApi = UISnapshotAPI()
+        self._primary = (None, None)   # (user_id, account_id) — 틱마다 조회하지 않도록 캐시
 
         # Market Data
         self.md = MarketDataService(
@@ -65,8 +68,8 @@ class MainWindow(QtWidgets.QMainWindow):
             symbol="solusdt",
             rows=depth_levels
         )
-        # if not use_mock:
-        #     self.md.start_oracle()
+        if not use_mock and self.md.provider == "STREAM":
+            self.md.start_oracle()
 
         # --- 심볼 셀렉터 ---
         self._bind_symbol_selector()
@@ -228,12 +231,45 @@ class MainWindow(QtWidgets.QMainWindow):
     # 타이머
     # --------------------------------------------------------
     def _on_timer(self):
+        if self._refresh_from_snapshot():
+            return
         self.ctrl.poll_and_render()
-        self._refresh_balance()
         # self._update_orderbook()
-        self._reload_working_orders()
+        working = self._reload_working_orders()
+        self._refresh_balance(working)
         # self._refresh_orders_and_trades()
 
+    def _primary_account_id(self, user_id):
+        if self._primary[0] != user_id or not self._primary[1]:
+            self._primary = (user_id, self.accountApi.get_primary_account_id(user_id))
+        return self._primary[1]
+
+    def _refresh_from_snapshot(self) -> bool:
+        """
+        /ui/snapshot 한 번으로 호가/잔고/미체결/체결 갱신.
+        바뀐 섹션만 다시 그린다 (잔고는 시세 때문에 매 틱).
+        False 면 호출부가 기존 개별 API 경로로 갱신.
+        """
+        user = self.authApi.current_user
+        if not user or not self.snapshotApi.supported:
+            return False
+        account_id = self._primary_account_id(user.get("user_id"))
+        if not account_id:
+            return False
+
+        snap = self.snapshotApi.get_snapshot(self.md.current_symbol(), account_id)
+        if snap is None:
+            return False
+
+        changed = snap["changed"]
+        self.ctrl.refresh_orderbook(local=snap["depth"])
+        self.ctrl.apply_summary(account_id, snap["summary"], snap["working_orders"])
+        if "working_orders" in changed:
+            self.ready_orders.render_from_api(snap["working_orders"])
+        if "trades" in changed:
+            self.trades.render_from_api(snap["trades"])
+        return True
+
     # --------------------------------------------------------
     # 로그인
     # --------------------------------------------------------
@@ -372,7 +408,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if reply != QMessageBox.StandardButton.Yes:
             return
 
-        self.orderApi.cancel_orders(order_ids)
+        self.ctrl.cancel_orders(order_ids)
         self._refresh_orders_and_trades()
 
         QtWidgets.QMessageBox.information(self, "취소", f"{len(order_ids)}건의 주문이 취소되었습니다.")
@@ -389,6 +425,7 @@ class MainWindow(QtWidgets.QMainWindow):
         user_id = user.get("user_id")
         rows = self.orderApi.get_user_working_orders(user_id)
         self.ready_orders.render_from_api(rows)
+        return rows
 
     def _refresh_orders_and_trades(self):
         user = self.authApi.current_user
@@ -416,18 +453,19 @@ class MainWindow(QtWidgets.QMainWindow):
         except Exception as e:
             QtWidgets.QMessageBox.warning(self, "Error", str(e))
 
-    def _refresh_balance(self):
+    def _refresh_balance(self, working=None):
         user = self.authApi.current_user
         if not user:
             return
 
         user_id = user.get("user_id")
-        account_id = self.accountApi.get_primary_account_id(user_id)
+        account_id = self._primary_account_id(user_id)
         if not account_id:
             return
 
         summary = self.accountApi.get_account_summary(account_id)
-        self.balance_table.render_from_summary(summary, self.md)
+        # 리스크 엔진도 같은 요약/미체결로 맞춘다 (주문 사전 검사의 현금/예약 기준)
+        self.ctrl.apply_summary(account_id, summary, working)
 
     # --------------------------------------------------------
     # 메뉴
@@ -457,6 +495,8 @@ class MainWindow(QtWidgets.QMainWindow):
     def _toggle_login(self):
         if self.authApi.current_user:
             email = self.authApi.logout()
+            self._primary = (None, None)
+            self.snapshotApi.reset()
             self._apply_login_ui()
             QtWidgets.QMessageBox.information(self, "Logout", f"{email} 로그아웃")
         else:
@@ -473,6 +513,7 @@ class MainWindow(QtWidgets.QMainWindow):
                                 parent=self,
                                 )
         dlg.exec()
+        self._primary = (None, None)   # 대표 계좌가 바뀌었을 수 있음
 
     def _open_signup_dialog(self):
         from widgets.signup_dialog import SignupDialog
@@ -484,7 +525,7 @@ class MainWindow(QtWidgets.QMainWindow):
     # --------------------------------------------------------
     def closeEvent(self, e):
         self.timer.stop()
-        # self.md.close()
+        self.md.stop_oracles()
         super().closeEvent(e)
 
 
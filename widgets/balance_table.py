@@ -4,14 +4,25 @@ from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView, QCheckBox
 
 
+from services.account_aggregator import AccountAggregator
 from widgets.ui_styles import BLUE_HEADER, apply_header_style, QtAlignCenter, QtAlignRight, QtAlignVCenter
 
 
 class BalanceTable:
     """계좌 잔고 + 포지션 테이블"""
 
-    def __init__(self, table: QtWidgets.QTableWidget):
+    def __init__(self, table: QtWidgets.QTableWidget, aggregator: AccountAggregator = None,
+                 summary_label: QtWidgets.QLabel = None):
         self.table = table
+        self.summary_label = summary_label
+        # 합계는 aggregator 가 체결/시세 단위로 들고 있다 (렌더링 때 다시 더하지 않음)
+        self.agg = aggregator or AccountAggregator()
+        self.totals = None
+        # 지난 렌더 상태: 같은 계좌/종목 구성이면 바뀐 행만 다시 쓴다
+        self._account_id = None
+        self._symbols = None
+        self._row_of = {}
+        self._version = 0
         self._init_ui()
 
     def _init_ui(self):
@@ -28,10 +39,36 @@ class BalanceTable:
         t.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         apply_header_style(self.table, BLUE_HEADER)
 
-        # 현금/총평가금액 표시
-    def render_summary(self, balance: float, total_pl: float):
-        """상단 제목줄을 갱신하거나 별도 QLabel에 표시"""
-        # print(f"[BalanceTable] 💰현금: {balance:,.0f} / 평가손익합계: {total_pl:+,.0f}")
+    # 현금/총평가금액 표시
+    def render_summary(self, totals):
+        """
+        aggregator 합계(AccountTotals)를 테이블 맨 아래 합계 행에 표시.
+        summary_label(QLabel) 이 있으면 현금/평가/손익 한 줄도 같이 갱신.
+        """
+        t = self.table
+        row = t.rowCount() - 1
+        if row < 0:
+            return
+        pl = totals.unrealized_pnl
+        items = [
+            QtWidgets.QTableWidgetItem("합계"),
+            QtWidgets.QTableWidgetItem(""),
+            QtWidgets.QTableWidgetItem(""),
+            QtWidgets.QTableWidgetItem(f"현금 {totals.cash:,.0f}"),
+            QtWidgets.QTableWidgetItem(f"{totals.asset_value:,.0f}"),
+            QtWidgets.QTableWidgetItem(f"{pl:+,.0f}"),
+        ]
+        self._set_row(row, items, pl)
+        for item in items:
+            font = item.font()
+            font.setBold(True)
+            item.setFont(font)
+
+        if self.summary_label is not None:
+            self.summary_label.setText(
+                f"현금 {totals.cash:,.0f}  |  평가금액 {totals.asset_value:,.0f}  |  "
+                f"총자산 {totals.equity:,.0f}  |  평가손익 {pl:+,.0f}"
+            )
 
     def render_from_summary(self, summary: dict, md_service):
         """
@@ -45,90 +82,92 @@ class BalanceTable:
             }
 
         md_service:
-            MarketDataService — get_last_price(symbol) 지원해야 함
+            MarketDataService — get_last_prices(symbols) (또는 get_last_price(symbol)) 지원해야 함
         """
 
-        positions = summary.get("positions", [])
-        cash = float(summary.get("balance", 0.0))
-
-        # 1) 심볼별 현재가 수집
-        prices = {}
-
-        for p in positions:
-            sym = p["symbol"]
+        account_id = summary.get("account_id", 0)
+        self.agg.load_summary(account_id, summary)
 
-            last_price = None
-            if hasattr(md_service, "get_last_price"):
+        # 1) 심볼별 현재가 (한 번에 조회) → 바뀐 심볼 행만 재평가
+        positions = summary.get("positions", [])
+        symbols = [p["symbol"] for p in positions]
+
+        fetched = {}
+        if hasattr(md_service, "get_last_prices"):
+            try:
+                fetched = md_service.get_last_prices(symbols)
+            except Exception:
+                fetched = {}
+        elif hasattr(md_service, "get_last_price"):
+            for sym in symbols:
                 try:
-                    last_price = md_service.get_last_price(sym)
-                except:
-                    last_price = None
-
-            if last_price is None:
-                last_price = p.get("avg_price", 0.0)
-
-            prices[sym] = float(last_price)
+                    fetched[sym] = md_service.get_last_price(sym)
+                except Exception:
+                    pass
 
-        # 2) 포지션 테이블 렌더링
-        self.render_positions(positions, prices)
+        for sym in symbols:
+            last_price = fetched.get(sym.upper(), fetched.get(sym))
+            if last_price is not None:
+                # 시세가 없으면 store 가 평균단가로 평가하므로 넘길 필요 없음
+                self.agg.update_price(sym, float(last_price))
 
-        # 3) 현금 + 총손익 출력
-        total_eval = sum(p["qty"] * prices.get(p["symbol"], p["avg_price"]) for p in positions)
-        total_pl = sum(
-            (prices.get(p["symbol"], p["avg_price"]) - p["avg_price"]) * p["qty"]
-            for p in positions
-        )
+        # 2) 포지션 테이블: aggregator 가 계산해 둔 행 값만 그린다 (바뀐 행만)
+        self.render_positions(account_id)
 
-        self.render_summary(cash, total_pl)
+        # 3) 현금 + 합계 (aggregator 합계 그대로)
+        self.totals = self.agg.totals(account_id)
+        self.render_summary(self.totals)
 
-    def render_positions(self, positions, prices: dict[str, float]):
+    def render_positions(self, account_id):
         """
-        positions: DBService.get_account_summary()['positions']
-        prices: {symbol: 현재가} from MarketDataService
+        aggregator 의 행 dict(qty/avg/last/asset_value/unrealized_pnl) 를 그대로 표시.
+        보유 종목 구성이 같으면 지난 렌더 이후 바뀐 행만 다시 쓴다 (SimAccount.changes_since).
+        마지막 행은 합계 행 (render_summary).
         """
-        # print('---------------------------------')
-        # print('render_positions')
-        t = self.table
-        t.clearContents()
-        if not positions:
-            t.setRowCount(0)
-            return
-
-        t.setRowCount(len(positions))
-
-        total_pl = 0.0
-        for row, pos in enumerate(positions):
-            symbol = pos["symbol"]
-            qty = float(pos["qty"])
-            avg_price = float(pos["avg_price"])
-            cur_price = float(prices.get(symbol, avg_price))
-            eval_value = qty * cur_price
-            pl = (cur_price - avg_price) * qty
-            total_pl += pl
-
-            # 색상: 손익 플러스=빨강, 마이너스=파랑
-            color = QtGui.QColor("red") if pl > 0 else QtGui.QColor("blue")
-
-            items = [
-                QtWidgets.QTableWidgetItem(symbol),
-                QtWidgets.QTableWidgetItem(f"{qty:,.4f}"),
-                QtWidgets.QTableWidgetItem(f"{avg_price:,.2f}"),
-                QtWidgets.QTableWidgetItem(f"{cur_price:,.2f}"),
-                QtWidgets.QTableWidgetItem(f"{eval_value:,.0f}"),
-                QtWidgets.QTableWidgetItem(f"{pl:+,.0f}"),
-            ]
-
-            for c, item in enumerate(items):
-                if c in (1, 2, 3, 4, 5):
-                    item.setTextAlignment(QtAlignRight | QtAlignVCenter)
-                else:
-                    item.setTextAlignment(QtAlignCenter)
-                if c == 5:
-                    item.setForeground(QtGui.QBrush(color))
-                t.setItem(row, c, item)
-
-        t.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        apply_header_style(self.table, BLUE_HEADER)
-
-        self.render_summary(sum([float(p["qty"]) * prices.get(p["symbol"], p["avg_price"]) for p in positions]), total_pl)
+        acc = self.agg.account(account_id)
+        state = acc.state
+        rows = [p for p in state["positions"] if p["qty"] != 0]
+        symbols = [p["symbol"] for p in rows]
 
+        t = self.table
+        if account_id != self._account_id or symbols != self._symbols:
+            t.clearContents()
+            t.setRowCount(len(rows) + 1)
+            for r, pos in enumerate(rows):
+                self._render_row(r, pos)
+            self._account_id = account_id
+            self._symbols = symbols
+            self._row_of = {sym: r for r, sym in enumerate(symbols)}
+        else:
+            for pos in acc.changes_since(self._version)["positions"]:
+                r = self._row_of.get(pos["symbol"])
+                if r is not None:
+                    self._render_row(r, pos)
+        self._version = state["version"]
+
+    def _render_row(self, row: int, pos: dict):
+        qty = pos["qty"]
+        avg_price = pos["avg_price"]
+        cur_price = pos["last_price"] or avg_price
+        pl = pos["unrealized_pnl"]
+        self._set_row(row, [
+            QtWidgets.QTableWidgetItem(pos["symbol"]),
+            QtWidgets.QTableWidgetItem(f"{qty:,.4f}"),
+            QtWidgets.QTableWidgetItem(f"{avg_price:,.2f}"),
+            QtWidgets.QTableWidgetItem(f"{cur_price:,.2f}"),
+            QtWidgets.QTableWidgetItem(f"{pos['asset_value']:,.0f}"),
+            QtWidgets.QTableWidgetItem(f"{pl:+,.0f}"),
+        ], pl)
+
+    def _set_row(self, row: int, items, pl: float):
+        # 색상: 손익 플러스=빨강, 마이너스=파랑
+        color = QtGui.QColor("red") if pl > 0 else QtGui.QColor("blue")
+        t = self.table
+        for c, item in enumerate(items):
+            if c in (1, 2, 3, 4, 5):
+                item.setTextAlignment(QtAlignRight | QtAlignVCenter)
+            else:
+                item.setTextAlignment(QtAlignCenter)
+            if c == 5:
+                item.setForeground(QtGui.QBrush(color))
+            t.setItem(row, c, item)
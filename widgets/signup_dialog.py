@@ -1,4 +1,4 @@
-import requests
+from infra.http import shared_transport
 from PyQt6.QtWidgets import QDialog, QFormLayout, QLineEdit, QDialogButtonBox, QMessageBox
 from services.db_service import DBService
 
@@ -40,7 +40,7 @@ class SignupDialog(QDialog):
         }
 
         try:
-            resp = requests.post(
+            resp = shared_transport().post(
                 "http://localhost:8000/signup",
                 json=payload,
                 timeout=5,